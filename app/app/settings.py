@@ -40,17 +40,20 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework.authtoken',
-    'core',
+    'core.apps.CoreConfig',
     'user',
     'projects',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    'core.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -89,6 +92,49 @@ DATABASES = {
     }
 }
 
+# Cache
+# Token authentications, facets, responses and their invalidations must be
+# seen by every worker process at once, so the cache is shared: memcached
+# with docker-compose, set with CACHE_BACKEND and CACHE_LOCATION, or the
+# database otherwise, after `python manage.py createcachetable`. Never a
+# per-process memory cache. A read of the database cache costs a query, so
+# token authentications aren't cached there.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'cache_table'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 100000)),
+        },
+    }
+}
+
+# Password hashing
+# New passwords are hashed with the first hasher, the others only verify
+# the hashes made before, upgraded on the next login.
+PASSWORD_HASHERS = [
+    'core.passwords.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+if os.environ.get('PASSWORD_HASHER') == 'pbkdf2':
+    PASSWORD_HASHERS.insert(0, PASSWORD_HASHERS.pop(1))
+# Costs of argon2id, memory in KiB
+ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', 2))
+ARGON2_MEMORY_COST = int(os.environ.get('ARGON2_MEMORY_COST', 19456))
+ARGON2_PARALLELISM = int(os.environ.get('ARGON2_PARALLELISM', 1))
+
+# Passwords are verified by a pool of threads, see core.passwords. Logins
+# are rejected with a 503 when more than PASSWORD_VERIFY_QUEUE wait for a
+# thread, or after waiting PASSWORD_VERIFY_TIMEOUT seconds.
+PASSWORD_VERIFY_WORKERS = int(os.environ.get('PASSWORD_VERIFY_WORKERS',
+                                             os.cpu_count() or 1))
+PASSWORD_VERIFY_QUEUE = int(os.environ.get('PASSWORD_VERIFY_QUEUE', 32))
+PASSWORD_VERIFY_TIMEOUT = float(os.environ.get('PASSWORD_VERIFY_TIMEOUT', 5))
+
+AUTHENTICATION_BACKENDS = ['core.backends.PasswordBackend']
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -128,3 +174,134 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 AUTH_USER_MODEL = 'core.User'
+
+# Seconds a token authentication is cached before checking the database
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.environ.get('AUTH_TOKEN_CACHE_TIMEOUT', 60))
+
+REST_FRAMEWORK = {
+    # The sub-requests of a batch are authenticated as the batch, see
+    # core.batch
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+        'core.authentication.BatchAuthentication',
+    ],
+    # Lists are paginated when a limit is given, see projects.pagination
+    'DEFAULT_PAGINATION_CLASS':
+        'projects.pagination.EstimatedCountPagination',
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.ClientThrottle',
+        'core.throttling.ScopedThrottle',
+    ],
+}
+
+# Requests allowed per client and scope, in bursts of up to the count,
+# see core.throttling. anon and user apply to every request, the other
+# scopes to the views with that throttle_scope.
+THROTTLE_RATES = {
+    'anon': os.environ.get('THROTTLE_RATE_ANON', '300/min'),
+    'user': os.environ.get('THROTTLE_RATE_USER', '1200/min'),
+    'messages': os.environ.get('THROTTLE_RATE_MESSAGES', '120/min'),
+    'token': os.environ.get('THROTTLE_RATE_TOKEN', '20/min'),
+    'signup': os.environ.get('THROTTLE_RATE_SIGNUP', '20/hour'),
+}
+# local keeps the buckets in each process, database shares them in the
+# database
+THROTTLE_BACKEND = os.environ.get('THROTTLE_BACKEND', 'local')
+
+
+# Metrics
+# With several worker processes, set PROMETHEUS_MULTIPROC_DIR to an empty
+# directory shared by them so /metrics aggregates the metrics of all.
+
+# When set, /metrics requires an "Authorization: Bearer <token>" header
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+
+# Profiler
+# Staff users profile a request by sending an X-Profile header or a profile
+# query parameter. Profiles are listed at /api/core/profiles/.
+
+# Seconds between two samples of the stack of the profiled request
+PROFILER_INTERVAL = float(os.environ.get('PROFILER_INTERVAL', 0.002))
+# Sampling stops after this many samples or seconds
+PROFILER_MAX_SAMPLES = 5000
+PROFILER_MAX_DURATION = 30
+# Number of functions kept in the table of a profile
+PROFILER_TOP = 30
+# Number of profiles kept, older ones are deleted
+PROFILER_KEEP = 100
+
+# Seconds the facet counts of a set of filters are cached, they are also
+# invalidated whenever organizations, projects or cooperators change
+FACETS_CACHE_TIMEOUT = int(os.environ.get('FACETS_CACHE_TIMEOUT', 300))
+
+# Responses with a body of at least this many bytes are compressed with
+# brotli or gzip, whichever the client accepts, see core.compression
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 5))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+# Seconds the compressed lists and details of projects and cooperators
+# are cached, they are also invalidated whenever they change
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
+# Most sub-requests in a batch, and threads running those of a parallel
+# batch, see core.batch
+BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', 20))
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', 4))
+
+# Days of messages listed unless a start date is given, 0 to list them all.
+# Off by default: every message older than the partitioning is kept in the
+# legacy partition, which no window skips
+MESSAGE_INBOX_DAYS = int(os.environ.get('MESSAGE_INBOX_DAYS', 0))
+
+# Tasks the workers queue again every some seconds after their last run,
+# with their arguments, see core.jobs. Set a period to 0 to turn it off
+JOB_SCHEDULES = {
+    'core.tasks.compute_trust_scores': {
+        'every': int(os.environ.get('TRUST_SCORES_EVERY', 24 * 3600)),
+    },
+    'core.tasks.archive_old_rows': {
+        'every': int(os.environ.get('ARCHIVE_EVERY', 24 * 3600)),
+        'kwargs': {
+            'message_days': int(os.environ.get('ARCHIVE_MESSAGE_DAYS', 730)),
+            'cooperation_days': int(
+                os.environ.get('ARCHIVE_COOPERATION_DAYS', 730)),
+        },
+    },
+    'core.tasks.purge_throttle_buckets': {
+        'every': int(os.environ.get('THROTTLE_PURGE_EVERY', 3600)),
+    },
+}
+
+
+# Results with more rows than this are counted with an estimate of the
+# planner on PostgreSQL, by the paginated lists and the admin
+ESTIMATED_COUNT_THRESHOLD = int(os.environ.get('ESTIMATED_COUNT_THRESHOLD',
+                                               10000))
+
+
+# Logging
+# https://docs.djangoproject.com/en/3.1/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'performance': {
+            'handlers': ['console'],
+            'level': os.environ.get('PERFORMANCE_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+        'jobs': {
+            'handlers': ['console'],
+            'level': os.environ.get('JOBS_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
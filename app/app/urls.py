@@ -16,8 +16,13 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import BatchView, metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/user/', include('user.urls')),
-    path('api/projects/', include('projects.urls'))
+    path('api/projects/', include('projects.urls')),
+    path('api/core/', include('core.urls')),
+    path('api/batch/', BatchView.as_view(), name='batch'),
 ]
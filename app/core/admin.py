@@ -1,13 +1,36 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models import Q
 from django.utils.translation import gettext as _
 
 from core import models
+from core.estimates import EstimatedCountPaginator
 
 
-class UserAdmin(BaseUserAdmin):
+class LargeTableAdmin(admin.ModelAdmin):
+    """Admin of a table too large to count or scan on every page.
+
+    Pages are counted with an estimate, and the search only matches ids
+    and exact values of the indexed search_fields.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ['-id']
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        condition = Q(pk=int(term)) if term.isdigit() else Q()
+        for field in self.search_fields:
+            condition |= Q(**{field: term})
+        return queryset.filter(condition), False
+
+
+class UserAdmin(LargeTableAdmin, BaseUserAdmin):
     ordering = ['id']
     list_display = ['email', 'name']
+    search_fields = ['email']
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
         (_('Personal Info'), {'fields': ('name',)}),
@@ -24,11 +47,72 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+@admin.register(models.Organization)
+class OrganizationAdmin(LargeTableAdmin):
+    list_display = ['id', 'name', 'country', 'user', 'deleted_at']
+    list_select_related = ['user']
+    raw_id_fields = ['user']
+    search_fields = ['name', 'country_code', 'user__email']
+
+
+@admin.register(models.CooperatorProfile)
+class CooperatorProfileAdmin(LargeTableAdmin):
+    list_display = ['user', 'name']
+    list_select_related = ['user']
+    raw_id_fields = ['user']
+    ordering = ['-user']
+    search_fields = ['user__email']
+
+
+@admin.register(models.Project)
+class ProjectAdmin(LargeTableAdmin):
+    list_display = ['id', 'name', 'organization', 'user']
+    list_select_related = ['organization', 'user']
+    raw_id_fields = ['organization', 'user']
+    search_fields = ['organization__name', 'user__email']
+
+
+@admin.register(models.PortfolioItem)
+class PortfolioItemAdmin(LargeTableAdmin):
+    list_display = ['id', 'name', 'user']
+    list_select_related = ['user']
+    raw_id_fields = ['user']
+    search_fields = ['user__email']
+
+
+@admin.register(models.Cooperation)
+class CooperationAdmin(LargeTableAdmin):
+    list_display = ['id', 'name', 'project', 'user', 'voluntary',
+                    'end_date', 'is_private']
+    list_select_related = ['project', 'user', 'voluntary']
+    raw_id_fields = ['project', 'user', 'voluntary']
+    search_fields = ['user__email', 'voluntary__email']
+
+
+@admin.register(models.Review)
+class ReviewAdmin(LargeTableAdmin):
+    list_display = ['id', 'name', 'cooperation', 'user', 'reviewed',
+                    'rating']
+    list_select_related = ['cooperation', 'user', 'reviewed']
+    raw_id_fields = ['cooperation', 'user', 'reviewed']
+    search_fields = ['user__email', 'reviewed__email']
+
+
+@admin.register(models.Message)
+class MessageAdmin(LargeTableAdmin):
+    list_display = ['id', 'user', 'recipient', 'date']
+    list_select_related = ['user', 'recipient']
+    raw_id_fields = ['user', 'recipient']
+    # Newest first by the index on date, which skips old partitions
+    ordering = ['-date']
+    search_fields = ['user__email', 'recipient__email']
+
+
+@admin.register(models.Job)
+class JobAdmin(LargeTableAdmin):
+    list_display = ['id', 'name', 'status', 'priority', 'run_at',
+                    'attempts', 'worker']
+    list_filter = ['status']
+
+
 admin.site.register(models.User, UserAdmin)
-admin.site.register(models.Organization)
-admin.site.register(models.CooperatorProfile)
-admin.site.register(models.Project)
-admin.site.register(models.PortfolioItem)
-admin.site.register(models.Cooperation)
-admin.site.register(models.Review)
-admin.site.register(models.Message)
@@ -0,0 +1,142 @@
+"""Move old rows out of the hot tables into compressed archive records.
+
+Messages older than a retention and cooperations that ended long ago,
+together with their reviews, are serialized to JSON, compressed and
+stored in ArchivedRecord before being deleted. Rows are moved in small
+batches, each in its own short transaction with a pause in between, so
+the locks held and the write load stay low. Archived rows can still be
+read by id with get_archived.
+"""
+import time
+import zlib
+from datetime import timedelta
+
+from django.core import serializers
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core import caching
+from core.models import ArchivedRecord, Cooperation, Message, Review
+
+
+DEFAULTS = {
+    'batch_size': 500,
+    'pause': 0.5,
+}
+
+
+def pack(instance):
+    """Return the compressed JSON of a model instance"""
+    return zlib.compress(
+        serializers.serialize('json', [instance]).encode(), 6)
+
+
+def unpack(data):
+    """Return the unsaved model instance of a compressed JSON"""
+    payload = zlib.decompress(bytes(data)).decode()
+    return next(serializers.deserialize('json', payload)).object
+
+
+def delete_rows(model, pks):
+    """Delete the rows of a model with some ids in a single statement.
+
+    Like the deletion collector, no signal is sent and nothing cascades,
+    the related rows are archived by the caller beforehand.
+    """
+    if not pks:
+        return
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    column = quote(model._meta.pk.column)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'DELETE FROM {table} WHERE {column} = ANY(%s)',
+                           [list(pks)])
+        else:
+            placeholders = ', '.join(['%s'] * len(pks))
+            cursor.execute(
+                f'DELETE FROM {table} WHERE {column} IN ({placeholders})',
+                list(pks))
+
+
+def archive_rows(model, pks):
+    """Archive and delete the rows of a model, returning how many moved.
+
+    A row archived before, then restored, replaces its old archive. The
+    rows are deleted without sending signals, so archiving a review leaves
+    the ratings of the reviewed user untouched.
+    """
+    label = model._meta.label_lower
+    rows = list(model.objects.filter(pk__in=pks).order_by('pk'))
+    pks = [row.pk for row in rows]
+    ArchivedRecord.objects.filter(model=label, object_id__in=pks).delete()
+    ArchivedRecord.objects.bulk_create([
+        ArchivedRecord(model=label, object_id=row.pk, data=pack(row))
+        for row in rows
+    ])
+    delete_rows(model, pks)
+    return len(rows)
+
+
+def archive_messages(rows):
+    with transaction.atomic():
+        return archive_rows(Message, rows)
+
+
+def archive_cooperations(rows):
+    with transaction.atomic():
+        reviews = Review.objects.filter(
+            cooperation__in=rows).values_list('pk', flat=True)
+        archive_rows(Review, list(reviews))
+        count = archive_rows(Cooperation, rows)
+    # No signal tells the cached full profiles of the volunteers
+    caching.invalidate('activity')
+    return count
+
+
+def archive_in_batches(candidates, archive, batch_size=None, pause=None,
+                       limit=None):
+    """Archive the rows of a queryset batch after batch.
+
+    Sleeps pause seconds between batches and stops after limit rows.
+    Returns the number of rows archived.
+    """
+    batch_size = batch_size or DEFAULTS['batch_size']
+    pause = DEFAULTS['pause'] if pause is None else pause
+    candidates = candidates.order_by('pk').values_list('pk', flat=True)
+
+    total = 0
+    while limit is None or total < limit:
+        size = batch_size if limit is None else \
+            min(batch_size, limit - total)
+        pks = list(candidates[:size])
+        if not pks:
+            break
+        total += archive(pks)
+        if len(pks) < size:
+            break
+        time.sleep(pause)
+    return total
+
+
+def archive_old_rows(message_days, cooperation_days, now=None, **options):
+    """Archive the messages and the ended cooperations older than some
+    days, returning the number of rows archived of each"""
+    now = now or timezone.now()
+    return {
+        'messages': archive_in_batches(
+            Message.objects.filter(
+                date__lt=now - timedelta(days=message_days)),
+            archive_messages, **options),
+        'cooperations': archive_in_batches(
+            Cooperation.objects.filter(
+                end_date__lt=(now - timedelta(days=cooperation_days)).date()),
+            archive_cooperations, **options),
+    }
+
+
+def get_archived(model, pk):
+    """Return the archived instance of a model with some id, or None"""
+    record = ArchivedRecord.objects.filter(
+        model=model._meta.label_lower, object_id=pk).first()
+    return unpack(record.data) if record else None
@@ -0,0 +1,48 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, \
+    TokenAuthentication
+
+from core import caching, metrics
+
+
+def token_cache_key(key):
+    """Return the cache key of a token without storing the token itself"""
+    return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+class BatchAuthentication(BaseAuthentication):
+    """Authenticate the sub-requests of a batch with the user and token of
+    the batch, already checked, see core.batch"""
+
+    def authenticate(self, request):
+        return getattr(request, 'batch_credentials', None)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication caching the user of each token for a while.
+
+    Not with the database cache, whose read costs as much as the query of
+    the token it would save.
+    """
+
+    def authenticate_credentials(self, key):
+        if caching.in_database():
+            return super().authenticate_credentials(key)
+        cache_key = token_cache_key(key)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            metrics.AUTH_CACHE.labels(result='hit').inc()
+            if not cached[0].is_active:
+                raise exceptions.AuthenticationFailed(
+                    _('User inactive or deleted.'))
+            return cached
+
+        metrics.AUTH_CACHE.labels(result='miss').inc()
+        user, token = super().authenticate_credentials(key)
+        cache.set(cache_key, (user, token), settings.AUTH_TOKEN_CACHE_TIMEOUT)
+        return user, token
@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from core import passwords
+
+
+class PasswordBackend(ModelBackend):
+    """Authenticate with email and password, verifying the password in
+    the verification pool instead of the request thread"""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        User = get_user_model()
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            return self.verify(User, username, password)
+        except passwords.VerificationBusy:
+            # Django's authenticate() stops at PermissionDenied and returns
+            # None, the API tells the client to retry instead, see
+            # user.serializers.AuthTokenSerializer
+            if request is not None:
+                request.verification_busy = True
+            raise PermissionDenied()
+
+    def verify(self, User, username, password):
+        """Return the user with a username and password, or None"""
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # Hash the password anyway so unknown emails take as long as
+            # wrong passwords
+            passwords.make_password(password)
+            return None
+        if passwords.check_password(user, password) and \
+                self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,103 @@
+"""Several API requests run in one round trip.
+
+Sub-requests call the views of their urls in the process, authenticated
+as the batch request, so its token is looked up once. They run one after
+the other in the given order, or in a pool of threads when the client
+says they are independent.
+"""
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connection, connections
+from django.urls import Resolver404, resolve
+from rest_framework import status
+
+
+logger = logging.getLogger('django.request')
+
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+
+def sub_request(request, method, url, body=None):
+    """Return a request to an url with the user of request"""
+    parts = urlsplit(url)
+    content = b'' if body is None else json.dumps(body).encode()
+    environ = dict(request.META)
+    # The credentials are those of the batch, already checked
+    for header in ('HTTP_AUTHORIZATION', 'HTTP_COOKIE',
+                   'HTTP_ACCEPT_ENCODING'):
+        environ.pop(header, None)
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': parts.path,
+        'QUERY_STRING': parts.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(content)),
+        'HTTP_ACCEPT': 'application/json',
+        'wsgi.input': io.BytesIO(content),
+    })
+    sub = WSGIRequest(environ)
+    if request.user.is_authenticated:
+        # Read by core.authentication.BatchAuthentication
+        sub.batch_credentials = (request.user, request.auth)
+    return sub
+
+
+def result(response):
+    """Return the status, headers and body of a response"""
+    content = response.content
+    if response.get('Content-Type', '').startswith('application/json'):
+        body = json.loads(content) if content else None
+    else:
+        body = content.decode(response.charset, errors='replace')
+    return {
+        'status': response.status_code,
+        'headers': dict(response.items()),
+        'body': body,
+    }
+
+
+def run(request, spec):
+    """Run a sub-request and return its result"""
+    try:
+        match = resolve(urlsplit(spec['url']).path)
+    except Resolver404:
+        return {'status': status.HTTP_404_NOT_FOUND, 'headers': {},
+                'body': {'detail': 'Not found.'}}
+
+    sub = sub_request(request, spec['method'], spec['url'], spec.get('body'))
+    sub.resolver_match = match
+    try:
+        response = match.func(sub, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+    except Exception:
+        logger.exception('Batch sub-request failed: %s %s', spec['method'],
+                         spec['url'])
+        return {'status': status.HTTP_500_INTERNAL_SERVER_ERROR,
+                'headers': {}, 'body': None}
+    return result(response)
+
+
+def run_in_thread(request, spec):
+    try:
+        return run(request, spec)
+    finally:
+        connections.close_all()
+
+
+def run_all(request, specs, parallel=False):
+    """Run sub-requests, in threads if parallel, and return their results
+    in order"""
+    # Other threads wouldn't see the uncommitted rows of a transaction
+    if not parallel or len(specs) < 2 or connection.in_atomic_block:
+        return [run(request, spec) for spec in specs]
+    workers = min(settings.BATCH_WORKERS, len(specs))
+    with ThreadPoolExecutor(workers, thread_name_prefix='batch') as pool:
+        return list(pool.map(partial(run_in_thread, request), specs))
@@ -0,0 +1,371 @@
+import itertools
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import models, seeding
+from projects.urls import router
+
+
+BENCHMARK_PASSWORD = 'benchpass'
+
+
+def seed_dataset(users=100):
+    """Create a dataset proportional to the number of users"""
+    return seeding.seed(users=users, password=BENCHMARK_PASSWORD,
+                        organization_ratio=0.2, messages_per_user=5)
+
+
+STANDARD_ACTIONS = (
+    ('list', 'get', False),
+    ('retrieve', 'get', True),
+    ('create', 'post', False),
+    ('update', 'put', True),
+    ('destroy', 'delete', True),
+)
+
+
+def route_actions():
+    """Yield every action of every route registered in the router"""
+    for prefix, viewset, basename in router.registry:
+        for action, method, detail in STANDARD_ACTIONS:
+            if hasattr(viewset, action):
+                yield basename, action, method, detail, \
+                    f'projects:{basename}-{"detail" if detail else "list"}'
+        for extra in viewset.get_extra_actions():
+            for method in extra.mapping:
+                if method == 'get':
+                    yield basename, extra.__name__, method, extra.detail, \
+                        f'projects:{basename}-{extra.url_name}'
+
+
+def benchmark_user():
+    """Return the seeded user used to authenticate and its token"""
+    user = models.User.objects.order_by('id').first()
+    token, _ = Token.objects.get_or_create(user=user)
+    return user, token.key
+
+
+def fixed(path, data=None, token=None):
+    """Return the preparation of a request always the same"""
+    return lambda: (path, data, token)
+
+
+class BenchmarkRows:
+    """Rows of the benchmark user the requests work on.
+
+    The requests needing rows of their own, like deleting or creating a
+    cooperator profile, get new ones made before the request is timed.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.volunteer, _ = self.new_user()
+        self.staff, self.staff_token = self.new_user(is_staff=True)
+        self.objects = {
+            'organization': self.new_row('organization'),
+            'cooperatorprofile':
+                models.CooperatorProfile.objects.get_or_create(
+                    user=user, defaults={'name': 'Benchmark user',
+                                         'description': 'Cooperator'})[0],
+        }
+        for basename in ('project', 'portfolioitem', 'cooperation',
+                         'review', 'message'):
+            self.objects[basename] = self.new_row(basename)
+        self.request_profile = models.RequestProfile.objects.create(
+            user=self.staff, method='GET', path='/api/projects/projects/',
+            status_code=200, duration_ms=1, interval_ms=1, samples=1,
+            folded='main 1')
+
+    def unique(self):
+        with self.lock:
+            return next(self.counter)
+
+    def new_user(self, **fields):
+        """Return a new user and its token"""
+        i = self.unique()
+        user = models.User.objects.create_user(
+            f'bench-user{i}@xemob.com', name=f'Bench user {i}', **fields)
+        return user, Token.objects.create(user=user).key
+
+    def new_row(self, basename, user=None):
+        """Create a row of a route owned by a user, the benchmark one by
+        default"""
+        user = user or self.user
+        i = self.unique()
+        if basename == 'organization':
+            return models.Organization.objects.create(
+                user=user, name=f'Bench NGO {i}', country='Spain')
+        if basename == 'cooperatorprofile':
+            return models.CooperatorProfile.objects.create(
+                user=user, name=f'Bench user {i}', description='Cooperator')
+        if basename == 'project':
+            return models.Project.objects.create(
+                user=user, organization=self.objects['organization'],
+                name=f'Bench project {i}')
+        if basename == 'portfolioitem':
+            return models.PortfolioItem.objects.create(
+                user=user, name=f'Bench item {i}')
+        if basename == 'cooperation':
+            return models.Cooperation.objects.create(
+                user=user, voluntary=self.volunteer,
+                project=self.objects['project'], name=f'Bench cooperation {i}')
+        if basename == 'review':
+            return models.Review.objects.create(
+                user=user, reviewed=self.volunteer,
+                cooperation=self.objects['cooperation'],
+                name=f'Bench review {i}', review='Good', rating=4)
+        return models.Message.objects.create(
+            user=user, recipient=self.volunteer, message=f'Hello {i}')
+
+    def payload(self, basename, user=None):
+        """Return a valid payload to create or update a row of a route"""
+        user = (user or self.user).id
+        i = self.unique()
+        return {
+            'organization': {'user': user, 'name': f'New NGO {i}',
+                             'country': 'Spain'},
+            'cooperatorprofile': {'user': user, 'name': f'New name {i}',
+                                  'description': 'New description'},
+            'project': {'user': user, 'name': f'New project {i}',
+                        'organization': self.objects['organization'].id},
+            'portfolioitem': {'user': user, 'name': f'New item {i}'},
+            'cooperation': {'user': user, 'name': f'New cooperation {i}',
+                            'project': self.objects['project'].id,
+                            'voluntary': self.volunteer.id},
+            'review': {'user': user, 'name': f'New review {i}',
+                       'cooperation': self.objects['cooperation'].id,
+                       'reviewed': self.volunteer.id, 'review': 'Good'},
+            'message': {'user': user, 'recipient': self.volunteer.id,
+                        'message': f'Hello again {i}'},
+        }[basename]
+
+    def prepare(self, basename, action, detail, url_name):
+        """Return the function preparing each request of a route action:
+        it returns the path, the data and the token of the request, None
+        for the token of the benchmark user"""
+        row = self.objects[basename]
+
+        def detail_path(pk):
+            return reverse(url_name, args=[pk])
+
+        if action == 'destroy':
+            if basename == 'cooperatorprofile':
+                def prepare():
+                    user, token = self.new_user()
+                    self.new_row(basename, user)
+                    return detail_path(user.pk), None, token
+                return prepare
+            return lambda: (detail_path(self.new_row(basename).pk), None,
+                            None)
+        if action == 'create':
+            if basename == 'cooperatorprofile':
+                def prepare():
+                    user, token = self.new_user()
+                    return reverse(url_name), self.payload(basename, user), \
+                        token
+                return prepare
+            return lambda: (reverse(url_name), self.payload(basename), None)
+        if action == 'update':
+            return lambda: (detail_path(row.pk), self.payload(basename),
+                            None)
+        return fixed(detail_path(row.pk) if detail else reverse(url_name))
+
+
+def build_scenarios(user, token):
+    """Return one scenario for each action of each route of the API.
+
+    A scenario is a name, a method and a function returning the path, the
+    data and the token of each request, called before timing it.
+    """
+    rows = BenchmarkRows(user)
+    scenarios = [
+        (url_name, method, rows.prepare(basename, action, detail, url_name))
+        for basename, action, method, detail, url_name in route_actions()
+    ]
+
+    def new_user():
+        i = rows.unique()
+        return reverse('user:create'), {
+            'email': f'bench-new{i}@xemob.com',
+            'password': BENCHMARK_PASSWORD, 'name': 'New user'}, None
+
+    def deleted_user():
+        return reverse('user:me'), None, rows.new_user()[1]
+
+    profile = [rows.request_profile.pk]
+    project, organization = (rows.objects['project'].pk,
+                             rows.objects['organization'].pk)
+    # The routes outside the router of the projects API
+    scenarios.extend([
+        ('projects:api-root', 'get', fixed(reverse('projects:api-root'))),
+        ('projects:facets', 'get',
+         fixed(reverse('projects:facets'), {'country': 'ES'})),
+        ('user:create', 'post', new_user),
+        ('user:token', 'post',
+         fixed(reverse('user:token'),
+               {'email': user.email, 'password': BENCHMARK_PASSWORD})),
+        ('user:me', 'get', fixed(reverse('user:me'))),
+        ('user:me', 'put',
+         fixed(reverse('user:me'),
+               {'email': user.email, 'password': BENCHMARK_PASSWORD,
+                'name': 'Benchmark user'})),
+        ('user:me', 'patch',
+         fixed(reverse('user:me'), {'name': 'Benchmark user'})),
+        ('user:me', 'delete', deleted_user),
+        ('core:api-root', 'get', fixed(reverse('core:api-root'))),
+        ('core:requestprofile-list', 'get',
+         fixed(reverse('core:requestprofile-list'), token=rows.staff_token)),
+        ('core:requestprofile-detail', 'get',
+         fixed(reverse('core:requestprofile-detail', args=profile),
+               token=rows.staff_token)),
+        ('core:requestprofile-folded', 'get',
+         fixed(reverse('core:requestprofile-folded', args=profile),
+               token=rows.staff_token)),
+        ('batch', 'post', fixed(reverse('batch'), {'requests': [
+            {'url': reverse('projects:project-detail', args=[project])},
+            {'url': reverse('projects:organization-detail',
+                            args=[organization])},
+        ]})),
+        ('metrics', 'get', fixed(reverse('metrics'))),
+    ])
+    return scenarios
+
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of a sorted list of values"""
+    if not values:
+        return None
+    rank = max(1, int(round(percent / 100 * len(values))))
+    return values[min(rank, len(values)) - 1]
+
+
+def run_scenario(scenario, token, requests=100, concurrency=1):
+    """Send the requests of a scenario and return its statistics"""
+    name, method, prepare = scenario
+    per_worker = [requests // concurrency] * concurrency
+    for i in range(requests % concurrency):
+        per_worker[i] += 1
+
+    def worker(count):
+        client = APIClient()
+        samples = []
+        try:
+            for _ in range(count):
+                path, data, request_token = prepare()
+                request_token = request_token or token
+                client.credentials(**(
+                    {'HTTP_AUTHORIZATION': f'Token {request_token}'}
+                    if request_token else {}))
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    res = getattr(client, method)(path, data, format='json')
+                    elapsed = time.perf_counter() - start
+                samples.append((elapsed, len(queries), res.status_code,
+                                path))
+        finally:
+            if concurrency > 1:
+                connection.close()
+        return samples
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(worker, per_worker))
+    else:
+        results = [worker(requests)]
+    wall = time.perf_counter() - start
+
+    samples = [sample for result in results for sample in result]
+    latencies = sorted(sample[0] * 1000 for sample in samples)
+
+    return {
+        'name': name,
+        'method': method.upper(),
+        'path': samples[0][3] if samples else None,
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample[2] >= 400),
+        'concurrency': concurrency,
+        'rps': round(len(samples) / wall, 2) if wall else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'mean': round(statistics.mean(latencies), 3),
+            'max': round(latencies[-1], 3),
+        },
+        'queries_per_request': round(
+            statistics.mean(sample[1] for sample in samples), 2),
+    }
+
+
+def run_benchmark(users=100, requests=100, concurrency=1):
+    """Seed a dataset and benchmark every route, returning a report"""
+    dataset = seed_dataset(users)
+    user, token = benchmark_user()
+    # A single client sends every request, throttling would reject most
+    with override_settings(THROTTLE_RATES={}):
+        endpoints = [
+            run_scenario(scenario, token, requests, concurrency)
+            for scenario in build_scenarios(user, token)
+        ]
+
+    return {
+        'meta': {
+            'vendor': connection.vendor,
+            'dataset': dataset,
+            'requests': requests,
+            'concurrency': concurrency,
+        },
+        'endpoints': endpoints,
+    }
+
+
+def run_login_benchmark(requests=100, concurrency=1, hasher=None):
+    """Benchmark the logins of a user with a password hasher, the first
+    of the settings by default, returning a report with the logins per
+    second per core"""
+    hashers = list(settings.PASSWORD_HASHERS)
+    if hasher:
+        hashers.insert(0, hashers.pop(hashers.index(hasher)))
+    cores = min(concurrency, settings.PASSWORD_VERIFY_WORKERS,
+                os.cpu_count() or 1)
+
+    with override_settings(PASSWORD_HASHERS=hashers, THROTTLE_RATES={}):
+        algorithm = get_hasher().algorithm
+        user = models.User.objects.create_user(
+            'bench-login@xemob.com', BENCHMARK_PASSWORD)
+        scenario = ('user:token', 'post',
+                    lambda: (reverse('user:token'),
+                             {'email': user.email,
+                              'password': BENCHMARK_PASSWORD}, None))
+        try:
+            endpoint = run_scenario(scenario, None, requests, concurrency)
+        finally:
+            user.delete()
+
+    endpoint['cores'] = cores
+    endpoint['logins_per_core'] = round(endpoint['rps'] / cores, 2) \
+        if endpoint['rps'] else None
+    return {
+        'meta': {
+            'vendor': connection.vendor,
+            'hasher': algorithm,
+            'requests': requests,
+            'concurrency': concurrency,
+            'cpu_count': os.cpu_count(),
+        },
+        'endpoints': [endpoint],
+    }
@@ -0,0 +1,70 @@
+import hashlib
+import json
+import time
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.db import DatabaseCache
+
+
+def in_database():
+    """Return whether the default cache is kept in the database, where a
+    read costs a query"""
+    return isinstance(caches['default'], DatabaseCache)
+
+
+def _generation_key(namespace):
+    return f'generation:{namespace}'
+
+
+def generations(namespaces):
+    """Return the current generations of the cached values of namespaces,
+    read in one round trip"""
+    keys = [_generation_key(namespace) for namespace in namespaces]
+    values = cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        # A fresh start, never a generation used before an eviction
+        for key in missing:
+            cache.add(key, time.time_ns(), None)
+        values.update(cache.get_many(missing))
+    return [values[key] for key in keys]
+
+
+def generation(namespace):
+    """Return the current generation of the cached values of a namespace"""
+    return generations([namespace])[0]
+
+
+def invalidate(namespace):
+    """Make every value cached in a namespace stale at once"""
+    try:
+        cache.incr(_generation_key(namespace))
+    except ValueError:
+        cache.set(_generation_key(namespace), time.time_ns(), None)
+
+
+def cache_key(namespaces, params):
+    """Return the key of the value cached for some parameters.
+
+    Keys include the generation of the namespaces, so invalidating any of
+    them doesn't need to know which parameters were cached.
+    """
+    if isinstance(namespaces, str):
+        namespaces = (namespaces,)
+    digest = hashlib.sha256(
+        json.dumps(params, sort_keys=True).encode()).hexdigest()
+    prefix = ':'.join(
+        f'{namespace}:{value}'
+        for namespace, value in zip(namespaces, generations(namespaces)))
+    return f'{prefix}:{digest}'
+
+
+def cached(namespace, params, compute, timeout):
+    """Return the value computed for some parameters, from the cache if
+    possible"""
+    key = cache_key(namespace, params)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
@@ -0,0 +1,87 @@
+"""Compression of the responses negotiated with Accept-Encoding.
+
+Brotli is preferred when the brotli package is installed and the client
+accepts it, gzip otherwise. Bodies smaller than COMPRESSION_MIN_SIZE are
+sent as they are, compressing them would barely save anything.
+"""
+import gzip
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+ACCEPT_ENCODING = re.compile(r'([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?')
+
+
+def encoders():
+    """Return the available compressions, the preferred first"""
+    available = {}
+    if brotli is not None:
+        available['br'] = lambda content: brotli.compress(
+            content, quality=settings.BROTLI_QUALITY)
+    available['gzip'] = lambda content: gzip.compress(
+        content, compresslevel=settings.GZIP_LEVEL, mtime=0)
+    return available
+
+
+def negotiate(request):
+    """Return the preferred compression accepted by the client, or None"""
+    accepted = {}
+    for name, quality in ACCEPT_ENCODING.findall(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')):
+        try:
+            accepted[name.lower()] = float(quality) if quality else 1
+        except ValueError:
+            continue
+    for encoding in encoders():
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(content, encoding):
+    """Return the content compressed, or as it is if it is small"""
+    if encoding is None or len(content) < settings.COMPRESSION_MIN_SIZE:
+        return content
+    return encoders()[encoding](content)
+
+
+def encode_response(response, content, encoding):
+    """Set the content of a response, already compressed with encoding"""
+    response.content = content
+    if encoding is not None:
+        response['Content-Encoding'] = encoding
+        # Like the GZipMiddleware of Django, the ETag of the uncompressed
+        # body is no longer a strong validator
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+    response['Content-Length'] = str(len(content))
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+class CompressionMiddleware:
+    """Compress the responses for the clients accepting it"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.streaming or response.has_header('Content-Encoding') \
+                or len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request)
+        if encoding is None:
+            return response
+        return encode_response(response, compress(response.content, encoding),
+                               encoding)
@@ -0,0 +1,131 @@
+"""Delete users and organizations in the background.
+
+Deleting a user or an organization only marks it as deleted, which hides
+it at once. purge_deleted later deletes the rows depending on it table by
+table, in small batches each in its own transaction so no lock is held
+for long, and the user or organization itself last, when nothing is left
+to cascade to.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core import caching
+from core.models import Organization, Project, Cooperation, Review, \
+    PortfolioItem, Message, RequestProfile
+
+
+DEFAULTS = {
+    'batch_size': 500,
+    'pause': 0.1,
+}
+
+
+def soft_delete_organization(organization):
+    """Hide an organization and its projects until it is purged"""
+    organization.deleted_at = timezone.now()
+    organization.save(update_fields=['deleted_at'])
+
+
+def soft_delete_user(user):
+    """Deactivate a user and hide the organizations and the rows of the
+    user until they are purged"""
+    now = timezone.now()
+    with transaction.atomic():
+        user.deleted_at = now
+        user.is_active = False
+        user.save(update_fields=['deleted_at', 'is_active'])
+        Token.objects.filter(user=user).delete()
+        Organization.objects.filter(user=user).alive().update(deleted_at=now)
+    caching.invalidate('directory')
+
+
+def organization_steps(organization):
+    """Return the rows to delete before an organization, leaves first"""
+    return [
+        ('reviews', Review.objects.filter(
+            cooperation__project__organization=organization), None),
+        ('cooperations', Cooperation.objects.filter(
+            project__organization=organization), None),
+        ('projects', Project.objects.filter(organization=organization),
+         None),
+    ]
+
+
+def user_steps(user):
+    """Return the rows to delete, or to detach from a user, before the
+    user, leaves first"""
+    steps = [
+        ('reviews', Review.objects.filter(cooperation__project__user=user),
+         None),
+        ('cooperations', Cooperation.objects.filter(project__user=user),
+         None),
+        ('projects', Project.objects.filter(user=user), None),
+        ('portfolio items', PortfolioItem.objects.filter(user=user), None),
+        ('sent messages', Message.objects.filter(user=user), None),
+        ('received messages', Message.objects.filter(recipient=user), None),
+    ]
+    # Rows kept for the other users only lose their link to the user
+    for model, field in ((Review, 'user'), (Review, 'reviewed'),
+                         (Cooperation, 'user'), (Cooperation, 'voluntary'),
+                         (RequestProfile, 'user')):
+        steps.append((f'{model._meta.verbose_name_plural} ({field})',
+                      model.objects.filter(**{field: user}), {field: None}))
+    return steps
+
+
+def run_steps(steps, batch_size, pause, progress):
+    """Delete, or update, the rows of each step batch after batch"""
+    for label, queryset, update in steps:
+        pks = queryset.order_by().values_list('pk', flat=True)
+        done = 0
+        while True:
+            batch = list(pks[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                rows = queryset.model.objects.filter(pk__in=batch)
+                if update:
+                    rows.update(**update)
+                else:
+                    rows.delete()
+            done += len(batch)
+            progress(label, done)
+            time.sleep(pause)
+
+
+def purge_deleted(batch_size=None, pause=None, progress=None):
+    """Delete the organizations and users marked as deleted with every
+    row depending on them.
+
+    progress is called with a label and the number of rows processed so
+    far after each batch. Returns the number of organizations and users
+    deleted.
+    """
+    batch_size = batch_size or DEFAULTS['batch_size']
+    pause = DEFAULTS['pause'] if pause is None else pause
+    progress = progress or (lambda label, count: None)
+
+    counts = {'organizations': 0, 'users': 0}
+    for organization in Organization.objects.deleted().order_by('pk'):
+        run_steps(organization_steps(organization), batch_size, pause,
+                  progress)
+        label = f'organization {organization.pk}'
+        organization.delete()
+        progress(label, 1)
+        counts['organizations'] += 1
+
+    for user in get_user_model().objects.filter(
+            deleted_at__isnull=False).order_by('pk'):
+        for organization in Organization.objects.filter(user=user):
+            run_steps(organization_steps(organization), batch_size, pause,
+                      progress)
+        run_steps(user_steps(user), batch_size, pause, progress)
+        label = f'user {user.pk}'
+        user.delete()
+        progress(label, 1)
+        counts['users'] += 1
+    return counts
@@ -0,0 +1,63 @@
+"""Approximate row counts from the statistics of PostgreSQL.
+
+COUNT(*) reads every row, or every index entry, of what it counts. Pages
+of large tables only need a count of the right magnitude, which the
+planner estimates at no cost from the statistics gathered by ANALYZE.
+Counts under ESTIMATED_COUNT_THRESHOLD are exact: they are cheap, and the
+estimates of small or selective queries are the least reliable.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def table_estimate(model, using='default'):
+    """Return the estimated number of rows of the table of a model,
+    summing its partitions if it is partitioned"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            'SELECT COALESCE(SUM(GREATEST(reltuples, 0)), 0) FROM pg_class '
+            'WHERE oid = %s::regclass OR oid IN (SELECT inhrelid FROM '
+            'pg_inherits WHERE inhparent = %s::regclass)',
+            [model._meta.db_table] * 2
+        )
+        return int(cursor.fetchone()[0])
+
+
+def plan_estimate(queryset):
+    """Return the number of rows the planner expects a query to return"""
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimated_count(queryset):
+    """Return the number of rows of a queryset, estimated when large.
+
+    Returns whether the count is exact too.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.count(), True
+    if queryset.query.where or queryset.query.distinct:
+        estimate = plan_estimate(queryset)
+    else:
+        estimate = table_estimate(queryset.model, queryset.db)
+    if estimate < settings.ESTIMATED_COUNT_THRESHOLD:
+        return queryset.count(), True
+    return estimate, False
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator counting the large querysets with an estimate.
+
+    The last pages may come out empty or missing when the estimate is
+    off.
+    """
+
+    @cached_property
+    def count(self):
+        count, self.count_is_exact = estimated_count(self.object_list)
+        return count
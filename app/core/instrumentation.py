@@ -0,0 +1,100 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+
+_current_timings = ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    """Time spent in each part of a request"""
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.durations = defaultdict(float)
+        self.db_queries = 0
+        self.view = None
+        self.action = None
+        self._depth = defaultdict(int)
+
+    def add(self, name, seconds):
+        self.durations[name] += seconds
+
+    @contextmanager
+    def measure(self, name):
+        """Add the time spent in the block, ignoring nested blocks"""
+        self._depth[name] += 1
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self._depth[name] -= 1
+            if not self._depth[name]:
+                self.add(name, perf_counter() - start)
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """Database execute wrapper counting queries and their time"""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.add('db', perf_counter() - start)
+
+    def stop(self):
+        self.durations['total'] = perf_counter() - self.started
+
+    def as_fields(self):
+        """Return the timings in milliseconds as flat log fields"""
+        fields = {f'{name}_ms': round(seconds * 1000, 3)
+                  for name, seconds in self.durations.items()}
+        fields.update({'db_queries': self.db_queries,
+                       'view': self.view, 'action': self.action})
+        return fields
+
+    def server_timing(self):
+        """Return the timings as a Server-Timing header value"""
+        metrics = []
+        for name in ('total', 'db', 'serializer', 'render'):
+            metric = f'{name};dur={self.durations[name] * 1000:.3f}'
+            if name == 'db':
+                metric += f';desc="{self.db_queries} queries"'
+            metrics.append(metric)
+        return ', '.join(metrics)
+
+
+def activate(timings):
+    """Make timings the ones of the current request, return a token"""
+    return _current_timings.set(timings)
+
+
+def deactivate(token):
+    _current_timings.reset(token)
+
+
+def current_timings():
+    return _current_timings.get()
+
+
+@contextmanager
+def measure(name):
+    """Add the time spent in the block to the current request, if any"""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    with timings.measure(name):
+        yield
+
+
+class TimedSerializerMixin:
+    """Serializer mixin adding its time to the current request timings"""
+
+    def to_representation(self, instance):
+        with measure('serializer'):
+            return super().to_representation(instance)
+
+    def is_valid(self, raise_exception=False):
+        with measure('serializer'):
+            return super().is_valid(raise_exception=raise_exception)
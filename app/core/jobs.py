@@ -0,0 +1,299 @@
+"""A job queue stored in the database.
+
+Tasks are plain functions registered with the task decorator and queued
+with enqueue, in the transaction of the caller so a job is only seen by
+the workers once the data it works on is committed. Workers claim the
+next job with SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL, so they
+never wait for each other, and retry failed jobs with an exponential
+backoff until their attempts run out. A running job has its heartbeat
+refreshed every minute, and running workers queue again the jobs whose
+heartbeat stopped, left by dead workers, as well as the next run of the
+tasks scheduled in JOB_SCHEDULES.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import Job
+
+
+logger = logging.getLogger('jobs')
+
+DEFAULTS = {
+    'max_attempts': 5,
+    # Seconds before the first retry, doubled on every attempt
+    'backoff': 10,
+    'max_backoff': 3600,
+    # Seconds to wait for new jobs when the queue is empty
+    'poll': 1.0,
+    # Seconds between two heartbeats of a running job
+    'heartbeat': 60,
+    # Seconds without a heartbeat after which a running job is deemed
+    # abandoned by its worker
+    'stale_after': 300,
+    # Seconds between two checks of the stale jobs and of the schedules
+    'maintenance': 60,
+}
+
+TASKS = {}
+
+
+def task(function=None, name=None):
+    """Register a function as a task that can be queued by name"""
+    def register(function):
+        TASKS[name or f'{function.__module__}.{function.__name__}'] = \
+            function
+        return function
+    return register(function) if function else register
+
+
+def task_name(function):
+    for name, registered in TASKS.items():
+        if registered is function:
+            return name
+    raise KeyError(f'{function!r} is not a registered task')
+
+
+def enqueue(function, priority=0, run_at=None, delay=None,
+            max_attempts=None, unique=False, **kwargs):
+    """Queue a task to run with some keyword arguments.
+
+    Jobs of higher priority run first, and none before run_at or delay
+    seconds from now. The arguments must be serializable to JSON. A unique
+    task isn't queued again while it waits to run, the queued job is
+    returned instead.
+    """
+    name = function if isinstance(function, str) else task_name(function)
+    if name not in TASKS:
+        raise KeyError(f'{name} is not a registered task')
+    if unique:
+        queued = Job.objects.filter(name=name, status=Job.QUEUED).first()
+        if queued:
+            return queued
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    return Job.objects.create(
+        name=name, kwargs=kwargs, priority=priority, run_at=run_at,
+        max_attempts=max_attempts or DEFAULTS['max_attempts'])
+
+
+def backoff(attempts):
+    """Return the seconds to wait before retrying after some attempts"""
+    return min(DEFAULTS['backoff'] * 2 ** (attempts - 1),
+               DEFAULTS['max_backoff'])
+
+
+def claim(worker):
+    """Mark the next job due as running by a worker and return it.
+
+    Returns None when no job is due.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = Job.objects.select_for_update(skip_locked=True).filter(
+            status=Job.QUEUED, run_at__lte=now
+        ).order_by('-priority', 'run_at', 'id').first()
+        if job is None:
+            return None
+        # Databases without row locks may hand the same job to two workers,
+        # only the first one to update it gets it
+        claimed = Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, attempts=job.attempts + 1, started_at=now,
+            heartbeat_at=now, worker=worker)
+    if not claimed:
+        return claim(worker)
+    job.refresh_from_db()
+    return job
+
+
+def owned(job):
+    """Return the job row while the worker running job still owns it"""
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING,
+                              worker=job.worker, attempts=job.attempts)
+
+
+def heartbeat(job, stop):
+    """Refresh the heartbeat of a running job until stop is set"""
+    try:
+        while not stop.wait(DEFAULTS['heartbeat']):
+            try:
+                owned(job).update(heartbeat_at=timezone.now())
+            except DatabaseError:
+                logger.warning('Could not refresh job %s', job.pk,
+                               exc_info=True)
+                connection.close_if_unusable_or_obsolete()
+    finally:
+        connection.close()
+
+
+def run(job):
+    """Run a claimed job, queueing it again with a delay if it fails.
+
+    The outcome is only saved if the job is still owned by its worker, not
+    queued again meanwhile for another one.
+    """
+    started = time.perf_counter()
+    stop = threading.Event()
+    beating = threading.Thread(target=heartbeat, args=(job, stop),
+                               name=f'heartbeat-{job.pk}', daemon=True)
+    beating.start()
+    try:
+        TASKS[job.name](**job.kwargs)
+    except Exception:
+        job.error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + timedelta(
+                seconds=backoff(job.attempts))
+        else:
+            job.status = Job.FAILED
+        logger.warning('Job %s %s failed (attempt %s of %s)', job.pk,
+                       job.name, job.attempts, job.max_attempts,
+                       exc_info=True)
+    else:
+        job.status = Job.DONE
+        job.error = ''
+    finally:
+        stop.set()
+        beating.join()
+    job.finished_at = timezone.now()
+    if not owned(job).update(status=job.status, run_at=job.run_at,
+                             error=job.error, finished_at=job.finished_at):
+        logger.warning('Job %s %s was taken over, its outcome is dropped',
+                       job.pk, job.name)
+        return job
+    logger.info('Job %s %s %s in %.1fms', job.pk, job.name, job.status,
+                (time.perf_counter() - started) * 1000)
+    return job
+
+
+def requeue_stale(stale_after=None):
+    """Queue again the running jobs without a recent heartbeat, left by
+    dead workers, or fail those out of attempts.
+
+    Returns the number of jobs queued again.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.RUNNING, heartbeat_at__lt=now - timedelta(
+            seconds=stale_after or DEFAULTS['stale_after']))
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, finished_at=now,
+        error='Abandoned by its worker')
+    return stale.filter(attempts__lt=F('max_attempts')).update(
+        status=Job.QUEUED, run_at=now)
+
+
+def lock(name):
+    """Hold a lock on a name until the end of the transaction.
+
+    Only on PostgreSQL, with an advisory lock.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))',
+                           [name])
+
+
+def schedule(now=None):
+    """Queue the next run of the scheduled tasks not queued or running.
+
+    A task of JOB_SCHEDULES runs every some seconds after its last run, at
+    once if it never ran. Returns the jobs queued.
+    """
+    now = now or timezone.now()
+    queued = []
+    for name, spec in settings.JOB_SCHEDULES.items():
+        if not spec['every']:
+            continue
+        with transaction.atomic():
+            # Workers checking the schedules at the same time would queue
+            # the same run twice
+            lock(name)
+            last = Job.objects.filter(name=name).order_by('-run_at').first()
+            if last is not None and last.status in (Job.QUEUED, Job.RUNNING):
+                continue
+            run_at = now if last is None else max(
+                now, last.run_at + timedelta(seconds=spec['every']))
+            queued.append(enqueue(name, run_at=run_at,
+                                  **spec.get('kwargs', {})))
+    return queued
+
+
+def maintain(scheduled=True):
+    """Queue again the stale jobs and, if scheduled, the next runs of the
+    scheduled tasks"""
+    requeued = requeue_stale()
+    if requeued:
+        logger.warning('Queued %s abandoned jobs again', requeued)
+    if scheduled:
+        for job in schedule():
+            logger.info('Scheduled %s at %s', job.name, job.run_at)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:' \
+           f'{threading.current_thread().name}'
+
+
+def work(burst=False, poll=None, stop=None):
+    """Run the queued jobs one after another.
+
+    Waits poll seconds for new jobs when the queue is empty, or returns
+    when burst is set. Also returns once the stop event is set. Every few
+    minutes, and first of all, queues the stale jobs again and, unless
+    burst is set, the scheduled tasks. Returns the number of jobs run.
+    """
+    poll = DEFAULTS['poll'] if poll is None else poll
+    stop = stop or threading.Event()
+    count = 0
+    maintained = None
+    while not stop.is_set():
+        try:
+            if maintained is None or time.monotonic() - maintained >= \
+                    DEFAULTS['maintenance']:
+                maintain(scheduled=not burst)
+                maintained = time.monotonic()
+            job = claim(worker_name())
+        except DatabaseError:
+            # Lost connections and lock timeouts are retried after a while
+            logger.warning('Could not claim a job', exc_info=True)
+            connection.close_if_unusable_or_obsolete()
+            stop.wait(poll)
+            continue
+        if job is None:
+            if burst:
+                break
+            stop.wait(poll)
+            continue
+        run(job)
+        count += 1
+    return count
+
+
+def work_in_thread(**options):
+    try:
+        return work(**options)
+    finally:
+        # Each thread opens its own connection
+        connection.close()
+
+
+def work_in_threads(threads=1, **options):
+    """Run the queued jobs in a pool of threads, returning how many ran"""
+    if threads == 1:
+        return work(**options)
+    with ThreadPoolExecutor(threads, thread_name_prefix='worker') as pool:
+        futures = [pool.submit(work_in_thread, **options)
+                   for _ in range(threads)]
+        return sum(future.result() for future in futures)
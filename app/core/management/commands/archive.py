@@ -0,0 +1,32 @@
+from django.core.management import BaseCommand
+
+from core.archive import DEFAULTS, archive_old_rows
+
+
+class Command(BaseCommand):
+    """Django command to move old rows to the compressed archive"""
+    help = 'Archive old messages and cooperations that ended long ago'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--message-days', type=int, default=730,
+                            help='Archive the messages older than this '
+                                 'many days')
+        parser.add_argument('--cooperation-days', type=int, default=730,
+                            help='Archive the cooperations, and their '
+                                 'reviews, ended this many days ago')
+        parser.add_argument('--batch-size', type=int,
+                            default=DEFAULTS['batch_size'])
+        parser.add_argument('--pause', type=float, default=DEFAULTS['pause'],
+                            help='Seconds to sleep between two batches')
+        parser.add_argument('--limit', type=int,
+                            help='Stop after archiving this many rows of '
+                                 'each kind')
+
+    def handle(self, *args, **options):
+        counts = archive_old_rows(
+            options['message_days'], options['cooperation_days'],
+            batch_size=options['batch_size'], pause=options['pause'],
+            limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {counts["messages"]} messages and '
+            f'{counts["cooperations"]} cooperations'))
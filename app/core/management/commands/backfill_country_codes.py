@@ -0,0 +1,53 @@
+from collections import Counter
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from core import caching
+from core.countries import normalize
+from core.models import Organization
+
+
+class Command(BaseCommand):
+    """Django command to normalize the country of existing organizations"""
+    help = 'Fill the country codes of organizations and normalize names'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        organizations = Organization.objects.order_by('pk').only(
+            'pk', 'country', 'country_code')
+        updated, unknown = 0, Counter()
+        last_pk = 0
+
+        while True:
+            batch = list(organizations.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            changed = []
+            for organization in batch:
+                code, country = normalize(organization.country)
+                if not code:
+                    unknown[country] += 1
+                if (code, country) != (organization.country_code,
+                                       organization.country):
+                    organization.country_code = code
+                    organization.country = country
+                    changed.append(organization)
+            with transaction.atomic():
+                Organization.objects.bulk_update(
+                    changed, ['country', 'country_code'])
+            updated += len(changed)
+            last_pk = batch[-1].pk
+        if updated:
+            # bulk_update sends no signal to invalidate the cached facets
+            # and responses of the directory
+            caching.invalidate('directory')
+
+        for country, count in unknown.most_common(20):
+            self.stdout.write(f'Unknown country {country!r}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated {updated} organizations, '
+            f'{sum(unknown.values())} with an unknown country'))
@@ -0,0 +1,49 @@
+import json
+
+from django.db import connection
+from django.core.management import BaseCommand
+from django.test.utils import setup_test_environment, \
+    teardown_test_environment
+
+from core.benchmark import run_benchmark
+
+
+class Command(BaseCommand):
+    """Django command to load test every API route on a seeded database"""
+    help = 'Seed a throwaway database and benchmark every API route'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100,
+                            help='Number of users to seed the dataset with')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Number of requests sent to each endpoint')
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Number of concurrent clients')
+        parser.add_argument('--output', help='Write the JSON report here')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the benchmark database afterwards')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            report = run_benchmark(
+                users=max(1, options['users']),
+                requests=max(1, options['requests']),
+                concurrency=max(1, options['concurrency']),
+            )
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(
+                f'Benchmark report written to {options["output"]}'))
+        else:
+            self.stdout.write(output)
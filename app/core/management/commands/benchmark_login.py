@@ -0,0 +1,52 @@
+import json
+
+from django.db import connection
+from django.core.management import BaseCommand
+from django.test.utils import setup_test_environment, \
+    teardown_test_environment
+
+from core.benchmark import run_login_benchmark
+
+
+HASHERS = {
+    'argon2': 'core.passwords.Argon2PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+
+
+class Command(BaseCommand):
+    """Django command to measure the logins per second per core"""
+    help = 'Benchmark the token endpoint on a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Number of logins')
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Number of concurrent clients')
+        parser.add_argument('--hasher', choices=sorted(HASHERS),
+                            help='Hash the password with this hasher '
+                                 'instead of the configured one')
+        parser.add_argument('--output', help='Write the JSON report here')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            report = run_login_benchmark(
+                requests=max(1, options['requests']),
+                concurrency=max(1, options['concurrency']),
+                hasher=HASHERS.get(options['hasher']),
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(
+                f'Benchmark report written to {options["output"]}'))
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,38 @@
+from django.core.management import BaseCommand
+
+from core.trust import DEFAULTS, compute_trust_scores
+
+
+class Command(BaseCommand):
+    """Django command to compute the trust scores of the review network"""
+    help = 'Compute the trust score of every user from the reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Start from scratch even if the graph '
+                                 'barely changed')
+        parser.add_argument('--damping', type=float,
+                            default=DEFAULTS['damping'])
+        parser.add_argument('--tolerance', type=float,
+                            default=DEFAULTS['tolerance'])
+        parser.add_argument('--max-iterations', type=int,
+                            default=DEFAULTS['max_iterations'])
+        parser.add_argument('--threshold', type=float,
+                            default=DEFAULTS['threshold'],
+                            help='Share of changed edge weight below which '
+                                 'the last scores are reused')
+        parser.add_argument('--batch-size', type=int,
+                            default=DEFAULTS['batch_size'])
+
+    def handle(self, *args, **options):
+        spec = {key: options[key] for key in DEFAULTS}
+        run = compute_trust_scores(full=options['full'], **spec)
+
+        mode = 'incremental' if run.incremental else 'full'
+        self.stdout.write(
+            f'{run.nodes} users, {run.edges} edges, {run.seeds} seeds, '
+            f'{run.change:.2%} changed'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Computed trust scores ({mode}) in {run.iterations} iterations '
+            f'and {run.duration_ms / 1000:.1f}s'))
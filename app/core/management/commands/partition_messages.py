@@ -0,0 +1,33 @@
+from django.core.management import BaseCommand, CommandError
+
+from core import partitions
+
+
+class Command(BaseCommand):
+    """Django command to maintain the monthly partitions of messages"""
+    help = 'Create the coming partitions of messages and detach old ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=3,
+                            help='Create partitions up to this many months '
+                                 'after the current one')
+        parser.add_argument('--retention-months', type=int,
+                            help='Detach the partitions older than this '
+                                 'many months')
+        parser.add_argument('--drop', action='store_true',
+                            help='Drop the detached partitions')
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned():
+            raise CommandError(
+                f'{partitions.TABLE} is not partitioned, partitioning '
+                'needs PostgreSQL')
+
+        for name in partitions.create_partitions(options['months_ahead']):
+            self.stdout.write(f'Created {name}')
+        if options['retention_months'] is not None:
+            for name in partitions.detach_partitions(
+                    options['retention_months'], drop=options['drop']):
+                self.stdout.write(
+                    f'{"Dropped" if options["drop"] else "Detached"} {name}')
+        self.stdout.write(self.style.SUCCESS('Message partitions are ready'))
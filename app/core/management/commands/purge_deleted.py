@@ -0,0 +1,24 @@
+from django.core.management import BaseCommand
+
+from core.deletion import DEFAULTS, purge_deleted
+
+
+class Command(BaseCommand):
+    """Django command to delete the users and organizations marked as
+    deleted"""
+    help = 'Delete the users and organizations marked as deleted in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=DEFAULTS['batch_size'])
+        parser.add_argument('--pause', type=float, default=DEFAULTS['pause'],
+                            help='Seconds to sleep between two batches')
+
+    def handle(self, *args, **options):
+        counts = purge_deleted(
+            batch_size=options['batch_size'], pause=options['pause'],
+            progress=lambda label, count: self.stdout.write(
+                f'{label}: {count}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {counts["organizations"]} organizations and '
+            f'{counts["users"]} users'))
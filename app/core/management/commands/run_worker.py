@@ -0,0 +1,60 @@
+import multiprocessing
+import signal
+import threading
+
+from django.core.management import BaseCommand
+from django.db import connections
+
+from core import jobs
+
+
+def serve(threads, burst, poll):
+    """Run the jobs of a worker process until it is asked to stop"""
+    stop = threading.Event()
+    handlers = {signum: signal.signal(signum, lambda *args: stop.set())
+                for signum in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        return jobs.work_in_threads(threads, burst=burst, poll=poll,
+                                    stop=stop)
+    finally:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+
+
+class Command(BaseCommand):
+    """Django command to run the queued background jobs"""
+    help = 'Run the background jobs of the queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Number of worker processes')
+        parser.add_argument('--threads', type=int, default=1,
+                            help='Number of threads of each process')
+        parser.add_argument('--poll', type=float,
+                            default=jobs.DEFAULTS['poll'],
+                            help='Seconds to wait for new jobs when the '
+                                 'queue is empty')
+        parser.add_argument('--burst', action='store_true',
+                            help='Stop once the queue is empty')
+
+    def handle(self, *args, **options):
+        spec = (options['threads'], options['burst'], options['poll'])
+        if options['processes'] == 1:
+            count = serve(*spec)
+            self.stdout.write(self.style.SUCCESS(f'Ran {count} jobs'))
+            return
+
+        # Connections can't be shared with the forked processes
+        connections.close_all()
+        processes = [multiprocessing.Process(target=serve, args=spec)
+                     for _ in range(options['processes'])]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+                process.join()
+        self.stdout.write(self.style.SUCCESS('Workers stopped'))
@@ -0,0 +1,65 @@
+import os
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, \
+    Histogram, REGISTRY, generate_latest, multiprocess
+
+
+DB_QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, float('inf'))
+
+REQUESTS = Counter(
+    'http_requests', 'Requests by route, method and status code',
+    ['route', 'method', 'status'])
+LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by route',
+    ['route', 'method'])
+DB_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries per request by route',
+    ['route'], buckets=DB_QUERY_BUCKETS)
+DB_LATENCY = Histogram(
+    'http_request_db_duration_seconds',
+    'Time spent in the database per request by route', ['route'])
+IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'Requests being served',
+    multiprocess_mode='livesum')
+AUTH_CACHE = Counter(
+    'auth_token_cache', 'Token authentication cache lookups by result',
+    ['result'])
+PASSWORD_VERIFICATIONS = Counter(
+    'password_verifications', 'Password hashing tasks by result',
+    ['result'])
+PASSWORD_QUEUE = Gauge(
+    'password_verifications_pending',
+    'Password hashing tasks running or waiting for a thread',
+    multiprocess_mode='livesum')
+
+
+def route_name(request):
+    """Return the name of the route of a request, e.g. projects:project-list"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name
+
+
+def observe_request(request, response, timings):
+    route = route_name(request)
+    REQUESTS.labels(route, request.method, response.status_code).inc()
+    LATENCY.labels(route, request.method).observe(timings.durations['total'])
+    DB_QUERIES.labels(route).observe(timings.db_queries)
+    DB_LATENCY.labels(route).observe(timings.durations['db'])
+
+
+def multiprocess_mode():
+    """Tell if metrics are aggregated from the files of every worker"""
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR') or
+                os.environ.get('prometheus_multiproc_dir'))
+
+
+def export():
+    """Return the metrics in the Prometheus text format"""
+    if multiprocess_mode():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
@@ -0,0 +1,141 @@
+import logging
+import threading
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connection
+from rest_framework.exceptions import AuthenticationFailed
+
+from core import instrumentation, metrics
+from core.authentication import CachedTokenAuthentication
+from core.models import RequestProfile
+from core.profiler import SamplingProfiler
+
+
+logger = logging.getLogger('performance')
+
+
+class PerformanceMiddleware:
+    """Record where the time of each request goes.
+
+    The total, database, serializer and renderer times are sent back in a
+    Server-Timing header, logged with the view and action names and
+    exported as Prometheus metrics labeled with the route name.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = instrumentation.RequestTimings()
+        request.timings = timings
+        token = instrumentation.activate(timings)
+        metrics.IN_FLIGHT.inc()
+        try:
+            with connection.execute_wrapper(timings.db_wrapper):
+                response = self.get_response(request)
+        finally:
+            metrics.IN_FLIGHT.dec()
+            instrumentation.deactivate(token)
+        timings.stop()
+        metrics.observe_request(request, response, timings)
+
+        response['Server-Timing'] = timings.server_timing()
+        fields = timings.as_fields()
+        fields.update({'method': request.method, 'path': request.path,
+                       'status': response.status_code})
+        logger.info(
+            ' '.join(f'{key}={value}' for key, value in fields.items()),
+            extra={'performance': fields}
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        cls = getattr(view_func, 'cls', None)
+        actions = getattr(view_func, 'actions', None) or {}
+        request.timings.view = cls.__name__ if cls else view_func.__name__
+        request.timings.action = actions.get(request.method.lower(),
+                                             request.method.lower())
+
+    def process_template_response(self, request, response):
+        timings = request.timings
+        start = perf_counter()
+
+        def rendered(response):
+            timings.add('render', perf_counter() - start)
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class ProfilerMiddleware:
+    """Profile the requests of staff users asking for it.
+
+    Staff users trigger a sampling profile of a request with an X-Profile
+    header or a profile query parameter. Only one request is profiled at a
+    time per process and other requests skip the profiler entirely.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if 'HTTP_X_PROFILE' not in request.META and \
+                'profile' not in request.GET:
+            return self.get_response(request)
+
+        user = self.staff_user(request)
+        if user is None or not self._lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            profiler = SamplingProfiler(
+                interval=settings.PROFILER_INTERVAL,
+                max_samples=settings.PROFILER_MAX_SAMPLES,
+                max_duration=settings.PROFILER_MAX_DURATION,
+            )
+            profiler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.stop()
+            profile = self.save(request, response, user, profiler)
+        finally:
+            self._lock.release()
+
+        response['X-Profile-Id'] = profile.pk
+        return response
+
+    def staff_user(self, request):
+        """Return the staff user of the request, authenticating tokens"""
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            try:
+                credentials = CachedTokenAuthentication().authenticate(
+                    request)
+            except AuthenticationFailed:
+                return None
+            user = credentials[0] if credentials else None
+        if user is not None and user.is_staff:
+            return user
+        return None
+
+    def save(self, request, response, user, profiler):
+        profile = RequestProfile.objects.create(
+            user=user,
+            method=request.method,
+            path=request.get_full_path()[:2048],
+            route=metrics.route_name(request),
+            status_code=response.status_code,
+            duration_ms=round(profiler.duration * 1000, 3),
+            interval_ms=profiler.interval * 1000,
+            samples=profiler.samples,
+            folded=profiler.folded(),
+            top=profiler.top(settings.PROFILER_TOP),
+        )
+        stale = RequestProfile.objects.order_by('-id').values_list(
+            'id', flat=True)[settings.PROFILER_KEEP:]
+        RequestProfile.objects.filter(id__in=list(stale)).delete()
+        return profile
@@ -0,0 +1,42 @@
+# Generated by Django 3.1.14 on 2026-10-19 13:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_review_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrustRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('nodes', models.PositiveIntegerField()),
+                ('edges', models.PositiveIntegerField()),
+                ('seeds', models.PositiveIntegerField()),
+                ('change', models.FloatField()),
+                ('incremental', models.BooleanField()),
+                ('iterations', models.PositiveIntegerField()),
+                ('residual', models.FloatField()),
+                ('duration_ms', models.FloatField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrustScore',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trust', serialize=False, to='core.user')),
+                ('score', models.FloatField()),
+                ('out_weight', models.FloatField(default=0)),
+                ('in_weight', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='trustscore',
+            index=models.Index(fields=['score'], name='core_trusts_score_a24020_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.14 on 2026-10-19 13:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_trust_scores'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cooperation',
+            index=models.Index(condition=models.Q(is_private=False), fields=['-id'], name='cooperation_public_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.1.14 on 2026-10-19 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_cooperation_public_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='organization',
+            name='country',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='cooperation',
+            index=models.Index(fields=['end_date'], name='core_cooper_end_dat_e98492_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userrating',
+            index=models.Index(fields=['count'], name='core_userra_count_82a5a0_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.1.14 on 2026-10-19 13:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='country_code',
+            field=models.CharField(blank=True, db_index=True, max_length=2),
+        ),
+        migrations.AlterField(
+            model_name='organization',
+            name='country',
+            field=models.CharField(max_length=255),
+        ),
+    ]
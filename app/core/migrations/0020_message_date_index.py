@@ -0,0 +1,17 @@
+# Generated by Django 3.1.14 on 2026-10-19 13:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_organization_country_code'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['date'], name='core_messag_date_6b0a31_idx'),
+        ),
+    ]
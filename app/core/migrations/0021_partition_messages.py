@@ -0,0 +1,107 @@
+"""Partition core_message by month of date on PostgreSQL.
+
+The existing table becomes the core_message_legacy partition holding every
+row before the next month, so no row is copied. Writes are only blocked
+while the tables are renamed and attached: the range of the legacy rows
+is checked beforehand with a NOT VALID constraint validated online, and
+the unique index the partitioned primary key needs is built concurrently.
+"""
+import re
+from datetime import datetime, timezone
+
+from django.db import migrations, transaction
+
+
+TABLE = 'core_message'
+LEGACY = 'core_message_legacy'
+
+
+def next_month():
+    now = datetime.now(timezone.utc)
+    index = now.year * 12 + now.month
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    boundary = next_month()
+    following = datetime(boundary.year + boundary.month // 12,
+                         boundary.month % 12 + 1, 1, tzinfo=timezone.utc)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'ALTER TABLE {TABLE} ADD CONSTRAINT core_message_legacy_range '
+            'CHECK (date < %s) NOT VALID', [boundary.isoformat()])
+        cursor.execute(f'ALTER TABLE {TABLE} '
+                       'VALIDATE CONSTRAINT core_message_legacy_range')
+        cursor.execute('CREATE UNIQUE INDEX CONCURRENTLY core_message_id_date '
+                       f'ON {TABLE} (id, date)')
+
+    with transaction.atomic(using=connection.alias), \
+            connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(
+            'SELECT index.relname, pg_get_indexdef(pg_index.indexrelid) '
+            'FROM pg_index JOIN pg_class index ON index.oid = '
+            'pg_index.indexrelid WHERE pg_index.indrelid = %s::regclass '
+            'AND NOT pg_index.indisprimary AND NOT pg_index.indisunique',
+            [TABLE]
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            'SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint '
+            "WHERE conrelid = %s::regclass AND contype = 'f'", [TABLE])
+        foreign_keys = cursor.fetchall()
+
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {LEGACY}')
+        cursor.execute(
+            f'ALTER TABLE {LEGACY} DROP CONSTRAINT core_message_pkey, '
+            'ADD CONSTRAINT core_message_legacy_pkey PRIMARY KEY USING '
+            'INDEX core_message_id_date')
+        for name, _ in indexes:
+            cursor.execute(f'ALTER INDEX {name} RENAME TO '
+                           f'{name[:50]}_legacy')
+
+        cursor.execute(
+            f'CREATE TABLE {TABLE} (LIKE {LEGACY} INCLUDING DEFAULTS) '
+            'PARTITION BY RANGE (date)')
+        cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT '
+                       'core_message_pkey PRIMARY KEY (id, date)')
+        # The same indexes and foreign keys under the same names, matched
+        # by the existing ones of the legacy partition when attached
+        for name, definition in indexes:
+            columns = re.search(r' USING .*$', definition).group(0)
+            cursor.execute(f'CREATE INDEX {name} ON {TABLE}{columns}')
+        for name, definition in foreign_keys:
+            cursor.execute(
+                f'ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}')
+        cursor.execute(f"SELECT pg_get_serial_sequence('{LEGACY}', 'id')")
+        sequence = cursor.fetchone()[0]
+        cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {TABLE}.id')
+
+        cursor.execute(
+            f'ALTER TABLE {TABLE} ATTACH PARTITION {LEGACY} '
+            'FOR VALUES FROM (MINVALUE) TO (%s)', [boundary.isoformat()])
+        cursor.execute(f'CREATE TABLE {TABLE}_default PARTITION OF {TABLE} '
+                       'DEFAULT')
+        cursor.execute(
+            f'CREATE TABLE {TABLE}_p{boundary:%Y_%m} PARTITION OF {TABLE} '
+            'FOR VALUES FROM (%s) TO (%s)',
+            [boundary.isoformat(), following.isoformat()]
+        )
+        cursor.execute(
+            f'ALTER TABLE {LEGACY} DROP CONSTRAINT core_message_legacy_range')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('core', '0020_message_date_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, migrations.RunPython.noop),
+    ]
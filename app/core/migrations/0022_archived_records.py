@@ -0,0 +1,27 @@
+# Generated by Django 3.1.14 on 2026-10-19 13:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_partition_messages'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.BigIntegerField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('data', models.BinaryField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='archivedrecord',
+            constraint=models.UniqueConstraint(fields=('model', 'object_id'), name='archivedrecord_unique_object'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.14 on 2026-10-19 14:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_jobs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cooperation',
+            index=models.Index(fields=['project', 'end_date'], name='cooperation_project_end_idx'),
+        ),
+    ]
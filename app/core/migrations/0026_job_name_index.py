@@ -0,0 +1,17 @@
+# Generated by Django 3.1.14 on 2026-10-19 14:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_cooperation_project_end_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['name', '-run_at'], name='job_name_idx'),
+        ),
+    ]
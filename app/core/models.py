@@ -1,8 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Q, Sum
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
                                        PermissionsMixin
+from django.core.validators import MinValueValidator, MaxValueValidator
 from django.conf import settings
 
+from core import countries
+
 
 class UserManager(BaseUserManager):
 
@@ -32,12 +36,25 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Set when the user deletes the account, the rows of the user are
+    # deleted later in batches, see core.deletion
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     objects = UserManager()
 
     USERNAME_FIELD = 'email'
 
 
+class SoftDeleteQuerySet(models.QuerySet):
+
+    def alive(self):
+        """Return the rows not waiting to be deleted"""
+        return self.filter(deleted_at__isnull=True)
+
+    def deleted(self):
+        return self.filter(deleted_at__isnull=False)
+
+
 class Organization(models.Model):
     """Organization that will be able to create projects"""
     name = models.CharField(max_length=255, unique=True)
@@ -49,6 +66,15 @@ class Organization(models.Model):
     website = models.URLField(max_length=255, blank=True)
     address = models.CharField(max_length=255, blank=True)
     country = models.CharField(max_length=255)
+    country_code = models.CharField(max_length=2, blank=True, db_index=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    objects = SoftDeleteQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        """Save the organization with its country normalized"""
+        self.country_code, self.country = countries.normalize(self.country)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -102,6 +128,36 @@ class Project(models.Model):
         return self.name
 
 
+class CooperationQuerySet(models.QuerySet):
+
+    def participant_pks(self, user):
+        """Return the ids of the cooperations a user takes part in.
+
+        A UNION of the cooperations of the user and those where the user is
+        the volunteer, so each side is served by its own index instead of
+        an OR scanning both.
+        """
+        cooperations = self.model._default_manager.values('pk')
+        return cooperations.filter(user=user).union(
+            cooperations.filter(voluntary=user))
+
+    def involving(self, user):
+        """Return the cooperations a user takes part in"""
+        return self.filter(pk__in=self.participant_pks(user))
+
+    def visible_to(self, user):
+        """Return the public cooperations and the private ones of a user.
+
+        Only the participant side is a UNION, the public side stays a
+        condition the partial index on the public cooperations serves in
+        id order, so a limited list stops early.
+        """
+        public = Q(is_private=False)
+        if not user.is_authenticated:
+            return self.filter(public)
+        return self.filter(public | Q(pk__in=self.participant_pks(user)))
+
+
 class Cooperation(models.Model):
     """Actual cooperation between an organization and a volunteer"""
     name = models.CharField(max_length=255)
@@ -124,6 +180,18 @@ class Cooperation(models.Model):
     end_date = models.DateField(null=True)
     is_private = models.BooleanField(default=False)
 
+    objects = CooperationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['end_date']),
+            # Counts the active and finished cooperations of each project
+            models.Index(fields=['project', 'end_date'],
+                         name='cooperation_project_end_idx'),
+            models.Index(fields=['-id'], name='cooperation_public_idx',
+                         condition=Q(is_private=False)),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -147,11 +215,102 @@ class Review(models.Model):
         related_name='reviewed'
         )
     review = models.TextField()
+    rating = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1), MaxValueValidator(5)]
+        )
+
+    def save(self, *args, **kwargs):
+        """Save the review and update the ratings of the reviewed user
+        in the same transaction"""
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
 
+class UserRatingManager(models.Manager):
+
+    def apply(self, user_id, rating, sign=1):
+        """Add (sign=1) or remove (sign=-1) a rating of a user"""
+        if user_id is None or rating is None:
+            return
+        ratings = self.select_for_update()
+        if sign > 0:
+            user_rating, _ = ratings.get_or_create(user_id=user_id)
+        else:
+            user_rating = ratings.filter(user_id=user_id).first()
+            if user_rating is None:
+                return
+
+        user_rating.count += sign
+        user_rating.total += sign * rating
+        field = f'rating_{rating}'
+        setattr(user_rating, field, getattr(user_rating, field) + sign)
+        user_rating.update_mean()
+        user_rating.save()
+
+    def rebuild(self):
+        """Recompute the ratings of every user from their reviews"""
+        rows = Review.objects.filter(
+            rating__isnull=False, reviewed__isnull=False
+        ).values('reviewed').annotate(
+            count=Count('id'),
+            total=Sum('rating'),
+            **{f'rating_{value}': Count('id', filter=Q(rating=value))
+               for value in UserRating.RATINGS}
+        ).order_by()
+
+        user_ratings = []
+        for row in rows:
+            user_rating = UserRating(user_id=row.pop('reviewed'), **row)
+            user_rating.update_mean()
+            user_ratings.append(user_rating)
+
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            self.bulk_create(user_ratings, batch_size=5000)
+
+
+class UserRating(models.Model):
+    """Ratings received by a user, kept up to date on every review write"""
+    RATINGS = range(1, 6)
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rating'
+        )
+    count = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    mean = models.FloatField(null=True)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    objects = UserRatingManager()
+
+    class Meta:
+        indexes = [models.Index(fields=['mean', 'count']),
+                   models.Index(fields=['count'])]
+
+    def update_mean(self):
+        self.mean = self.total / self.count if self.count else None
+
+    @property
+    def histogram(self):
+        return {value: getattr(self, f'rating_{value}')
+                for value in self.RATINGS}
+
+    def __str__(self):
+        return f'{self.user_id}: {self.mean} ({self.count})'
+
+
 class Message(models.Model):
     """A message between users"""
     user = models.ForeignKey(
@@ -167,5 +326,135 @@ class Message(models.Model):
     message = models.TextField()
     date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # On PostgreSQL the table is partitioned by month of date, see
+        # core.partitions
+        indexes = [models.Index(fields=['date'])]
+
     def __str__(self):
         return self.message
+
+
+class RequestProfile(models.Model):
+    """A profile of a single request, recorded at the request of staff"""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True
+        )
+    created_at = models.DateTimeField(auto_now_add=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    route = models.CharField(max_length=255, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    interval_ms = models.FloatField()
+    samples = models.PositiveIntegerField()
+    folded = models.TextField(blank=True)
+    top = models.JSONField(default=list)
+
+    def __str__(self):
+        return f'{self.method} {self.path}'
+
+
+class TrustScore(models.Model):
+    """Trust of a user computed from the review network"""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trust'
+        )
+    score = models.FloatField()
+    out_weight = models.FloatField(default=0)
+    in_weight = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['score'])]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.score}'
+
+
+class TrustRun(models.Model):
+    """A computation of the trust scores"""
+    created_at = models.DateTimeField(auto_now_add=True)
+    nodes = models.PositiveIntegerField()
+    edges = models.PositiveIntegerField()
+    seeds = models.PositiveIntegerField()
+    change = models.FloatField()
+    incremental = models.BooleanField()
+    iterations = models.PositiveIntegerField()
+    residual = models.FloatField()
+    duration_ms = models.FloatField()
+
+    def __str__(self):
+        return f'{self.created_at}: {self.nodes} users, {self.edges} edges'
+
+
+class ThrottleBucket(models.Model):
+    """The tokens left to a client in a scope, see core.throttling"""
+    key = models.CharField(max_length=255, primary_key=True)
+    tokens = models.FloatField()
+    # Seconds since the epoch of the last request
+    updated = models.FloatField(db_index=True)
+
+    def __str__(self):
+        return self.key
+
+
+class ArchivedRecord(models.Model):
+    """A row moved out of its table, kept compressed, see core.archive"""
+    model = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    data = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'object_id'],
+                                    name='archivedrecord_unique_object'),
+        ]
+
+    def __str__(self):
+        return f'{self.model} {self.object_id}'
+
+
+class Job(models.Model):
+    """A task to run in the background by a worker, see core.jobs"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'),
+                (FAILED, 'Failed')]
+
+    name = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict)
+    priority = models.SmallIntegerField(default=0)
+    run_at = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed while the job runs, see core.jobs.heartbeat
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers only look for the next queued job
+            models.Index(fields=['-priority', 'run_at'], name='job_queue_idx',
+                         condition=Q(status='queued')),
+            models.Index(fields=['status', 'heartbeat_at'],
+                         name='job_heartbeat_idx'),
+            # The last run of a scheduled task
+            models.Index(fields=['name', '-run_at'], name='job_name_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
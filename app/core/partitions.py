@@ -0,0 +1,124 @@
+import re
+from datetime import datetime, timezone
+
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from core.models import Message
+
+
+TABLE = Message._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+
+def month_start(value):
+    """Return the first instant of the month of a datetime, in UTC"""
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month, count):
+    """Return the first instant of the month count months later"""
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y_%m}'
+
+
+def is_partitioned():
+    """Return whether the message table is partitioned"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = %s::regclass',
+                       [TABLE])
+        return cursor.fetchone()[0] == 'p'
+
+
+def partitions():
+    """Return the name and the upper bound of every partition.
+
+    The upper bound of the default partition is None.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname, pg_get_expr(child.relpartbound, '
+            'child.oid) FROM pg_inherits JOIN pg_class child ON '
+            'child.oid = pg_inherits.inhrelid WHERE pg_inherits.inhparent '
+            '= %s::regclass ORDER BY child.relname',
+            [TABLE]
+        )
+        rows = cursor.fetchall()
+
+    result = []
+    for name, bound in rows:
+        upper = re.search(r"TO \('([^']+)'\)", bound)
+        result.append((name, parse_datetime(upper.group(1))
+                       if upper else None))
+    return result
+
+
+def create_partition(month):
+    """Create the partition of a month, moving its rows out of the default
+    partition first"""
+    name = partition_name(month)
+    quote = connection.ops.quote_name
+    bounds = [month.isoformat(), add_months(month, 1).isoformat()]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE stray (LIKE {quote(TABLE)})')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {quote(DEFAULT_PARTITION)} '
+            'WHERE date >= %s AND date < %s RETURNING *) '
+            'INSERT INTO stray SELECT * FROM moved',
+            bounds
+        )
+        cursor.execute(
+            f'CREATE TABLE {quote(name)} PARTITION OF {quote(TABLE)} '
+            'FOR VALUES FROM (%s) TO (%s)',
+            bounds
+        )
+        cursor.execute(f'INSERT INTO {quote(TABLE)} SELECT * FROM stray')
+        cursor.execute('DROP TABLE stray')
+    return name
+
+
+def create_partitions(months_ahead=3, now=None):
+    """Create the missing partitions up to some months ahead.
+
+    Returns the names of the partitions created.
+    """
+    current = month_start(now or datetime.now(timezone.utc))
+    last = add_months(current, months_ahead)
+    # Months before the end of the last partition are already covered
+    month = max([current] + [upper for _, upper in partitions() if upper])
+
+    created = []
+    while month <= last:
+        created.append(create_partition(month))
+        month = add_months(month, 1)
+    return created
+
+
+def detach_partitions(retention_months, drop=False, now=None):
+    """Detach the partitions whose rows are all older than the retention.
+
+    Detached partitions are kept as standalone tables unless dropped.
+    Returns their names.
+    """
+    oldest = add_months(month_start(now or datetime.now(timezone.utc)),
+                        -retention_months)
+    quote = connection.ops.quote_name
+    detached = []
+    for name, upper in partitions():
+        if upper is None or upper > oldest:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {quote(TABLE)} '
+                           f'DETACH PARTITION {quote(name)}')
+            if drop:
+                cursor.execute(f'DROP TABLE {quote(name)}')
+        detached.append(name)
+    return detached
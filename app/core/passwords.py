@@ -0,0 +1,149 @@
+"""Password hashing and verification off the request threads.
+
+Verifying a password is expensive on purpose. Requests hand it to a
+small pool of threads, one per core by default, so a spike of logins
+can't take every CPU from the other requests: argon2 releases the GIL
+while hashing, so the pool runs in parallel. At most
+PASSWORD_VERIFY_QUEUE verifications wait for a thread, logins beyond
+that are turned down at once with a 503 rather than queued for longer
+than the client waits.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core import metrics
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id with the costs of the settings.
+
+    Hashes made with other costs or by the argon2i of Django are upgraded
+    on the next login.
+    """
+    variety = 'argon2id'
+    time_cost = settings.ARGON2_TIME_COST
+    memory_cost = settings.ARGON2_MEMORY_COST
+    parallelism = settings.ARGON2_PARALLELISM
+
+    def encode(self, password, salt):
+        argon2 = self._load_library()
+        data = argon2.low_level.hash_secret(
+            password.encode(),
+            salt.encode(),
+            time_cost=self.time_cost,
+            memory_cost=self.memory_cost,
+            parallelism=self.parallelism,
+            hash_len=argon2.DEFAULT_HASH_LENGTH,
+            type=argon2.low_level.Type.ID,
+        )
+        return self.algorithm + data.decode('ascii')
+
+    def verify(self, password, encoded):
+        argon2 = self._load_library()
+        algorithm, rest = encoded.split('$', 1)
+        assert algorithm == self.algorithm
+        variety = self._decode(encoded)[1]
+        try:
+            return argon2.low_level.verify_secret(
+                ('$' + rest).encode('ascii'),
+                password.encode(),
+                type=getattr(argon2.low_level.Type, variety[6:].upper()),
+            )
+        except argon2.exceptions.VerificationError:
+            return False
+
+    def must_update(self, encoded):
+        return self._decode(encoded)[1] != self.variety or \
+            super().must_update(encoded)
+
+
+class VerificationBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many logins at once, try again shortly')
+    default_code = 'verification_busy'
+    # Sent as Retry-After
+    wait = 1
+
+
+class VerificationPool:
+    """A pool of threads running at most a number of queued tasks"""
+
+    def __init__(self, workers, queue):
+        self.executor = ThreadPoolExecutor(
+            workers, thread_name_prefix='password')
+        self.slots = threading.BoundedSemaphore(workers + queue)
+
+    def run(self, function, *args, timeout=None):
+        """Run a function in the pool and return its result.
+
+        Raises VerificationBusy if the queue is full or the result takes
+        longer than timeout seconds.
+        """
+        if not self.slots.acquire(blocking=False):
+            metrics.PASSWORD_VERIFICATIONS.labels(result='rejected').inc()
+            raise VerificationBusy()
+        metrics.PASSWORD_QUEUE.inc()
+        try:
+            future = self.executor.submit(function, *args)
+        except BaseException:
+            self.release()
+            raise
+        future.add_done_callback(lambda future: self.release())
+        try:
+            result = future.result(timeout)
+        except TimeoutError:
+            metrics.PASSWORD_VERIFICATIONS.labels(result='timeout').inc()
+            raise VerificationBusy()
+        metrics.PASSWORD_VERIFICATIONS.labels(result='done').inc()
+        return result
+
+    def release(self):
+        metrics.PASSWORD_QUEUE.dec()
+        self.slots.release()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pool():
+    """Return the verification pool of the process, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = VerificationPool(settings.PASSWORD_VERIFY_WORKERS,
+                                     settings.PASSWORD_VERIFY_QUEUE)
+        return _pool
+
+
+def _verify(password, encoded):
+    """Return whether a password matches a hash, and if the hash must be
+    upgraded"""
+    outdated = []
+    valid = hashers.check_password(password, encoded, outdated.append)
+    return valid, bool(outdated)
+
+
+def check_password(user, password):
+    """Verify the password of a user in the pool, upgrading its hash to
+    the current hasher and costs if needed"""
+    timeout = settings.PASSWORD_VERIFY_TIMEOUT
+    valid, outdated = pool().run(_verify, password, user.password,
+                                 timeout=timeout)
+    if valid and outdated:
+        user.password = pool().run(hashers.make_password, password,
+                                   timeout=timeout)
+        user.save(update_fields=['password'])
+    return valid
+
+
+def make_password(password):
+    """Hash a password in the pool"""
+    return pool().run(hashers.make_password, password,
+                      timeout=settings.PASSWORD_VERIFY_TIMEOUT)
@@ -0,0 +1,86 @@
+import sys
+import threading
+from collections import Counter
+from time import perf_counter
+
+
+def frame_label(frame):
+    """Return a readable name of the function running in a frame"""
+    code = frame.f_code
+    module = frame.f_globals.get('__name__', '?')
+    return f'{module}:{code.co_name}:{code.co_firstlineno}'
+
+
+class SamplingProfiler:
+    """Sample the stack of the thread that started it at regular intervals.
+
+    A background thread records the stack of the profiled thread every
+    interval seconds, until it is stopped or it reaches max_samples or
+    max_duration, so the cost of profiling stays bounded whatever the
+    request does.
+    """
+
+    def __init__(self, interval=0.002, max_samples=5000, max_duration=30):
+        self.interval = interval
+        self.max_samples = max_samples
+        self.max_duration = max_duration
+        self.stacks = Counter()
+        self.samples = 0
+        self.duration = 0
+        self._stopped = threading.Event()
+        self._thread = None
+        self._target = None
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._started = perf_counter()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self.duration = perf_counter() - self._started
+
+    def _sample(self):
+        deadline = self._started + self.max_duration
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                return
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+            if self.samples >= self.max_samples or \
+                    perf_counter() > deadline:
+                return
+
+    def folded(self):
+        """Return the stacks in the collapsed format of flamegraph tools"""
+        return '\n'.join(f'{stack} {count}'
+                         for stack, count in self.stacks.most_common())
+
+    def top(self, limit=25):
+        """Return the functions with the most samples.
+
+        Own samples are those where the function was running itself, total
+        samples include the time spent in the functions it called.
+        """
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            for label in set(frames):
+                total[label] += count
+
+        samples = self.samples or 1
+        return [{
+            'function': label,
+            'own_samples': own[label],
+            'total_samples': total[label],
+            'own_percent': round(own[label] * 100 / samples, 2),
+            'total_percent': round(total[label] * 100 / samples, 2),
+        } for label, _ in own.most_common(limit)]
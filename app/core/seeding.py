@@ -0,0 +1,347 @@
+import csv
+import io
+import math
+import multiprocessing
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+
+from core import countries, models
+
+
+DEFAULTS = {
+    'users': 1000,
+    'seed': 0,
+    'password': 'password123',
+    'chunk_size': 2000,
+    'batch_size': 5000,
+    'history_days': 730,
+    'cooperator_ratio': 0.5,
+    'portfolio_per_cooperator': 2.0,
+    'organization_ratio': 0.1,
+    'projects_per_organization': 3.0,
+    'cooperations_per_project': 2.0,
+    'private_ratio': 0.2,
+    'finished_ratio': 0.5,
+    'review_ratio': 0.5,
+    'messages_per_user': 10.0,
+}
+
+# Models in insertion order, parents before children
+MODELS = (
+    models.User,
+    models.CooperatorProfile,
+    models.PortfolioItem,
+    models.Organization,
+    models.Project,
+    models.Cooperation,
+    models.Review,
+    models.Message,
+)
+
+FIRST_NAMES = ('Ana', 'Pablo', 'Lucia', 'Hugo', 'Marta', 'Leo', 'Sara',
+               'Mateo', 'Julia', 'Daniel', 'Paula', 'Alex', 'Nora', 'Omar')
+LAST_NAMES = ('Garcia', 'Martin', 'Lopez', 'Sanchez', 'Perez', 'Gomez',
+              'Ruiz', 'Diaz', 'Moreno', 'Alvarez', 'Romero', 'Navarro')
+SKILLS = ('Web design', 'Python', 'Django', 'React', 'Marketing', 'SEO',
+          'Fundraising', 'Copywriting', 'Translation', 'Data analysis',
+          'Photography', 'Video editing', 'Accounting', 'Legal advice')
+CAUSES = ('Water', 'Education', 'Health', 'Climate', 'Housing', 'Food',
+          'Refugees', 'Animals', 'Culture', 'Equality', 'Children')
+COUNTRIES = ('Spain', 'France', 'Portugal', 'Italy', 'Germany', 'Mexico',
+             'Colombia', 'Argentina', 'Kenya', 'India', 'Peru', 'Morocco')
+# Ratings drawn with these weights, reviews are mostly positive
+RATINGS = (1, 2, 3, 3, 4, 4, 4, 5, 5, 5, 5, 5)
+WORDS = ('help', 'build', 'digital', 'local', 'support', 'together',
+         'community', 'volunteer', 'project', 'open', 'future', 'share')
+
+
+def _poisson(rng, mean):
+    """Return a Poisson distributed count with the given mean"""
+    if mean <= 0:
+        return 0
+    if mean > 30:
+        return max(0, int(round(rng.gauss(mean, math.sqrt(mean)))))
+    limit = math.exp(-mean)
+    count, product = 0, rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def _sentence(rng, length=8):
+    return ' '.join(rng.choice(WORDS) for _ in range(length)).capitalize()
+
+
+def _user_name(user_id):
+    return (f'{FIRST_NAMES[user_id % len(FIRST_NAMES)]} '
+            f'{LAST_NAMES[user_id // len(FIRST_NAMES) % len(LAST_NAMES)]}')
+
+
+def _user_ids(spec, chunk):
+    first = spec['user_base'] + chunk * spec['chunk_size']
+    last = min(first + spec['chunk_size'], spec['user_base'] + spec['users'])
+    return range(first, last)
+
+
+def _chunks(spec):
+    return range(math.ceil(spec['users'] / spec['chunk_size']))
+
+
+def generate_users(spec, chunk):
+    """Return the user rows of a chunk"""
+    return [{
+        'id': user_id,
+        'email': f'user{user_id}@seed.example',
+        'name': _user_name(user_id),
+        'password': spec['password_hash'],
+        'is_active': True,
+    } for user_id in _user_ids(spec, chunk)]
+
+
+def generate_chunk(spec, chunk, offsets, build=True):
+    """Return the rows depending on the users of a chunk.
+
+    Primary keys start at the given offsets. With build=False only the
+    number of rows of each model is computed, consuming the same random
+    numbers so a later build of the chunk matches the plan.
+    """
+    rng = random.Random(f'{spec["seed"]}:{chunk}')
+    rows = {model: [] for model in MODELS[1:]}
+    ids = dict(offsets)
+    first_user, total_users = spec['user_base'], spec['users']
+    end = spec['end']
+
+    def add(model, row):
+        ids[model] += 1
+        if build:
+            row.setdefault(model._meta.pk.attname, ids[model] - 1)
+            rows[model].append(row)
+        return ids[model] - 1
+
+    def random_user():
+        return first_user + rng.randrange(total_users)
+
+    def random_date(days=spec['history_days']):
+        return end - timedelta(seconds=rng.randrange(days * 86400))
+
+    for user_id in _user_ids(spec, chunk):
+        if rng.random() < spec['cooperator_ratio']:
+            skills = ', '.join(rng.sample(SKILLS, rng.randint(1, 4)))
+            add(models.CooperatorProfile, {
+                'user_id': user_id,
+                'name': _user_name(user_id),
+                'description': _sentence(rng),
+                'skills': skills,
+                'website': f'https://cooperator{user_id}.example.com',
+            })
+            for _ in range(_poisson(rng, spec['portfolio_per_cooperator'])):
+                add(models.PortfolioItem, {
+                    'user_id': user_id,
+                    'name': _sentence(rng, 3),
+                    'description': _sentence(rng),
+                    'link': f'https://portfolio.example.com/{user_id}',
+                })
+
+        if rng.random() < spec['organization_ratio']:
+            organization_id = ids[models.Organization]
+            country_code, country = countries.normalize(rng.choice(COUNTRIES))
+            add(models.Organization, {
+                'user_id': user_id,
+                'name': f'{rng.choice(CAUSES)} NGO {organization_id}',
+                'description': _sentence(rng, 12),
+                'website': f'https://ngo{organization_id}.example.org',
+                'country': country,
+                'country_code': country_code,
+            })
+            for _ in range(_poisson(rng, spec['projects_per_organization'])):
+                project_id = add(models.Project, {
+                    'user_id': user_id,
+                    'organization_id': organization_id,
+                    'name': _sentence(rng, 3),
+                    'description': _sentence(rng, 12),
+                })
+                cooperations = _poisson(rng, spec['cooperations_per_project'])
+                for _ in range(cooperations):
+                    voluntary_id = random_user()
+                    start_date = random_date().date()
+                    end_date = None
+                    if rng.random() < spec['finished_ratio']:
+                        end_date = min(
+                            start_date + timedelta(rng.randint(1, 180)),
+                            end.date())
+                    cooperation_id = add(models.Cooperation, {
+                        'name': f'Cooperation on project {project_id}',
+                        'project_id': project_id,
+                        'user_id': user_id,
+                        'voluntary_id': voluntary_id,
+                        'start_date': start_date,
+                        'end_date': end_date,
+                        'is_private': rng.random() < spec['private_ratio'],
+                    })
+                    if rng.random() < spec['review_ratio']:
+                        add(models.Review, {
+                            'name': _sentence(rng, 4),
+                            'cooperation_id': cooperation_id,
+                            'user_id': user_id,
+                            'reviewed_id': voluntary_id,
+                            'review': _sentence(rng, 16),
+                            'rating': rng.choice(RATINGS),
+                        })
+
+        for _ in range(_poisson(rng, spec['messages_per_user'])):
+            add(models.Message, {
+                'user_id': user_id,
+                'recipient_id': random_user(),
+                'message': _sentence(rng, 10),
+                'date': random_date(),
+            })
+
+    if build:
+        return rows
+    return {model: ids[model] - offsets[model] for model in rows}
+
+
+@contextmanager
+def explicit_auto_now_add(model):
+    """Let bulk inserts keep the values given to auto_now_add fields"""
+    fields = [field for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return value
+
+
+def copy_rows(model, rows):
+    """Insert rows into the table of a model with PostgreSQL COPY"""
+    fields = model._meta.concrete_fields
+    defaults = {field.attname: field.get_db_prep_save(field.get_default(),
+                                                      connection)
+                for field in fields}
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(_copy_value(row.get(field.attname,
+                                            defaults[field.attname]))
+                        for field in fields)
+    buffer.seek(0)
+
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {quote(model._meta.db_table)} ({columns}) '
+            f"FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer
+        )
+
+
+def insert_rows(model, rows, batch_size=5000):
+    """Insert rows using COPY when available and bulk_create otherwise"""
+    if not rows:
+        return
+    if connection.vendor == 'postgresql':
+        copy_rows(model, rows)
+        return
+    with explicit_auto_now_add(model):
+        for start in range(0, len(rows), batch_size):
+            model.objects.bulk_create(
+                [model(**row) for row in rows[start:start + batch_size]])
+
+
+def plan_chunk(spec, chunk):
+    return generate_chunk(
+        spec, chunk, {model: 0 for model in MODELS[1:]}, build=False)
+
+
+def seed_users(spec, chunk):
+    with transaction.atomic():
+        insert_rows(models.User, generate_users(spec, chunk),
+                    spec['batch_size'])
+
+
+def seed_chunk(spec, chunk, offsets):
+    rows = generate_chunk(spec, chunk, offsets)
+    with transaction.atomic():
+        for model in MODELS[1:]:
+            insert_rows(model, rows[model], spec['batch_size'])
+
+
+def _run(pool, function, arguments):
+    if pool is None:
+        return [function(*args) for args in arguments]
+    return pool.starmap(function, arguments)
+
+
+def seed(workers=1, **options):
+    """Generate consistent rows for every core model and return counts.
+
+    The same options and seed always generate the same rows, whatever the
+    number of worker processes. Rows are generated in chunks of users:
+    chunks are planned first to assign primary key ranges, then users are
+    inserted, then the rows of each chunk referencing them. Aggregated
+    user ratings are rebuilt at the end.
+    """
+    spec = dict(DEFAULTS, **options)
+    spec['password_hash'] = make_password(spec['password'])
+    spec['end'] = spec.get('end') or datetime.now(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0)
+    spec['user_base'] = (models.User.objects.aggregate(
+        max_id=Max('id'))['max_id'] or 0) + 1
+
+    chunks = _chunks(spec)
+    pool = None
+    if workers > 1:
+        connections.close_all()
+        pool = multiprocessing.Pool(workers)
+
+    try:
+        plans = _run(pool, plan_chunk, [(spec, chunk) for chunk in chunks])
+
+        offsets = []
+        next_ids = {
+            model: (model.objects.aggregate(max_id=Max('pk'))['max_id']
+                    or 0) + 1
+            for model in MODELS[1:]
+        }
+        for plan in plans:
+            offsets.append(dict(next_ids))
+            for model, count in plan.items():
+                next_ids[model] += count
+
+        _run(pool, seed_users, [(spec, chunk) for chunk in chunks])
+        _run(pool, seed_chunk,
+             [(spec, chunk, offsets[chunk]) for chunk in chunks])
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), MODELS):
+            cursor.execute(sql)
+    models.UserRating.objects.rebuild()
+
+    counts = {models.User: spec['users']}
+    for plan in plans:
+        for model, count in plan.items():
+            counts[model] = counts.get(model, 0) + count
+    return {model._meta.model_name: counts[model] for model in MODELS}
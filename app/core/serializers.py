@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import serializers
+
+from core import batch
+from core.models import RequestProfile
+
+
+class RequestProfileSerializer(serializers.ModelSerializer):
+    """Serialize a request profile"""
+
+    class Meta:
+        model = RequestProfile
+        fields = ('id', 'user', 'created_at', 'method', 'path', 'route',
+                  'status_code', 'duration_ms', 'interval_ms', 'samples',
+                  'top')
+        read_only_fields = fields
+
+
+class SubRequestSerializer(serializers.Serializer):
+    """Validate a sub-request of a batch"""
+    method = serializers.ChoiceField(choices=batch.METHODS, default='GET')
+    url = serializers.CharField()
+    body = serializers.JSONField(required=False)
+
+    def validate_url(self, value):
+        if not value.startswith('/api/'):
+            raise serializers.ValidationError(_('Only API urls are allowed'))
+        try:
+            match = resolve(value.split('?', 1)[0])
+        except Resolver404:
+            return value
+        if match.url_name == 'batch':
+            raise serializers.ValidationError(_('Batches can not be nested'))
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    """Validate a batch of sub-requests"""
+    requests = serializers.ListField(
+        child=SubRequestSerializer(), allow_empty=False,
+        max_length=settings.BATCH_MAX_REQUESTS)
+    # Whether the sub-requests are independent and can run concurrently
+    parallel = serializers.BooleanField(default=False)
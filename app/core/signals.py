@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core import caching
+from core.authentication import token_cache_key
+from core.models import Cooperation, CooperatorProfile, Organization, \
+    PortfolioItem, Project, Review, UserRating
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    """Stop authenticating with a token as soon as it is deleted"""
+    if caching.in_database():
+        return
+    cache.delete(token_cache_key(instance.key))
+
+
+@receiver(post_save, sender=get_user_model())
+def forget_changed_user_tokens(sender, instance, created, **kwargs):
+    """Make cached token authentication pick up changes to the user"""
+    if created or caching.in_database():
+        return
+    cache.delete_many([
+        token_cache_key(key)
+        for key in Token.objects.filter(user=instance).values_list(
+            'key', flat=True)
+    ])
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, raw, **kwargs):
+    """Keep the rating a review had before being changed"""
+    instance._previous_rating = (None, None)
+    if instance.pk and not raw:
+        previous = sender.objects.filter(pk=instance.pk).values_list(
+            'reviewed_id', 'rating').first()
+        instance._previous_rating = previous or (None, None)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, raw, **kwargs):
+    """Move the rating of a saved review to the reviewed user"""
+    if raw:
+        return
+    previous = instance._previous_rating
+    current = (instance.reviewed_id, instance.rating)
+    if previous != current:
+        UserRating.objects.apply(*previous, sign=-1)
+        UserRating.objects.apply(*current)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    """Remove the rating of a deleted review from the reviewed user"""
+    UserRating.objects.apply(instance.reviewed_id, instance.rating, sign=-1)
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=CooperatorProfile)
+@receiver(post_delete, sender=CooperatorProfile)
+def invalidate_directory(sender, **kwargs):
+    """Forget the cached facets of the directory when it changes"""
+    caching.invalidate('directory')
+    # Again once committed, or a request reading before the commit could
+    # cache the old counts under the new generation
+    transaction.on_commit(lambda: caching.invalidate('directory'))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_ratings(sender, **kwargs):
+    """Forget the cached ratings of the cooperators when a review changes"""
+    caching.invalidate('ratings')
+    transaction.on_commit(lambda: caching.invalidate('ratings'))
+
+
+@receiver(post_save, sender=PortfolioItem)
+@receiver(post_delete, sender=PortfolioItem)
+@receiver(post_save, sender=Cooperation)
+@receiver(post_delete, sender=Cooperation)
+def invalidate_activity(sender, **kwargs):
+    """Forget the cached full profiles of the cooperators when portfolios
+    or cooperations change"""
+    caching.invalidate('activity')
+    transaction.on_commit(lambda: caching.invalidate('activity'))
@@ -0,0 +1,22 @@
+"""Tasks run in the background by the workers, see core.jobs"""
+from core import archive, deletion, jobs, throttling, trust
+
+
+@jobs.task
+def purge_deleted():
+    deletion.purge_deleted()
+
+
+@jobs.task
+def compute_trust_scores(full=False):
+    trust.compute_trust_scores(full=full)
+
+
+@jobs.task
+def archive_old_rows(message_days, cooperation_days):
+    archive.archive_old_rows(message_days, cooperation_days)
+
+
+@jobs.task
+def purge_throttle_buckets():
+    throttling.database_buckets.purge()
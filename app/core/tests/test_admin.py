@@ -1,7 +1,15 @@
-from django.test import TestCase, Client
+from unittest import skipUnless
+
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.urls import reverse
 
+from core import estimates
+from core.models import Organization, Project, Cooperation, Review, \
+    Message, PortfolioItem, CooperatorProfile
+
 
 class AdminSiteTests(TestCase):
 
@@ -39,3 +47,104 @@ class AdminSiteTests(TestCase):
         res = self.client.get(url)
 
         self.assertEqual(res.status_code, 200)
+
+
+class LargeTableAdminTests(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.admin_user = get_user_model().objects.create_superuser(
+            email='admin@xemob.com',
+            password='Password123'
+        )
+        self.client.force_login(self.admin_user)
+        self.count = 0
+
+    def add_rows(self, count):
+        """Create some rows of every model with their own related rows"""
+        for _ in range(count):
+            i = self.count = self.count + 1
+            user = get_user_model().objects.create_user(
+                f'user{i}@xemob.com', 'Password123')
+            other = get_user_model().objects.create_user(
+                f'other{i}@xemob.com', 'Password123')
+            organization = Organization.objects.create(
+                user=user, name=f'NGO {i}', country='Spain')
+            project = Project.objects.create(
+                user=user, organization=organization, name=f'Project {i}')
+            cooperation = Cooperation.objects.create(
+                name=f'Cooperation {i}', project=project, user=user,
+                voluntary=other)
+            Review.objects.create(name=f'Review {i}', cooperation=cooperation,
+                                  user=user, reviewed=other, review='Good')
+            Message.objects.create(user=user, recipient=other, message='Hi')
+            PortfolioItem.objects.create(user=user, name=f'Item {i}')
+            CooperatorProfile.objects.create(
+                user=other, name=f'Cooperator {i}', description='Cooperator')
+
+    def queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_constant(self):
+        """Test the changelists run as many queries whatever the rows"""
+        urls = [reverse(f'admin:core_{model}_changelist')
+                for model in ('organization', 'project', 'cooperation',
+                              'review', 'message', 'portfolioitem',
+                              'cooperatorprofile', 'job', 'user')]
+        self.add_rows(1)
+        counts = [self.queries(url) for url in urls]
+
+        self.add_rows(5)
+
+        self.assertEqual([self.queries(url) for url in urls], counts)
+
+    def test_search_exact_values(self):
+        """Test the search matches ids and exact indexed values"""
+        self.add_rows(3)
+        url = reverse('admin:core_message_changelist')
+        message = Message.objects.get(user__email='user2@xemob.com')
+
+        res = self.client.get(url, {'q': 'user2@xemob.com'})
+        self.assertEqual(list(res.context['cl'].result_list), [message])
+
+        res = self.client.get(url, {'q': str(message.id)})
+        self.assertEqual(list(res.context['cl'].result_list), [message])
+
+        res = self.client.get(url, {'q': 'user2'})
+        self.assertEqual(list(res.context['cl'].result_list), [])
+
+
+class EstimatedCountTests(TestCase):
+
+    def test_small_counts_exact(self):
+        """Test small querysets are counted exactly"""
+        get_user_model().objects.create_user('test@xemob.com', 'pass')
+        queryset = get_user_model().objects.order_by('id')
+
+        self.assertEqual(estimates.estimated_count(queryset), (1, True))
+        paginator = estimates.EstimatedCountPaginator(queryset, 10)
+        self.assertEqual(paginator.count, 1)
+        self.assertTrue(paginator.count_is_exact)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Estimates need '
+                'PostgreSQL')
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=1000)
+    def test_large_counts_estimated(self):
+        """Test large tables are counted from their statistics"""
+        user = get_user_model().objects.create_user('test@xemob.com', 'pass')
+        Message.objects.bulk_create([
+            Message(user=user, recipient=user, message='Hi')
+            for _ in range(2000)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_message')
+
+        count, exact = estimates.estimated_count(Message.objects.all())
+        self.assertFalse(exact)
+        self.assertAlmostEqual(count, 2000, delta=200)
+        count, exact = estimates.estimated_count(
+            Message.objects.filter(user=user))
+        self.assertFalse(exact)
@@ -0,0 +1,145 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import archive
+from core.models import Organization, Project, Cooperation, Review, \
+    Message, ArchivedRecord, UserRating
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.owner = User.objects.create_user('owner@xemob.com', 'testpass')
+        self.volunteer = User.objects.create_user('volunteer@xemob.com',
+                                                  'testpass')
+        self.stranger = User.objects.create_user('stranger@xemob.com',
+                                                 'testpass')
+        organization = Organization.objects.create(
+            user=self.owner, name='NGO', country='Spain')
+        project = Project.objects.create(
+            user=self.owner, organization=organization, name='Project')
+        self.old = Cooperation.objects.create(
+            name='Old cooperation', project=project, user=self.owner,
+            voluntary=self.volunteer, is_private=True,
+            end_date=date.today() - timedelta(days=1000))
+        self.recent = Cooperation.objects.create(
+            name='Recent cooperation', project=project, user=self.owner,
+            voluntary=self.volunteer, end_date=date.today())
+        self.review = Review.objects.create(
+            name='Review', cooperation=self.old, user=self.owner,
+            reviewed=self.volunteer, review='Good', rating=4)
+        self.messages = [
+            Message.objects.create(user=self.owner, recipient=self.volunteer,
+                                   message=f'Message {i}')
+            for i in range(5)
+        ]
+        Message.objects.filter(pk__in=[m.pk for m in self.messages[:3]]) \
+            .update(date=timezone.now() - timedelta(days=1000))
+
+    def archive(self, **options):
+        return archive.archive_old_rows(730, 730, pause=0, **options)
+
+    def test_old_rows_archived(self):
+        """Test the old rows move to the archive and the recent ones stay"""
+        counts = self.archive(batch_size=2)
+
+        self.assertEqual(counts, {'messages': 3, 'cooperations': 1})
+        self.assertEqual(Message.objects.count(), 2)
+        self.assertEqual(list(Cooperation.objects.all()), [self.recent])
+        self.assertFalse(Review.objects.exists())
+        self.assertEqual(ArchivedRecord.objects.count(), 5)
+
+    def test_archived_rows_restored(self):
+        """Test an archived row is read back with all its fields"""
+        self.archive()
+
+        cooperation = archive.get_archived(Cooperation, self.old.pk)
+        review = archive.get_archived(Review, self.review.pk)
+
+        self.assertEqual(cooperation.name, 'Old cooperation')
+        self.assertEqual(cooperation.end_date, self.old.end_date)
+        self.assertEqual(cooperation.voluntary_id, self.volunteer.pk)
+        self.assertEqual(review.rating, 4)
+        self.assertIsNone(archive.get_archived(Cooperation, self.recent.pk))
+
+    def test_archive_replaced(self):
+        """Test archiving a row archived before keeps its latest version"""
+        message = self.messages[0]
+        ArchivedRecord.objects.create(
+            model='core.message', object_id=message.pk,
+            data=archive.pack(Message(pk=message.pk, message='Stale')))
+
+        self.archive()
+
+        self.assertEqual(archive.get_archived(Message, message.pk).message,
+                         'Message 0')
+        self.assertFalse(Message.objects.filter(pk=message.pk).exists())
+
+    def test_ratings_kept(self):
+        """Test archiving reviews leaves the ratings untouched"""
+        self.archive()
+
+        self.assertEqual(UserRating.objects.get(user=self.volunteer).count, 1)
+
+    def test_limit(self):
+        """Test no more rows than the limit are archived"""
+        counts = self.archive(batch_size=2, limit=1)
+
+        self.assertEqual(counts['messages'], 1)
+        self.assertEqual(Message.objects.count(), 4)
+
+    def test_command(self):
+        """Test the command archives the old rows"""
+        out = StringIO()
+        call_command('archive', '--pause', '0', stdout=out)
+
+        self.assertIn('Archived 3 messages and 1 cooperations',
+                      out.getvalue())
+
+    def test_retrieve_archived(self):
+        """Test archived rows can still be retrieved by their id"""
+        self.archive()
+        self.client.force_authenticate(self.volunteer)
+
+        for name, pk in (('cooperation', self.old.pk),
+                         ('review', self.review.pk),
+                         ('message', self.messages[0].pk)):
+            res = self.client.get(
+                reverse(f'projects:{name}-detail', args=[pk]))
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.data['id'], pk)
+
+    def test_archived_rows_stay_private(self):
+        """Test archived private rows are hidden from other users"""
+        self.archive()
+        self.client.force_authenticate(self.stranger)
+
+        for name, pk in (('cooperation', self.old.pk),
+                         ('message', self.messages[0].pk)):
+            res = self.client.get(
+                reverse(f'projects:{name}-detail', args=[pk]))
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_archived_rows_read_only(self):
+        """Test archived rows can't be updated"""
+        self.archive()
+        self.client.force_authenticate(self.owner)
+
+        res = self.client.patch(
+            reverse('projects:cooperation-detail', args=[self.old.pk]),
+            {'name': 'Changed'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
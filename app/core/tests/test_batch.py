@@ -0,0 +1,122 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import batch, throttling
+from core.models import CooperatorProfile, Organization, Project
+
+
+BATCH_URL = reverse('batch')
+PORTFOLIO_URL = reverse('projects:portfolioitem-list')
+
+
+def detail_url(basename, pk):
+    return reverse(f'projects:{basename}-detail', args=[pk])
+
+
+def sample_rows(user):
+    organization = Organization.objects.create(
+        user=user, name='NGO', country='Spain')
+    project = Project.objects.create(user=user, organization=organization,
+                                     name='Project')
+    CooperatorProfile.objects.create(user=user, name='Cooperator')
+    return organization, project
+
+
+class BatchApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        throttling.local_buckets.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@xemob.com', 'testpass')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.organization, self.project = sample_rows(self.user)
+
+    def test_batch_runs_sub_requests(self):
+        """Test a batch returns the responses of its sub-requests in order"""
+        res = self.client.post(BATCH_URL, {'requests': [
+            {'url': detail_url('project', self.project.id)},
+            {'url': detail_url('organization', self.organization.id)},
+            {'url': detail_url('cooperatorprofile', self.user.id)},
+            {'url': '/api/projects/unknown/'},
+        ]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([sub['status'] for sub in res.data],
+                         [200, 200, 200, 404])
+        self.assertEqual(res.data[0]['body']['name'], 'Project')
+        self.assertEqual(res.data[1]['body']['name'], 'NGO')
+        self.assertEqual(res.data[2]['body']['name'], 'Cooperator')
+
+    def test_token_looked_up_once(self):
+        """Test sub-requests share the authentication of the batch"""
+        with patch('core.authentication.CachedTokenAuthentication.'
+                   'authenticate_credentials',
+                   return_value=(self.user, self.token)) as authenticate:
+            res = self.client.post(BATCH_URL, {'requests': [
+                {'method': 'POST', 'url': PORTFOLIO_URL,
+                 'body': {'user': self.user.id, 'name': 'Item'}},
+                {'url': PORTFOLIO_URL},
+            ]}, format='json')
+
+        self.assertEqual(authenticate.call_count, 1)
+        self.assertEqual(res.data[0]['status'], status.HTTP_201_CREATED)
+        self.assertEqual([item['name'] for item in res.data[1]['body']],
+                         ['Item'])
+
+    def test_sub_requests_checked_by_their_views(self):
+        """Test anonymous batches can't write through sub-requests"""
+        self.client.credentials()
+
+        res = self.client.post(BATCH_URL, {'requests': [
+            {'method': 'DELETE',
+             'url': detail_url('project', self.project.id)},
+        ]}, format='json')
+
+        self.assertEqual(res.data[0]['status'], status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(Project.objects.filter(pk=self.project.id).exists())
+
+    def test_invalid_batches(self):
+        """Test nested batches, other urls and long batches are refused"""
+        for requests in ([{'url': BATCH_URL}],
+                         [{'url': '/admin/'}],
+                         [{'url': PORTFOLIO_URL}] * 21,
+                         []):
+            res = self.client.post(BATCH_URL, {'requests': requests},
+                                   format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ParallelBatchTests(TransactionTestCase):
+
+    def test_parallel_batch(self):
+        """Test independent sub-requests can run in threads"""
+        cache.clear()
+        throttling.local_buckets.clear()
+        user = get_user_model().objects.create_user(
+            'test@xemob.com', 'testpass')
+        organization, project = sample_rows(user)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        with patch('core.batch.run_in_thread',
+                   wraps=batch.run_in_thread) as run_in_thread:
+            res = client.post(BATCH_URL, {'parallel': True, 'requests': [
+                {'url': detail_url('project', project.id)},
+                {'url': detail_url('organization', organization.id)},
+            ]}, format='json')
+
+        self.assertEqual(run_in_thread.call_count, 2)
+        self.assertEqual([sub['body']['name'] for sub in res.data],
+                         ['Project', 'NGO'])
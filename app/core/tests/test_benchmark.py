@@ -0,0 +1,67 @@
+from django.test import TestCase
+from django.urls import URLResolver, get_resolver
+
+from core import benchmark
+
+
+def url_names(patterns, namespace=''):
+    """Yield the full name of every url pattern but the admin ones"""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace == 'admin':
+                continue
+            prefix = f'{namespace}{pattern.namespace}:' \
+                if pattern.namespace else namespace
+            yield from url_names(pattern.url_patterns, prefix)
+        elif pattern.name:
+            yield namespace + pattern.name
+
+
+# Endpoints that may not query the database: served from the cache, from
+# the memory of the process or static
+CACHED = {
+    ('user:me', 'GET'),
+    ('metrics', 'GET'),
+    ('projects:api-root', 'GET'),
+    ('core:api-root', 'GET'),
+}
+
+
+class BenchmarkTests(TestCase):
+
+    def test_seed_dataset(self):
+        """Test seeding a dataset creates rows for every model"""
+        dataset = benchmark.seed_dataset(users=30)
+
+        self.assertEqual(dataset['user'], 30)
+        self.assertTrue(all(dataset.values()))
+
+    def test_percentile(self):
+        """Test the nearest-rank percentile of a list of values"""
+        values = list(range(1, 101))
+
+        self.assertEqual(benchmark.percentile(values, 50), 50)
+        self.assertEqual(benchmark.percentile(values, 99), 99)
+        self.assertEqual(benchmark.percentile([3], 95), 3)
+        self.assertIsNone(benchmark.percentile([], 50))
+
+    def test_run_benchmark_covers_every_route(self):
+        """Test the report includes every route and action with its
+        statistics"""
+        report = benchmark.run_benchmark(users=10, requests=2)
+        names = {endpoint['name'] for endpoint in report['endpoints']}
+        actions = {(endpoint['name'], endpoint['method'].lower())
+                   for endpoint in report['endpoints']}
+
+        self.assertEqual(names, set(url_names(get_resolver().url_patterns)))
+        self.assertLessEqual(
+            {(url_name, method) for *_, method, _, url_name
+             in benchmark.route_actions()}, actions)
+        for endpoint in report['endpoints']:
+            with self.subTest(name=endpoint['name'],
+                              method=endpoint['method']):
+                self.assertEqual(endpoint['requests'], 2)
+                self.assertEqual(endpoint['errors'], 0)
+                self.assertIn('p95', endpoint['latency_ms'])
+                if (endpoint['name'], endpoint['method']) not in CACHED:
+                    self.assertGreater(endpoint['queries_per_request'], 0)
@@ -0,0 +1,144 @@
+import gzip
+from unittest.mock import patch
+
+import brotli
+from django.contrib.auth import get_user_model
+from django.core.cache import CacheHandler, cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import compression
+from core.models import CooperatorProfile, Organization, Project, Review, \
+    Cooperation
+from core.tests.utils import MEMORY_CACHES
+
+
+PROJECTS_URL = reverse('projects:project-list')
+COOPERATORS_URL = reverse('projects:cooperatorprofile-list')
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200, CACHES=MEMORY_CACHES)
+class CompressionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@xemob.com', 'testpass')
+        self.organization = Organization.objects.create(
+            user=self.user, name='NGO', country='Spain')
+        for i in range(10):
+            Project.objects.create(user=self.user,
+                                   organization=self.organization,
+                                   name=f'Project {i}',
+                                   description='A long description ' * 5)
+
+    def test_negotiate(self):
+        """Test brotli is preferred and refused encodings are skipped"""
+        cases = (
+            ('gzip, deflate, br', 'br'),
+            ('gzip', 'gzip'),
+            ('br;q=0, gzip;q=0.5', 'gzip'),
+            ('*', 'br'),
+            ('identity', None),
+            ('', None),
+        )
+        for accept, encoding in cases:
+            with self.subTest(accept=accept):
+                request = self.client.get(
+                    '/', HTTP_ACCEPT_ENCODING=accept).wsgi_request
+                self.assertEqual(compression.negotiate(request), encoding)
+
+    def test_gzip_and_brotli_responses(self):
+        """Test responses are compressed with the encoding accepted"""
+        plain = self.client.get(PROJECTS_URL)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        res = self.client.get(PROJECTS_URL, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+
+        res = self.client.get(PROJECTS_URL, HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(res.content), plain.content)
+        self.assertEqual(res['Content-Length'], str(len(res.content)))
+
+    def test_small_responses_not_compressed(self):
+        """Test bodies under the threshold are sent as they are"""
+        url = reverse('projects:organization-list')
+        res = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Content-Encoding', res)
+
+    def test_cached_response_not_compressed_again(self):
+        """Test cached responses are served with the bytes compressed
+        once"""
+        with patch('core.compression.compress',
+                   wraps=compression.compress) as compress:
+            first = self.client.get(PROJECTS_URL, HTTP_ACCEPT_ENCODING='br')
+            second = self.client.get(PROJECTS_URL, HTTP_ACCEPT_ENCODING='br')
+            self.client.get(PROJECTS_URL, HTTP_ACCEPT_ENCODING='gzip')
+            third = self.client.get(PROJECTS_URL,
+                                    HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(compress.call_count, 2)
+        self.assertEqual(first['X-Cache'], 'miss')
+        self.assertEqual(second['X-Cache'], 'hit')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(third['Content-Encoding'], 'gzip')
+
+    def test_cached_response_invalidated(self):
+        """Test changes to the directory and ratings reach the cache"""
+        self.client.get(PROJECTS_URL)
+        project = Project.objects.create(
+            user=self.user, organization=self.organization, name='New')
+
+        res = self.client.get(PROJECTS_URL)
+        self.assertEqual(res['X-Cache'], 'miss')
+        self.assertEqual(len(res.json()), 11)
+
+        reviewer = get_user_model().objects.create_user(
+            'other@xemob.com', 'testpass')
+        CooperatorProfile.objects.create(user=self.user, name='Cooperator')
+        self.client.get(COOPERATORS_URL)
+        cooperation = Cooperation.objects.create(
+            user=reviewer, voluntary=self.user, project=project,
+            name='Cooperation')
+        Review.objects.create(user=reviewer, reviewed=self.user,
+                              cooperation=cooperation, name='Review',
+                              review='Good', rating=4)
+
+        res = self.client.get(COOPERATORS_URL)
+        self.assertEqual(res['X-Cache'], 'miss')
+        self.assertEqual(res.json()[0]['rating_mean'], 4)
+
+    def test_cached_response_invalidated_by_another_process(self):
+        """Test changes saved by another process reach the cached
+        responses"""
+        self.client.get(PROJECTS_URL)
+
+        with patch('core.caching.cache', CacheHandler()['default']):
+            Project.objects.create(
+                user=self.user, organization=self.organization, name='New')
+        res = self.client.get(PROJECTS_URL)
+
+        self.assertEqual(res['X-Cache'], 'miss')
+        self.assertEqual(len(res.json()), 11)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_table',
+    }})
+    def test_responses_not_cached_in_database(self):
+        """Test responses aren't cached in the database, where a hit costs
+        as many queries as a miss"""
+        self.client.get(PROJECTS_URL)
+        res = self.client.get(PROJECTS_URL, HTTP_ACCEPT_ENCODING='br')
+
+        self.assertNotIn('X-Cache', res)
+        self.assertEqual(res['Content-Encoding'], 'br')
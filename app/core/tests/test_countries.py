@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import caching, countries
+from core.models import Organization
+
+
+class CountryTests(TestCase):
+
+    def test_country_code(self):
+        """Test names, codes and aliases in any case map to the code"""
+        for value in ('Spain', 'spain', ' SPAIN ', 'ES', 'esp', 'España',
+                      'Espana'):
+            self.assertEqual(countries.country_code(value), 'ES', value)
+        self.assertEqual(countries.country_code('the Netherlands'), 'NL')
+        self.assertEqual(countries.country_code("Côte d'Ivoire"), 'CI')
+        self.assertEqual(countries.country_code('U.K.'), 'GB')
+
+    def test_unknown_country(self):
+        """Test unknown countries have no code"""
+        self.assertIsNone(countries.country_code('Wonderland'))
+        self.assertIsNone(countries.country_code(''))
+        self.assertEqual(countries.normalize(' Wonderland '),
+                         ('', 'Wonderland'))
+
+    def test_normalize(self):
+        """Test known countries get their canonical name"""
+        self.assertEqual(countries.normalize('usa'), ('US', 'United States'))
+
+    def test_codes_unique(self):
+        """Test no two countries share a code"""
+        codes = [code for code, _, _ in countries.COUNTRIES]
+        alpha3 = [code for _, code, _ in countries.COUNTRIES]
+        self.assertEqual(len(set(codes)), len(codes))
+        self.assertEqual(len(set(alpha3)), len(alpha3))
+        self.assertLessEqual(set(countries.ALIASES), set(codes))
+
+
+class BackfillCountryCodesTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@xemob.com', 'testpass')
+
+    def test_organization_normalized_on_save(self):
+        """Test the country of an organization is normalized on save"""
+        organization = Organization.objects.create(
+            user=self.user, name='NGO', country='españa')
+
+        self.assertEqual(organization.country, 'Spain')
+        self.assertEqual(organization.country_code, 'ES')
+
+    def test_backfill(self):
+        """Test the command normalizes the countries of existing rows"""
+        for name, country in (('A', 'spain'), ('B', 'FR'), ('C', 'Mars'),
+                              ('D', 'Spain')):
+            Organization.objects.bulk_create([Organization(
+                user=self.user, name=name, country=country)])
+        Organization.objects.filter(name='D').update(country_code='ES')
+        out = StringIO()
+
+        call_command('backfill_country_codes', batch_size=2, stdout=out)
+
+        self.assertEqual(
+            list(Organization.objects.order_by('name').values_list(
+                'country', 'country_code')),
+            [('Spain', 'ES'), ('France', 'FR'), ('Mars', ''),
+             ('Spain', 'ES')]
+        )
+        self.assertIn('Updated 2 organizations, 1 with an unknown country',
+                      out.getvalue())
+        self.assertIn("Unknown country 'Mars': 1", out.getvalue())
+
+    def test_backfill_invalidates_directory(self):
+        """Test the backfill invalidates the cached directory only when
+        rows change"""
+        Organization.objects.bulk_create([Organization(
+            user=self.user, name='A', country='spain')])
+        generation = caching.generation('directory')
+
+        call_command('backfill_country_codes', stdout=StringIO())
+        changed = caching.generation('directory')
+        call_command('backfill_country_codes', stdout=StringIO())
+
+        self.assertNotEqual(changed, generation)
+        self.assertEqual(caching.generation('directory'), changed)
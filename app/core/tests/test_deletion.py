@@ -0,0 +1,126 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import deletion
+from core.models import Organization, Project, Cooperation, Review, \
+    PortfolioItem, CooperatorProfile, Message, UserRating
+
+
+class DeletionTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user('user@xemob.com', 'testpass')
+        self.other = User.objects.create_user('other@xemob.com', 'testpass')
+        self.organization = Organization.objects.create(
+            user=self.user, name='NGO', country='Spain')
+        other_organization = Organization.objects.create(
+            user=self.other, name='Other NGO', country='France')
+        project = Project.objects.create(
+            user=self.user, organization=self.organization, name='Project')
+        other_project = Project.objects.create(
+            user=self.other, organization=other_organization,
+            name='Other project')
+        for i in range(3):
+            cooperation = Cooperation.objects.create(
+                name=f'Cooperation {i}', project=project, user=self.user,
+                voluntary=self.other)
+            Review.objects.create(
+                name='Review', cooperation=cooperation, user=self.user,
+                reviewed=self.other, review='Good', rating=5)
+        self.kept = Cooperation.objects.create(
+            name='Kept cooperation', project=other_project, user=self.other,
+            voluntary=self.user)
+        self.kept_review = Review.objects.create(
+            name='Kept review', cooperation=self.kept, user=self.other,
+            reviewed=self.user, review='Good', rating=4)
+        PortfolioItem.objects.create(user=self.user, name='Item')
+        CooperatorProfile.objects.create(user=self.user, name='Cooperator',
+                                         description='Cooperator')
+        for i in range(3):
+            Message.objects.create(user=self.user, recipient=self.other,
+                                   message='Hi')
+            Message.objects.create(user=self.other, recipient=self.user,
+                                   message='Hello')
+
+    def test_soft_delete_user(self):
+        """Test deleting a user deactivates it and hides its organizations"""
+        deletion.soft_delete_user(self.user)
+
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(list(Organization.objects.deleted()),
+                         [self.organization])
+        self.assertEqual(Project.objects.count(), 2)
+
+    def test_rows_of_deleted_user_hidden(self):
+        """Test the rows of a deleted user disappear from the API at once"""
+        Project.objects.create(
+            user=self.user, name='Project of the user',
+            organization=Organization.objects.get(name='Other NGO'))
+        deletion.soft_delete_user(self.user)
+        client = APIClient()
+        client.force_authenticate(self.other)
+
+        for basename, field, names in (
+                ('project', 'name', ['Other project']),
+                ('portfolioitem', 'name', []),
+                ('cooperation', 'name', ['Kept cooperation']),
+                ('review', 'name', ['Kept review']),
+                ('message', 'message', ['Hello'] * 3)):
+            with self.subTest(route=basename):
+                res = client.get(reverse(f'projects:{basename}-list'))
+
+                self.assertEqual([row[field] for row in res.data], names)
+
+    def test_purge_organization(self):
+        """Test purging an organization deletes its projects in batches"""
+        deletion.soft_delete_organization(self.organization)
+        progress = []
+
+        counts = deletion.purge_deleted(
+            batch_size=2, pause=0,
+            progress=lambda label, count: progress.append((label, count)))
+
+        self.assertEqual(counts, {'organizations': 1, 'users': 0})
+        self.assertEqual(list(Cooperation.objects.all()), [self.kept])
+        self.assertEqual(list(Review.objects.all()), [self.kept_review])
+        self.assertEqual(Project.objects.count(), 1)
+        self.assertIn(('reviews', 2), progress)
+        self.assertIn(('reviews', 3), progress)
+        self.assertIn((f'organization {self.organization.pk}', 1), progress)
+        # The ratings follow the deleted reviews
+        self.assertEqual(UserRating.objects.get(user=self.other).count, 0)
+
+    def test_purge_user(self):
+        """Test purging a user deletes its rows and detaches the others"""
+        deletion.soft_delete_user(self.user)
+
+        counts = deletion.purge_deleted(batch_size=2, pause=0)
+
+        self.assertEqual(counts, {'organizations': 1, 'users': 1})
+        self.assertFalse(get_user_model().objects.filter(
+            email='user@xemob.com').exists())
+        self.assertFalse(Message.objects.exists())
+        self.assertFalse(PortfolioItem.objects.exists())
+        self.assertFalse(CooperatorProfile.objects.exists())
+        self.kept.refresh_from_db()
+        self.kept_review.refresh_from_db()
+        self.assertIsNone(self.kept.voluntary_id)
+        self.assertIsNone(self.kept_review.reviewed_id)
+
+    def test_command(self):
+        """Test the command reports the progress of the purge"""
+        deletion.soft_delete_user(self.user)
+        out = StringIO()
+
+        call_command('purge_deleted', '--pause', '0', stdout=out)
+
+        self.assertIn('sent messages: 3', out.getvalue())
+        self.assertIn('Deleted 1 organizations and 1 users', out.getvalue())
@@ -0,0 +1,188 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import jobs, tasks
+from core.models import Job, Organization
+
+
+calls = []
+
+
+@jobs.task
+def record(value):
+    calls.append(value)
+
+
+@jobs.task(name='tests.fail')
+def fail():
+    raise RuntimeError('Boom')
+
+
+class JobTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_jobs_run_by_priority(self):
+        """Test the jobs of higher priority run first, oldest first"""
+        jobs.enqueue(record, value='low')
+        jobs.enqueue(record, priority=5, value='high')
+        jobs.enqueue(record, value='low again')
+
+        self.assertEqual(jobs.work(burst=True), 3)
+
+        self.assertEqual(calls, ['high', 'low', 'low again'])
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 3)
+
+    def test_scheduled_jobs_wait(self):
+        """Test jobs don't run before their time"""
+        job = jobs.enqueue(record, delay=60, value='later')
+
+        self.assertIsNone(jobs.claim('worker'))
+        job.run_at = timezone.now()
+        job.save()
+        self.assertEqual(jobs.claim('worker'), job)
+
+    def test_claimed_jobs_not_claimed_again(self):
+        """Test a running job isn't handed to another worker"""
+        job = jobs.enqueue(record, value=1)
+
+        claimed = jobs.claim('first')
+
+        self.assertEqual(claimed, job)
+        self.assertEqual((claimed.status, claimed.attempts, claimed.worker),
+                         (Job.RUNNING, 1, 'first'))
+        self.assertIsNone(jobs.claim('second'))
+
+    def test_failed_jobs_retried_with_backoff(self):
+        """Test failed jobs are queued again later until attempts run out"""
+        job = jobs.enqueue('tests.fail', max_attempts=2)
+
+        with self.assertLogs('jobs', 'WARNING'):
+            jobs.run(jobs.claim('worker'))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn('Boom', job.error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(
+            seconds=jobs.backoff(1) - 1))
+        self.assertEqual(jobs.backoff(3), 4 * jobs.backoff(1))
+
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('jobs', 'WARNING'):
+            jobs.run(jobs.claim('worker'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_unique_jobs(self):
+        """Test a unique task isn't queued twice"""
+        first = jobs.enqueue(record, unique=True, value=1)
+
+        self.assertEqual(jobs.enqueue(record, unique=True, value=2), first)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_unknown_task(self):
+        """Test only registered tasks can be queued"""
+        with self.assertRaises(KeyError):
+            jobs.enqueue('tests.unknown')
+
+    def test_stale_jobs_queued_again(self):
+        """Test jobs left running by a dead worker are queued again"""
+        job = jobs.enqueue(record, value=1)
+        jobs.claim('dead')
+        Job.objects.update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(jobs.requeue_stale(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+
+    def test_long_jobs_with_heartbeat_not_queued_again(self):
+        """Test jobs running for long are left alone while they beat"""
+        job = jobs.enqueue(record, value=1)
+        jobs.claim('alive')
+        Job.objects.update(started_at=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(jobs.requeue_stale(), 0)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+
+    def test_stale_jobs_out_of_attempts_failed(self):
+        """Test abandoned jobs are not queued again past their attempts"""
+        job = jobs.enqueue(record, max_attempts=1, value=1)
+        jobs.claim('dead')
+        Job.objects.update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(jobs.requeue_stale(), 0)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.error, 'Abandoned by its worker')
+
+    def test_outcome_dropped_once_taken_over(self):
+        """Test a worker does not save over a job queued again meanwhile"""
+        jobs.enqueue(record, value=1)
+        job = jobs.claim('slow')
+        Job.objects.update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        jobs.requeue_stale()
+        jobs.claim('other')
+
+        with self.assertLogs('jobs', 'WARNING') as logs:
+            jobs.run(job)
+
+        self.assertIn('was taken over', logs.output[0])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertEqual(job.worker, 'other')
+
+    def test_stale_jobs_queued_again_by_workers(self):
+        """Test running workers queue the jobs of dead workers again"""
+        jobs.enqueue(record, value='abandoned')
+        jobs.claim('dead')
+        Job.objects.update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+        with self.assertLogs('jobs', 'WARNING') as logs:
+            self.assertEqual(jobs.work(burst=True), 1)
+
+        self.assertIn('Queued 1 abandoned jobs again', logs.output[0])
+        self.assertEqual(calls, ['abandoned'])
+
+    @override_settings(JOB_SCHEDULES={
+        'core.tests.test_jobs.record': {'every': 60,
+                                        'kwargs': {'value': 'again'}},
+        'tests.fail': {'every': 0},
+    })
+    def test_schedules(self):
+        """Test scheduled tasks are queued again after each run"""
+        first, = jobs.schedule()
+        self.assertEqual(first.kwargs, {'value': 'again'})
+        self.assertEqual(jobs.schedule(), [])
+
+        jobs.work(burst=True)
+        second, = jobs.schedule()
+
+        self.assertEqual(calls, ['again'])
+        self.assertEqual(second.run_at, first.run_at + timedelta(seconds=60))
+        self.assertFalse(Job.objects.filter(name='tests.fail').exists())
+
+    def test_command(self):
+        """Test the command runs the queued jobs"""
+        user = get_user_model().objects.create_user('test@xemob.com',
+                                                    'testpass')
+        Organization.objects.create(user=user, name='NGO', country='Spain',
+                                    deleted_at=timezone.now())
+        jobs.enqueue(tasks.purge_deleted)
+        jobs.enqueue(record, value='done')
+        out = StringIO()
+
+        call_command('run_worker', '--burst', stdout=out)
+
+        self.assertIn('Ran 2 jobs', out.getvalue())
+        self.assertEqual(calls, ['done'])
+        self.assertFalse(Organization.objects.exists())
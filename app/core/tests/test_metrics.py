@@ -0,0 +1,174 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import CacheHandler, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.tests.utils import MEMORY_CACHES
+
+
+METRICS_URL = reverse('metrics')
+PROJECTS_URL = reverse('projects:project-list')
+ME_URL = reverse('user:me')
+
+
+def sample_value(name, **labels):
+    """Return the current value of a metric sample, 0 if missing"""
+    value = metrics.REGISTRY.get_sample_value(name, labels)
+    return value or 0
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_metrics_endpoint(self):
+        """Test the metrics are exposed in the Prometheus format"""
+        self.client.get(PROJECTS_URL)
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        content = res.content.decode()
+        self.assertIn('http_request_duration_seconds_bucket{', content)
+        self.assertIn('route="projects:project-list"', content)
+        self.assertIn('http_requests_in_flight', content)
+
+    def test_request_metrics_labeled_by_route(self):
+        """Test a request is counted with its route, method and status"""
+        labels = {'route': 'projects:project-list', 'method': 'GET'}
+        requests = sample_value('http_requests_total', status='200',
+                                **labels)
+        latencies = sample_value('http_request_duration_seconds_count',
+                                 **labels)
+
+        self.client.get(PROJECTS_URL)
+
+        self.assertEqual(
+            sample_value('http_requests_total', status='200', **labels),
+            requests + 1
+        )
+        self.assertEqual(
+            sample_value('http_request_duration_seconds_count', **labels),
+            latencies + 1
+        )
+
+    def test_unmatched_route(self):
+        """Test requests to unknown URLs share a single label"""
+        before = sample_value('http_requests_total', route='unmatched',
+                              method='GET', status='404')
+
+        self.client.get('/not-a-route/')
+
+        self.assertEqual(
+            sample_value('http_requests_total', route='unmatched',
+                         method='GET', status='404'),
+            before + 1
+        )
+
+    @override_settings(CACHES=MEMORY_CACHES)
+    def test_auth_cache_hits_and_misses(self):
+        """Test token authentication is cached and counted"""
+        user = get_user_model().objects.create_user(
+            'test@xemob.com', 'password123')
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        hits = sample_value('auth_token_cache_total', result='hit')
+        misses = sample_value('auth_token_cache_total', result='miss')
+
+        self.client.get(ME_URL)
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(len(queries), 0)
+
+        self.assertEqual(res.data['email'], user.email)
+        self.assertEqual(sample_value('auth_token_cache_total',
+                                      result='miss'), misses + 1)
+        self.assertEqual(sample_value('auth_token_cache_total',
+                                      result='hit'), hits + 1)
+
+    def test_token_not_cached_in_database(self):
+        """Test tokens are looked up directly when the cache is the
+        database"""
+        user = get_user_model().objects.create_user(
+            'test@xemob.com', 'password123')
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.client.get(ME_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(ME_URL)
+
+        self.assertEqual(len(queries), 1)
+        self.assertIn('authtoken_token', queries[0]['sql'])
+
+    @override_settings(CACHES=MEMORY_CACHES)
+    def test_deleted_token_not_cached(self):
+        """Test a deleted token stops authenticating immediately"""
+        user = get_user_model().objects.create_user(
+            'test@xemob.com', 'password123')
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.client.get(ME_URL)
+
+        token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, 401)
+
+    def test_cache_shared_by_processes(self):
+        """Test the default cache is not kept in each process"""
+        self.assertNotIsInstance(caches['default'],
+                                 (LocMemCache, DummyCache))
+
+    def test_token_revoked_by_another_process(self):
+        """Test a token revoked through another cache client stops
+        authenticating"""
+        user = get_user_model().objects.create_user(
+            'test@xemob.com', 'password123')
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.client.get(ME_URL)
+
+        other = CacheHandler()['default']
+        with patch('core.signals.cache', other):
+            token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, 401)
+
+    @override_settings(CACHES=MEMORY_CACHES)
+    def test_deactivated_user_not_cached(self):
+        """Test changes to a user apply to its cached token"""
+        user = get_user_model().objects.create_user(
+            'test@xemob.com', 'password123')
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.client.get(ME_URL)
+
+        user.is_active = False
+        user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, 401)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token_required(self):
+        """Test the metrics need the configured bearer token"""
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, 401)
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(res.status_code, 200)
@@ -0,0 +1,88 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import instrumentation
+from core.models import Organization
+
+
+ORGANIZATION_URL = reverse('projects:organization-list')
+
+
+def server_timing(response):
+    """Return the Server-Timing metrics of a response by name"""
+    metrics = {}
+    for metric in response['Server-Timing'].split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+class PerformanceMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@xemob.com', 'password123')
+        Organization.objects.create(user=self.user, name='NGO',
+                                    country='Spain')
+
+    def test_server_timing_header(self):
+        """Test the response has the timing of each part of the request"""
+        res = self.client.get(ORGANIZATION_URL)
+
+        metrics = server_timing(res)
+        self.assertEqual(set(metrics),
+                         {'total', 'db', 'serializer', 'render'})
+        self.assertEqual(metrics['db']['desc'], '"1 queries"')
+        self.assertGreater(float(metrics['serializer']['dur']), 0)
+        self.assertGreater(float(metrics['render']['dur']), 0)
+        self.assertGreaterEqual(float(metrics['total']['dur']),
+                                float(metrics['db']['dur']))
+
+    def test_performance_log_fields(self):
+        """Test the timings are logged with the view and action names"""
+        with self.assertLogs('performance', level='INFO') as logs:
+            self.client.get(ORGANIZATION_URL)
+
+        fields = logs.records[0].performance
+        self.assertEqual(fields['view'], 'OrganizationViewSet')
+        self.assertEqual(fields['action'], 'list')
+        self.assertEqual(fields['status'], 200)
+        self.assertEqual(fields['db_queries'], 1)
+        self.assertIn('action=list', logs.output[0])
+
+    def test_non_viewset_action_is_method(self):
+        """Test views without actions are logged with the HTTP method"""
+        self.client.force_authenticate(self.user)
+        with self.assertLogs('performance', level='INFO') as logs:
+            self.client.get(reverse('user:me'))
+
+        fields = logs.records[0].performance
+        self.assertEqual(fields['view'], 'ManageUserView')
+        self.assertEqual(fields['action'], 'get')
+
+    def test_measure_outside_request(self):
+        """Test measuring without a current request does nothing"""
+        with instrumentation.measure('serializer'):
+            pass
+
+        self.assertIsNone(instrumentation.current_timings())
+
+    def test_nested_measures_counted_once(self):
+        """Test nested blocks of the same name are not counted twice"""
+        timings = instrumentation.RequestTimings()
+        with timings.measure('serializer'):
+            with timings.measure('serializer'):
+                pass
+
+        self.assertEqual(len(timings.durations), 1)
+
+    def test_execute_wrapper_removed_after_request(self):
+        """Test the database wrapper only lives during the request"""
+        self.client.get(ORGANIZATION_URL)
+
+        self.assertEqual(connection.execute_wrappers, [])
@@ -156,3 +156,104 @@ class ModelTests(TestCase):
             message=message)
 
         self.assertEqual(str(message), message.message)
+
+
+class UserRatingTests(TestCase):
+
+    def setUp(self):
+        self.user = sample_user()
+        self.user2 = sample_user(email='other@xemob.com')
+        self.user3 = sample_user(email='third@xemob.com')
+        organization = models.Organization.objects.create(
+            user=self.user, name='Sample Ngo', country='Spain')
+        project = models.Project.objects.create(
+            user=self.user, name='Test project', organization=organization)
+        self.cooperation = models.Cooperation.objects.create(
+            name='Cooperation', project=project, user=self.user,
+            voluntary=self.user2)
+
+    def review(self, rating, reviewed=None):
+        return models.Review.objects.create(
+            name='Review', cooperation=self.cooperation, user=self.user,
+            reviewed=reviewed or self.user2, review='Sample review',
+            rating=rating)
+
+    def user_rating(self, user):
+        return models.UserRating.objects.get(user=user)
+
+    def test_rating_aggregated_on_create(self):
+        """Test creating reviews updates the ratings of the reviewed user"""
+        self.review(4)
+        self.review(5)
+
+        user_rating = self.user_rating(self.user2)
+        self.assertEqual(user_rating.count, 2)
+        self.assertEqual(user_rating.total, 9)
+        self.assertEqual(user_rating.mean, 4.5)
+        self.assertEqual(user_rating.histogram,
+                         {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+
+    def test_review_without_rating_ignored(self):
+        """Test reviews without a rating don't count"""
+        self.review(None)
+
+        self.assertFalse(models.UserRating.objects.exists())
+
+    def test_rating_updated(self):
+        """Test changing the rating of a review updates the aggregate"""
+        review = self.review(2)
+        review.rating = 5
+        review.save()
+
+        user_rating = self.user_rating(self.user2)
+        self.assertEqual(user_rating.count, 1)
+        self.assertEqual(user_rating.mean, 5)
+        self.assertEqual(user_rating.rating_2, 0)
+        self.assertEqual(user_rating.rating_5, 1)
+
+    def test_reviewed_user_changed(self):
+        """Test moving a review to another user moves its rating"""
+        review = self.review(3)
+        review.reviewed = self.user3
+        review.save()
+
+        self.assertEqual(self.user_rating(self.user2).count, 0)
+        self.assertIsNone(self.user_rating(self.user2).mean)
+        self.assertEqual(self.user_rating(self.user3).mean, 3)
+
+    def test_rating_removed_on_delete(self):
+        """Test deleting a review removes its rating"""
+        self.review(1)
+        review = self.review(5)
+        review.delete()
+
+        user_rating = self.user_rating(self.user2)
+        self.assertEqual(user_rating.count, 1)
+        self.assertEqual(user_rating.mean, 1)
+
+    def test_rating_removed_on_cascade_delete(self):
+        """Test reviews deleted with their cooperation remove ratings"""
+        self.review(4)
+        self.cooperation.delete()
+
+        self.assertEqual(self.user_rating(self.user2).count, 0)
+
+    def test_reviewed_user_deleted(self):
+        """Test deleting a reviewed user deletes its ratings"""
+        self.review(4)
+        self.user2.delete()
+
+        self.assertFalse(models.UserRating.objects.exists())
+
+    def test_rebuild(self):
+        """Test ratings can be rebuilt from the reviews"""
+        self.review(4)
+        self.review(2)
+        self.review(5, reviewed=self.user3)
+        models.UserRating.objects.all().delete()
+
+        models.UserRating.objects.rebuild()
+
+        self.assertEqual(self.user_rating(self.user2).mean, 3)
+        self.assertEqual(self.user_rating(self.user2).rating_4, 1)
+        self.assertEqual(self.user_rating(self.user3).count, 1)
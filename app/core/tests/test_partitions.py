@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from core import partitions
+from core.models import Message
+
+
+postgresql = skipUnless(connection.vendor == 'postgresql',
+                        'Partitioning needs PostgreSQL')
+
+
+class MonthTests(TestCase):
+
+    def test_month_start(self):
+        """Test the start of the month is in UTC"""
+        value = datetime(2021, 3, 1, 0, 30,
+                         tzinfo=timezone(timedelta(hours=2)))
+
+        self.assertEqual(partitions.month_start(value),
+                         datetime(2021, 2, 1, tzinfo=timezone.utc))
+
+    def test_add_months(self):
+        """Test adding months across years"""
+        month = datetime(2021, 11, 1, tzinfo=timezone.utc)
+
+        self.assertEqual(partitions.add_months(month, 3),
+                         datetime(2022, 2, 1, tzinfo=timezone.utc))
+        self.assertEqual(partitions.add_months(month, -11),
+                         datetime(2020, 12, 1, tzinfo=timezone.utc))
+        self.assertEqual(partitions.partition_name(month),
+                         'core_message_p2021_11')
+
+    @skipUnless(connection.vendor != 'postgresql', 'Not partitioned')
+    def test_command_needs_partitioned_table(self):
+        """Test the command explains the table isn't partitioned"""
+        with self.assertRaises(CommandError):
+            call_command('partition_messages', stdout=StringIO())
+
+
+@postgresql
+class PartitionTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@xemob.com', 'password123')
+        self.now = datetime.now(timezone.utc)
+
+    def test_table_partitioned(self):
+        """Test the migrations partitioned the message table"""
+        self.assertTrue(partitions.is_partitioned())
+        names = [name for name, _ in partitions.partitions()]
+        self.assertIn('core_message_legacy', names)
+        self.assertIn(partitions.DEFAULT_PARTITION, names)
+
+    def test_create_partitions(self):
+        """Test future partitions are created, with their stray rows"""
+        future = partitions.add_months(partitions.month_start(self.now), 3)
+        message = Message.objects.create(user=self.user, recipient=self.user,
+                                         message='From the future')
+        Message.objects.filter(pk=message.pk).update(date=future)
+
+        created = partitions.create_partitions(months_ahead=3)
+
+        self.assertIn(partitions.partition_name(future), created)
+        self.assertEqual(partitions.create_partitions(months_ahead=3), [])
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM core_message '
+                           'WHERE id = %s', [message.pk])
+            self.assertEqual(cursor.fetchone()[0],
+                             partitions.partition_name(future))
+
+    def test_queries_pruned(self):
+        """Test queries on recent messages skip the older partitions"""
+        partitions.create_partitions(months_ahead=2)
+        since = partitions.add_months(partitions.month_start(self.now), 1)
+
+        plan = Message.objects.filter(
+            recipient=self.user, date__gte=since).explain()
+
+        self.assertNotIn('core_message_legacy', plan)
+        self.assertIn(partitions.partition_name(since), plan)
+
+    def test_detach_partitions(self):
+        """Test partitions older than the retention are detached"""
+        later = partitions.add_months(self.now, 24)
+
+        detached = partitions.detach_partitions(12, drop=True, now=later)
+
+        self.assertIn('core_message_legacy', detached)
+        self.assertNotIn('core_message_legacy',
+                         [name for name, _ in partitions.partitions()])
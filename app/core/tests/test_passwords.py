@@ -0,0 +1,106 @@
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import Argon2PasswordHasher, \
+    make_password
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import benchmark, passwords, throttling
+
+
+TOKEN_URL = reverse('user:token')
+
+
+class PasswordTests(TestCase):
+
+    def setUp(self):
+        throttling.local_buckets.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@xemob.com', 'testpass')
+
+    def test_passwords_hashed_with_argon2(self):
+        """Test new passwords are hashed with argon2 and its costs"""
+        self.assertTrue(self.user.password.startswith('argon2$argon2id$'))
+        self.assertIn('m=19456,t=2,p=1', self.user.password)
+
+    def test_old_hash_upgraded_on_login(self):
+        """Test logging in upgrades the hash of the password"""
+        self.user.password = make_password('testpass', hasher='pbkdf2_sha256')
+        self.user.save()
+
+        res = self.client.post(TOKEN_URL, {'email': 'test@xemob.com',
+                                           'password': 'testpass'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('argon2$'))
+        self.assertTrue(self.user.check_password('testpass'))
+
+    def test_wrong_password(self):
+        """Test wrong passwords and unknown emails are turned down"""
+        for email, password in (('test@xemob.com', 'wrong'),
+                                ('unknown@xemob.com', 'testpass')):
+            res = self.client.post(TOKEN_URL, {'email': email,
+                                               'password': password})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_busy_pool_rejects_logins(self):
+        """Test logins are rejected when the verification queue is full"""
+        pool = passwords.VerificationPool(workers=1, queue=0)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        pool.executor.submit(release.wait)
+        pool.slots.acquire()
+
+        with patch('core.passwords._pool', pool):
+            res = self.client.post(TOKEN_URL, {'email': 'test@xemob.com',
+                                               'password': 'testpass'})
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res['Retry-After'], '1')
+
+    def test_busy_pool_turns_down_admin_login(self):
+        """Test the admin login form reports a busy pool as a failed
+        login"""
+        pool = passwords.VerificationPool(workers=1, queue=0)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        pool.executor.submit(release.wait)
+        pool.slots.acquire()
+
+        with patch('core.passwords._pool', pool):
+            res = self.client.post(reverse('admin:login'), {
+                'username': 'test@xemob.com', 'password': 'testpass'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.wsgi_request.user.is_authenticated)
+
+    def test_login_benchmark(self):
+        """Test the login benchmark reports the logins per core"""
+        report = benchmark.run_login_benchmark(requests=2)
+
+        endpoint = report['endpoints'][0]
+        self.assertEqual(endpoint['errors'], 0)
+        self.assertEqual(endpoint['cores'], 1)
+        self.assertGreater(endpoint['logins_per_core'], 0)
+        self.assertEqual(report['meta']['hasher'], 'argon2')
+
+    def test_argon2i_hash_upgraded(self):
+        """Test the argon2i hashes of Django still verify and are upgraded"""
+        hasher = passwords.Argon2PasswordHasher()
+        encoded = Argon2PasswordHasher().encode('testpass', hasher.salt())
+        self.assertTrue(encoded.startswith('argon2$argon2i$'))
+
+        self.assertTrue(hasher.verify('testpass', encoded))
+        self.assertFalse(hasher.verify('wrong', encoded))
+        self.assertTrue(hasher.must_update(encoded))
+        self.assertFalse(hasher.must_update(
+            hasher.encode('testpass', hasher.salt())))
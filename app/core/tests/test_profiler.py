@@ -0,0 +1,172 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import RequestProfile
+from core.profiler import SamplingProfiler
+
+
+PROJECTS_URL = reverse('projects:project-list')
+PROFILES_URL = reverse('core:requestprofile-list')
+
+
+def folded_url(profile_id):
+    """Return the URL of the collapsed stacks of a profile"""
+    return reverse('core:requestprofile-folded', args=[profile_id])
+
+
+def busy(seconds):
+    """Keep the thread running Python code for a while"""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class SamplingProfilerTests(TestCase):
+
+    def test_samples_running_function(self):
+        """Test the profiler records the stacks of the running thread"""
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        busy(0.05)
+        profiler.stop()
+
+        self.assertGreater(profiler.samples, 0)
+        self.assertIn('core.tests.test_profiler:busy', profiler.folded())
+        top = profiler.top(5)
+        self.assertTrue(top[0]['function'].startswith(
+            'core.tests.test_profiler:busy'))
+        self.assertLessEqual(top[0]['own_percent'], 100)
+
+    def test_max_samples(self):
+        """Test sampling stops after the maximum number of samples"""
+        profiler = SamplingProfiler(interval=0.001, max_samples=3)
+        profiler.start()
+        busy(0.05)
+        profiler.stop()
+
+        self.assertEqual(profiler.samples, 3)
+
+    def test_folded_format(self):
+        """Test each line of the folded output is a stack and a count"""
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        busy(0.02)
+        profiler.stop()
+
+        for line in profiler.folded().splitlines():
+            stack, count = line.rsplit(' ', 1)
+            self.assertIn(';', stack)
+            self.assertGreater(int(count), 0)
+
+
+@override_settings(PROFILER_INTERVAL=0.0005)
+class ProfilerMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.staff = get_user_model().objects.create_superuser(
+            'admin@xemob.com', 'password123')
+        self.user = get_user_model().objects.create_user(
+            'test@xemob.com', 'password123')
+
+    def authenticate(self, user):
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_not_profiled_by_default(self):
+        """Test requests without the trigger are not profiled"""
+        self.authenticate(self.staff)
+        res = self.client.get(PROJECTS_URL)
+
+        self.assertNotIn('X-Profile-Id', res)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_staff_profile_with_header(self):
+        """Test staff users profile a request with the X-Profile header"""
+        self.authenticate(self.staff)
+        res = self.client.get(PROJECTS_URL, HTTP_X_PROFILE='1')
+
+        profile = RequestProfile.objects.get(pk=res['X-Profile-Id'])
+        self.assertEqual(profile.user, self.staff)
+        self.assertEqual(profile.route, 'projects:project-list')
+        self.assertEqual(profile.status_code, 200)
+
+    def test_staff_profile_with_query_parameter(self):
+        """Test staff users profile a request with a query parameter"""
+        self.client.force_login(self.staff)
+        res = self.client.get(PROJECTS_URL, {'profile': 1})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('X-Profile-Id', res)
+
+    def test_non_staff_not_profiled(self):
+        """Test users who aren't staff can't profile requests"""
+        self.authenticate(self.user)
+        res = self.client.get(PROJECTS_URL, HTTP_X_PROFILE='1')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('X-Profile-Id', res)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_anonymous_not_profiled(self):
+        """Test anonymous requests can't be profiled"""
+        res = self.client.get(PROJECTS_URL, HTTP_X_PROFILE='1')
+
+        self.assertNotIn('X-Profile-Id', res)
+
+    @override_settings(PROFILER_KEEP=2)
+    def test_old_profiles_deleted(self):
+        """Test only the most recent profiles are kept"""
+        self.authenticate(self.staff)
+        for _ in range(3):
+            self.client.get(PROJECTS_URL, HTTP_X_PROFILE='1')
+
+        self.assertEqual(RequestProfile.objects.count(), 2)
+
+
+class RequestProfileApiTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.staff = get_user_model().objects.create_superuser(
+            'admin@xemob.com', 'password123')
+        self.profile = RequestProfile.objects.create(
+            user=self.staff, method='GET', path='/api/projects/projects/',
+            route='projects:project-list', status_code=200, duration_ms=12,
+            interval_ms=2, samples=3, folded='a;b 2\na;c 1',
+            top=[{'function': 'b', 'own_samples': 2}])
+
+    def test_profiles_admin_only(self):
+        """Test users who aren't staff can't see profiles"""
+        user = get_user_model().objects.create_user(
+            'test@xemob.com', 'password123')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(PROFILES_URL)
+
+        self.assertEqual(res.status_code, 403)
+
+    def test_list_profiles(self):
+        """Test staff users can list profiles with their top functions"""
+        self.client.force_authenticate(self.staff)
+
+        res = self.client.get(PROFILES_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data[0]['top'], self.profile.top)
+
+    def test_folded_stacks(self):
+        """Test the folded stacks are returned as plain text"""
+        self.client.force_authenticate(self.staff)
+
+        res = self.client.get(folded_url(self.profile.id))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        self.assertEqual(res.content.decode(), 'a;b 2\na;c 1\n')
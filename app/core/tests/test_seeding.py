@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import models, seeding
+
+
+def dump(model, *fields):
+    """Return the values of the given fields for every row of a model"""
+    return list(model.objects.order_by('pk').values_list(*fields))
+
+
+class SeedingTests(TestCase):
+
+    def test_seed_creates_consistent_rows(self):
+        """Test the returned counts match the rows created"""
+        counts = seeding.seed(users=50)
+
+        self.assertEqual(counts['user'], 50)
+        for model in seeding.MODELS:
+            self.assertEqual(model.objects.count(),
+                             counts[model._meta.model_name])
+        self.assertTrue(all(counts.values()))
+
+    def test_seed_is_deterministic(self):
+        """Test the same seed generates the same rows"""
+        fields = ('id', 'name', 'project_id', 'voluntary_id', 'is_private')
+        seeding.seed(users=40, seed=7, chunk_size=15)
+        first = dump(models.Cooperation, *fields)
+        messages = dump(models.Message, 'user_id', 'recipient_id', 'message')
+        for model in reversed(seeding.MODELS):
+            model.objects.all().delete()
+
+        seeding.seed(users=40, seed=7, chunk_size=15)
+
+        self.assertEqual(dump(models.Cooperation, *fields), first)
+        self.assertEqual(
+            dump(models.Message, 'user_id', 'recipient_id', 'message'),
+            messages
+        )
+
+    def test_seed_different_seeds_differ(self):
+        """Test different seeds generate different rows"""
+        seeding.seed(users=20, seed=1)
+        first = dump(models.Message, 'recipient_id', 'message')
+        models.Message.objects.all().delete()
+        models.User.objects.all().delete()
+
+        seeding.seed(users=20, seed=2)
+
+        self.assertNotEqual(dump(models.Message, 'recipient_id', 'message'),
+                            first)
+
+    def test_seed_tunable_distributions(self):
+        """Test the ratios and means shape the generated rows"""
+        seeding.seed(users=60, organization_ratio=1, private_ratio=1,
+                     messages_per_user=0, cooperator_ratio=0)
+
+        self.assertEqual(models.Organization.objects.count(), 60)
+        self.assertFalse(models.Message.objects.exists())
+        self.assertFalse(models.CooperatorProfile.objects.exists())
+        self.assertFalse(
+            models.Cooperation.objects.filter(is_private=False).exists())
+
+    def test_seed_keeps_generated_dates(self):
+        """Test messages keep their generated dates instead of now"""
+        seeding.seed(users=20, history_days=365)
+
+        dates = set(models.Message.objects.values_list('date', flat=True))
+        self.assertGreater(len(dates), 1)
+
+    def test_seed_users_share_a_usable_password(self):
+        """Test generated users can log in with the given password"""
+        seeding.seed(users=5, password='secret123')
+
+        user = models.User.objects.first()
+        self.assertTrue(user.check_password('secret123'))
+
+    def test_seed_after_existing_rows(self):
+        """Test seeding again appends rows after the existing ones"""
+        seeding.seed(users=10)
+        seeding.seed(users=10, seed=3)
+
+        self.assertEqual(models.User.objects.count(), 20)
+
+    def test_seed_command(self):
+        """Test the seed management command reports the created rows"""
+        out = StringIO()
+        call_command('seed', users=10, messages_per_user=2, stdout=out)
+
+        self.assertEqual(models.User.objects.count(), 10)
+        self.assertIn('Seeded', out.getvalue())
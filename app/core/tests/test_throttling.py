@@ -0,0 +1,118 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import throttling
+from core.models import ThrottleBucket
+
+
+TOKEN_URL = reverse('user:token')
+MESSAGES_URL = reverse('projects:message-list')
+
+
+class TokenBucketTests(TestCase):
+
+    def test_parse_rate(self):
+        """Test rates give the capacity and the refill per second"""
+        self.assertEqual(throttling.parse_rate('120/min'), (120, 2))
+        self.assertEqual(throttling.parse_rate('10/s'), (10, 10))
+
+    def test_bucket_refills(self):
+        """Test a bucket allows bursts then refills at the rate"""
+        buckets = throttling.LocalBuckets()
+        with patch('core.throttling.time.monotonic', return_value=100):
+            waits = [buckets.take('key', 3, 0.5) for _ in range(4)]
+        self.assertEqual(waits, [0, 0, 0, 2])
+
+        with patch('core.throttling.time.monotonic', return_value=101):
+            self.assertEqual(buckets.take('key', 3, 0.5), 1)
+        with patch('core.throttling.time.monotonic', return_value=102):
+            self.assertEqual(buckets.take('key', 3, 0.5), 0)
+
+    def test_database_bucket_refills(self):
+        """Test a bucket shared in the database refills at the rate"""
+        buckets = throttling.DatabaseBuckets()
+        with patch('core.throttling.time.time', return_value=100):
+            waits = [buckets.take('key', 3, 0.5) for _ in range(4)]
+        self.assertEqual(waits, [0, 0, 0, 2])
+
+        with patch('core.throttling.time.time', return_value=101):
+            self.assertEqual(buckets.take('key', 3, 0.5), 1)
+        with patch('core.throttling.time.time', return_value=102):
+            self.assertEqual(buckets.take('key', 3, 0.5), 0)
+        with patch('core.throttling.time.time', return_value=1000):
+            self.assertEqual(buckets.take('key', 3, 0.5), 0)
+        self.assertEqual(ThrottleBucket.objects.get(key='key').tokens, 2)
+
+    def test_full_database_buckets_purged(self):
+        """Test buckets untouched for longer than every period go"""
+        buckets = throttling.DatabaseBuckets()
+        with patch('core.throttling.time.time', return_value=100):
+            buckets.take('old', 3, 0.5)
+        buckets.take('new', 3, 0.5)
+
+        self.assertEqual(buckets.purge(), 1)
+        self.assertEqual(list(ThrottleBucket.objects.values_list(
+            'key', flat=True)), ['new'])
+
+    def test_least_recent_buckets_forgotten(self):
+        """Test the memory of the buckets is bounded"""
+        buckets = throttling.LocalBuckets(max_keys=2)
+        for key in ('a', 'b', 'c'):
+            buckets.take(key, 1, 1)
+
+        self.assertEqual(list(buckets.buckets), ['b', 'c'])
+
+
+@override_settings(THROTTLE_RATES={'token': '2/min', 'messages': '1/min'})
+class ThrottleApiTests(TestCase):
+
+    def setUp(self):
+        throttling.local_buckets.clear()
+        cache.clear()
+        self.client = APIClient()
+        self.payload = {'email': 'test@xemob.com', 'password': 'wrong'}
+
+    def test_throttled_with_retry_after(self):
+        """Test requests over the rate get a 429 with Retry-After"""
+        for _ in range(2):
+            res = self.client.post(TOKEN_URL, self.payload)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '30')
+
+    def test_clients_throttled_apart(self):
+        """Test each user and IP address has its own buckets"""
+        for i in range(2):
+            user = get_user_model().objects.create_user(
+                f'user{i}@xemob.com', 'testpass')
+            self.client.force_authenticate(user)
+            res = self.client.get(MESSAGES_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(MESSAGES_URL)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = self.client.post(TOKEN_URL, self.payload,
+                               REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(THROTTLE_BACKEND='database')
+    def test_shared_buckets(self):
+        """Test buckets can be shared through the database"""
+        for _ in range(2):
+            self.client.post(TOKEN_URL, self.payload)
+        throttling.local_buckets.clear()
+
+        res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
@@ -0,0 +1,144 @@
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import trust
+from core.models import Organization, Project, Cooperation, Review, \
+    TrustRun, TrustScore
+
+
+class TrustGraphTests(TestCase):
+
+    def test_build_graph(self):
+        """Test the matrix splits the trust of each reviewer by weight"""
+        sources = np.array([10, 10, 10, 20])
+        targets = np.array([20, 30, 30, 10])
+        weights = np.array([1, 0.5, 0.5, 0.4])
+
+        nodes, matrix, out_weight, in_weight = trust.build_graph(
+            sources, targets, weights, np.array([40]))
+
+        self.assertEqual(list(nodes), [10, 20, 30, 40])
+        self.assertEqual(list(out_weight), [2, 0.4, 0, 0])
+        self.assertEqual(list(in_weight), [0.4, 1, 1, 0])
+        np.testing.assert_allclose(matrix.toarray(), [
+            [0, 1, 0, 0],
+            [0.5, 0, 0, 0],
+            [0.5, 0, 0, 0],
+            [0, 0, 0, 0],
+        ])
+
+    def test_ring_without_trust_gets_none(self):
+        """Test accounts only reviewing each other get no trust"""
+        # 0 is trusted and reviews 1, while 2 and 3 review each other
+        sources = np.array([0, 1, 2, 3])
+        targets = np.array([1, 0, 3, 2])
+        nodes, matrix, _, _ = trust.build_graph(
+            sources, targets, np.ones(4), np.array([0]))
+        personalization = np.array([1.0, 0, 0, 0])
+
+        scores, _, residual = trust.pagerank(matrix, personalization)
+
+        self.assertAlmostEqual(scores.sum(), 1)
+        self.assertGreater(scores[1], 0.4)
+        self.assertEqual(scores[2], 0)
+        self.assertEqual(scores[3], 0)
+        self.assertLess(residual, trust.DEFAULTS['tolerance'])
+
+    def test_graph_change(self):
+        """Test the change is the share of edge weight that moved"""
+        nodes = np.array([1, 2])
+        previous = np.array([[1, 1, 2, 0], [2, 1, 0, 2]])
+
+        self.assertEqual(trust.graph_change(
+            nodes, np.array([2.0, 0]), np.array([0, 2.0]), previous), 0)
+        self.assertEqual(trust.graph_change(
+            nodes, np.array([3.0, 0]), np.array([0, 3.0]), previous), 0.2)
+        self.assertEqual(trust.graph_change(
+            np.array([5, 6]), np.array([2.0, 0]), np.array([0, 2.0]),
+            previous), 1)
+
+
+class ComputeTrustScoresTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.staff = User.objects.create_user(
+            'staff@xemob.com', 'password123', is_staff=True)
+        self.users = [User.objects.create_user(f'user{i}@xemob.com',
+                                               'password123')
+                      for i in range(6)]
+        organization = Organization.objects.create(
+            user=self.staff, name='NGO', country='Spain')
+        project = Project.objects.create(
+            user=self.staff, organization=organization, name='Project')
+        self.cooperation = Cooperation.objects.create(
+            user=self.staff, voluntary=self.users[0], project=project,
+            name='Cooperation')
+        chain = [self.staff] + self.users[:4]
+        for reviewer, reviewed in zip(chain, chain[1:]):
+            self.review(reviewer, reviewed, 5)
+        self.review(self.users[4], self.users[5], 5)
+        self.review(self.users[5], self.users[4], 5)
+
+    def review(self, user, reviewed, rating):
+        return Review.objects.create(
+            user=user, reviewed=reviewed, cooperation=self.cooperation,
+            name='Review', review='Good', rating=rating)
+
+    def scores(self):
+        return dict(TrustScore.objects.values_list('user_id', 'score'))
+
+    def test_scores_stored(self):
+        """Test every user of the graph gets a score, seeds the most"""
+        run = trust.compute_trust_scores()
+
+        scores = self.scores()
+        self.assertEqual(len(scores), 7)
+        self.assertEqual(max(scores, key=scores.get), self.staff.id)
+        self.assertAlmostEqual(sum(scores.values()), 7)
+        self.assertEqual((run.nodes, run.edges, run.seeds), (7, 6, 1))
+        self.assertFalse(run.incremental)
+
+    def test_small_change_is_incremental(self):
+        """Test a small change starts from the last scores"""
+        Review.objects.bulk_create([
+            Review(user=self.users[0], reviewed=self.users[1],
+                   cooperation=self.cooperation, name='Review',
+                   review='Good', rating=5)
+            for _ in range(100)
+        ])
+        first = trust.compute_trust_scores()
+        self.review(self.users[2], self.users[3], 1)
+
+        run = trust.compute_trust_scores()
+
+        self.assertTrue(run.incremental)
+        self.assertLess(run.change, trust.DEFAULTS['threshold'])
+        self.assertLess(run.iterations, first.iterations)
+        incremental = self.scores()
+        trust.compute_trust_scores(full=True)
+        for user_id, score in self.scores().items():
+            self.assertAlmostEqual(incremental[user_id], score, places=6)
+
+    def test_large_change_recomputes(self):
+        """Test a large change starts from scratch"""
+        trust.compute_trust_scores()
+        self.review(self.users[3], self.staff, 5)
+
+        run = trust.compute_trust_scores()
+
+        self.assertGreater(run.change, trust.DEFAULTS['threshold'])
+        self.assertFalse(run.incremental)
+
+    def test_command(self):
+        """Test the command computes the scores and records the run"""
+        out = StringIO()
+        call_command('compute_trust_scores', stdout=out)
+
+        self.assertEqual(TrustRun.objects.count(), 1)
+        self.assertEqual(TrustScore.objects.count(), 7)
+        self.assertIn('7 users, 6 edges, 1 seeds', out.getvalue())
@@ -0,0 +1,8 @@
+# A cache costing no query, standing in for memcached in the tests of what
+# is served from the cache. The shipped database cache costs queries, which
+# every other test counts
+MEMORY_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
@@ -0,0 +1,171 @@
+"""Token bucket throttles.
+
+Each client, the user when authenticated and the IP address otherwise,
+has a bucket per scope holding up to the number of requests of its rate,
+refilled continuously at that rate. A request takes a token, and is
+throttled with a Retry-After header when the bucket is empty, so short
+bursts are allowed while the average stays under the rate.
+
+Buckets live in the memory of each process by default, which costs no
+round trip but lets a client make the rate once per process. With
+THROTTLE_BACKEND = 'database' they are rows of ThrottleBucket shared by
+every process, each taken from with a single conditional UPDATE.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Least
+from rest_framework.throttling import BaseThrottle
+
+from core.models import ThrottleBucket
+
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600,
+           'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate):
+    """Return the capacity and the refill per second of a rate like
+    100/min"""
+    count, period = rate.split('/')
+    return int(count), int(count) / PERIODS[period]
+
+
+def refill(bucket, capacity, per_second, now):
+    """Return the tokens of a bucket at some time, bucket being the tokens
+    left and when, or None for a new bucket"""
+    if bucket is None:
+        return capacity
+    tokens, updated = bucket
+    return min(capacity, tokens + (now - updated) * per_second)
+
+
+class LocalBuckets:
+    """Buckets in the memory of the process, the least recently used
+    forgotten first"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, per_second):
+        """Take a token, returning the seconds to wait for one if none is
+        left"""
+        now = time.monotonic()
+        with self.lock:
+            tokens = refill(self.buckets.pop(key, None), capacity,
+                            per_second, now)
+            wait = 0 if tokens >= 1 else (1 - tokens) / per_second
+            self.buckets[key] = (tokens - 1 if not wait else tokens, now)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class DatabaseBuckets:
+    """Buckets in the database, shared by every process.
+
+    A token is taken with an UPDATE of the bucket row only matching when
+    a token is left, so concurrent requests never take the same token.
+    """
+
+    def take(self, key, capacity, per_second):
+        now = time.time()
+        tokens = Least(Value(float(capacity)), F('tokens') + (
+            Value(now) - F('updated')) * Value(per_second))
+        if ThrottleBucket.objects.filter(
+            key=key, tokens__gte=1 - (Value(now) - F('updated')) * Value(
+                per_second)
+        ).update(tokens=tokens - 1, updated=now):
+            return 0
+        try:
+            with transaction.atomic():
+                ThrottleBucket.objects.create(key=key, tokens=capacity - 1,
+                                              updated=now)
+            return 0
+        except IntegrityError:
+            pass
+        bucket = ThrottleBucket.objects.filter(key=key).first()
+        if bucket is not None:
+            tokens = refill((bucket.tokens, bucket.updated), capacity,
+                            per_second, now)
+            if tokens < 1:
+                return (1 - tokens) / per_second
+        # Refilled or purged in the meantime
+        return self.take(key, capacity, per_second)
+
+    def clear(self):
+        ThrottleBucket.objects.all().delete()
+
+    def purge(self):
+        """Delete the buckets full again, untouched for longer than the
+        longest period of the rates"""
+        longest = max(PERIODS[rate.split('/')[1]]
+                      for rate in settings.THROTTLE_RATES.values())
+        return ThrottleBucket.objects.filter(
+            updated__lt=time.time() - longest).delete()[0]
+
+
+local_buckets = LocalBuckets()
+database_buckets = DatabaseBuckets()
+
+
+def buckets():
+    if settings.THROTTLE_BACKEND == 'database':
+        return database_buckets
+    return local_buckets
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle the requests of each client with a token bucket per
+    scope"""
+    scope = None
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def get_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{super().get_ident(request)}'
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = self.get_scope(request, view)
+        rate = settings.THROTTLE_RATES.get(scope) if scope else None
+        if rate is None:
+            return True
+        self.wait_seconds = buckets().take(
+            f'{scope}:{self.get_ident(request)}', *parse_rate(rate))
+        return not self.wait_seconds
+
+    def wait(self):
+        return math.ceil(self.wait_seconds) if self.wait_seconds else None
+
+
+class ClientThrottle(TokenBucketThrottle):
+    """Throttle every request, by user or by IP address for anonymous
+    clients"""
+
+    def get_scope(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return 'user'
+        return 'anon'
+
+
+class ScopedThrottle(TokenBucketThrottle):
+    """Throttle the requests to the views with a throttle_scope at the
+    rate of that scope"""
+
+    def get_scope(self, request, view):
+        return getattr(view, 'throttle_scope', None)
@@ -0,0 +1,201 @@
+from itertools import islice
+from time import perf_counter
+
+import numpy as np
+from scipy import sparse
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+
+from core import caching, models
+from core.seeding import insert_rows
+
+
+DEFAULTS = {
+    'damping': 0.85,
+    'tolerance': 1e-9,
+    'max_iterations': 200,
+    # Below this share of changed edge weight, start from the last scores
+    'threshold': 0.05,
+    'batch_size': 100000,
+}
+
+# Weight of the edge of a review without rating, as a 3 out of 5
+UNRATED_WEIGHT = 3
+
+
+def fetch_array(queryset, fields, batch_size=DEFAULTS['batch_size']):
+    """Return the values of some fields of a queryset as a float array.
+
+    Rows are streamed and converted in batches so millions of them never
+    live as Python tuples at the same time. Missing values become NaN.
+    """
+    rows = queryset.values_list(*fields).iterator(chunk_size=batch_size)
+    batches = []
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        batches.append(np.array(batch, dtype=float))
+    if not batches:
+        return np.empty((0, len(fields)))
+    return np.concatenate(batches)
+
+
+def load_edges(batch_size=DEFAULTS['batch_size']):
+    """Return the reviewers, reviewed users and weights of every review"""
+    reviews = models.Review.objects.filter(
+        user__isnull=False, reviewed__isnull=False
+    ).exclude(user=F('reviewed')).order_by()
+    edges = fetch_array(reviews, ('user_id', 'reviewed_id', 'rating'),
+                        batch_size)
+    ratings = np.where(np.isnan(edges[:, 2]), UNRATED_WEIGHT, edges[:, 2])
+    return (edges[:, 0].astype(np.int64), edges[:, 1].astype(np.int64),
+            ratings / 5)
+
+
+def load_seeds():
+    """Return the ids of the users trusted beforehand: active staff"""
+    return np.array(
+        get_user_model().objects.filter(is_staff=True, is_active=True)
+        .values_list('id', flat=True),
+        dtype=np.int64
+    )
+
+
+def build_graph(sources, targets, weights, seeds):
+    """Return the users, the transition matrix and the weights of a graph.
+
+    Users are mapped to the rows of the matrix in increasing id order.
+    Column j of the matrix holds the share of the trust of user j given to
+    each user they reviewed, duplicated edges being summed up.
+    """
+    nodes, index = np.unique(np.concatenate([sources, targets, seeds]),
+                             return_inverse=True)
+    size = len(nodes)
+    source_index = index[:len(sources)]
+    target_index = index[len(sources):len(sources) + len(targets)]
+
+    out_weight = np.bincount(source_index, weights, minlength=size)
+    in_weight = np.bincount(target_index, weights, minlength=size)
+    matrix = sparse.csr_matrix((weights, (target_index, source_index)),
+                               shape=(size, size))
+    matrix.sum_duplicates()
+    inverse = np.divide(1, out_weight, out=np.zeros(size),
+                        where=out_weight > 0)
+    matrix.data *= inverse[matrix.indices]
+    return nodes, matrix, out_weight, in_weight
+
+
+def pagerank(matrix, personalization, damping=DEFAULTS['damping'],
+             tolerance=DEFAULTS['tolerance'],
+             max_iterations=DEFAULTS['max_iterations'], start=None):
+    """Return the personalized PageRank of every node of a graph.
+
+    Random walks restart at the personalization distribution and the trust
+    of users who reviewed nobody goes back to it as well, so a ring of
+    accounts reviewing each other only gets the trust flowing into it.
+    Iterations stop when the L1 change drops below the tolerance.
+    """
+    dangling = np.asarray(matrix.sum(axis=0)).ravel() == 0
+    scores = personalization if start is None else start
+    residual = 0
+    for iteration in range(1, max_iterations + 1):
+        previous = scores
+        restart = (1 - damping) + damping * previous[dangling].sum()
+        scores = damping * matrix.dot(previous) + restart * personalization
+        scores /= scores.sum()
+        residual = np.abs(scores - previous).sum()
+        if residual < tolerance:
+            break
+    return scores, iteration, residual
+
+
+def graph_change(nodes, out_weight, in_weight, previous):
+    """Return the share of edge weight that changed since the last run.
+
+    The weights given and received by each user are compared with the
+    ones stored with their scores, 0 meaning the same graph and 1 a graph
+    sharing nothing with the previous one.
+    """
+    ids, _, old_out, old_in = previous.T
+    position = np.clip(np.searchsorted(ids, nodes), 0, len(ids) - 1)
+    known = ids[position] == nodes
+    removed = ~np.isin(ids, nodes)
+    changed = (
+        np.abs(out_weight - np.where(known, old_out[position], 0)).sum() +
+        np.abs(in_weight - np.where(known, old_in[position], 0)).sum() +
+        old_out[removed].sum() + old_in[removed].sum()
+    )
+    total = (out_weight.sum() + in_weight.sum() + old_out.sum() +
+             old_in.sum())
+    return changed / total if total else 0.0
+
+
+def save_scores(nodes, scores, out_weight, in_weight, batch_size=5000):
+    """Replace the stored trust scores"""
+    # Scores are scaled so the average user has a trust of 1
+    scaled = scores * len(nodes)
+    rows = [{'user_id': int(user_id), 'score': float(score),
+             'out_weight': float(out), 'in_weight': float(into)}
+            for user_id, score, out, into
+            in zip(nodes, scaled, out_weight, in_weight)]
+    with transaction.atomic():
+        models.TrustScore.objects.all().delete()
+        insert_rows(models.TrustScore, rows, batch_size)
+    caching.invalidate('ratings')
+
+
+def compute_trust_scores(full=False, **options):
+    """Compute the trust score of every user of the review network.
+
+    Staff users are the trusted seeds of the personalized PageRank, or
+    every user when there are none. When the graph changed less than the
+    threshold since the last run, iterations start from the last scores
+    and converge in a few steps; otherwise they start from scratch.
+    """
+    spec = dict(DEFAULTS, **options)
+    start_time = perf_counter()
+    sources, targets, weights = load_edges(spec['batch_size'])
+    seeds = load_seeds()
+    nodes, matrix, out_weight, in_weight = build_graph(
+        sources, targets, weights, seeds)
+
+    personalization = np.zeros(len(nodes))
+    if len(seeds):
+        personalization[np.searchsorted(nodes, seeds)] = 1
+    else:
+        personalization[:] = 1
+    personalization /= max(personalization.sum(), 1)
+
+    previous = fetch_array(
+        models.TrustScore.objects.order_by('user_id'),
+        ('user_id', 'score', 'out_weight', 'in_weight'), spec['batch_size'])
+    change = 1.0
+    if len(previous):
+        change = graph_change(nodes, out_weight, in_weight, previous)
+
+    start = None
+    if not full and len(previous) and change < spec['threshold']:
+        ids, old_scores = previous[:, 0], previous[:, 1]
+        position = np.clip(np.searchsorted(ids, nodes), 0, len(ids) - 1)
+        start = np.where(ids[position] == nodes, old_scores[position], 0)
+        start = start / start.sum() if start.sum() else None
+
+    scores, iterations, residual = np.empty(0), 0, 0.0
+    if len(nodes):
+        scores, iterations, residual = pagerank(
+            matrix, personalization, spec['damping'], spec['tolerance'],
+            spec['max_iterations'], start)
+    save_scores(nodes, scores, out_weight, in_weight)
+
+    return models.TrustRun.objects.create(
+        nodes=len(nodes),
+        edges=matrix.nnz,
+        seeds=len(seeds),
+        change=round(float(change), 6),
+        incremental=start is not None,
+        iterations=iterations,
+        residual=float(residual),
+        duration_ms=round((perf_counter() - start_time) * 1000, 3),
+    )
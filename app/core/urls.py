@@ -0,0 +1,14 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+
+from core import views
+
+
+router = DefaultRouter()
+router.register('profiles', views.RequestProfileViewSet)
+
+app_name = 'core'
+
+urlpatterns = [
+    path('', include(router.urls))
+]
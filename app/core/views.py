@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from prometheus_client import CONTENT_TYPE_LATEST
+from rest_framework import viewsets
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import action
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import batch, metrics
+from core.authentication import BatchAuthentication, \
+    CachedTokenAuthentication
+from core.models import RequestProfile
+from core.serializers import BatchSerializer, RequestProfileSerializer
+
+
+def metrics_view(request):
+    """Expose the metrics of every worker in the Prometheus format"""
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+
+    return HttpResponse(metrics.export(), content_type=CONTENT_TYPE_LATEST)
+
+
+class RequestProfileViewSet(viewsets.ReadOnlyModelViewSet):
+    """List the request profiles, for staff users only"""
+    authentication_classes = (CachedTokenAuthentication,
+                              SessionAuthentication, BatchAuthentication)
+    permission_classes = (IsAdminUser,)
+    queryset = RequestProfile.objects.all().order_by('-id')
+    serializer_class = RequestProfileSerializer
+
+    @action(detail=True)
+    def folded(self, request, pk=None):
+        """Return the sampled stacks in the collapsed flamegraph format"""
+        profile = self.get_object()
+        return HttpResponse(profile.folded + '\n',
+                            content_type='text/plain; charset=utf-8')
+
+
+class BatchView(APIView):
+    """Run several API requests and return all their responses.
+
+    Each sub-request is checked by its own view, with the user of the
+    batch.
+    """
+    authentication_classes = (CachedTokenAuthentication,
+                              BatchAuthentication)
+    permission_classes = (AllowAny,)
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(batch.run_all(
+            request, serializer.validated_data['requests'],
+            serializer.validated_data['parallel']))
@@ -0,0 +1,116 @@
+from collections import Counter
+
+from django.db import connection
+from django.db.models import Count
+
+from core.models import CooperatorProfile, Project
+
+
+def _sorted(counts):
+    """Return the non empty values of a facet, the most frequent first"""
+    return [{'value': value, 'count': count}
+            for value, count in sorted(counts.items(),
+                                       key=lambda item: (-item[1], item[0]))
+            if value not in (None, '')]
+
+
+def split_skills(skills):
+    """Return the distinct skills of a comma separated list"""
+    return {skill.strip().lower() for skill in skills.split(',')} - {''}
+
+
+def project_facets(projects):
+    """Return the number of projects per country and per organization.
+
+    PostgreSQL computes every count with a single GROUPING SETS query,
+    other databases run one grouped query per facet.
+    """
+    countries, organizations, total = {}, {}, 0
+    if connection.vendor == 'postgresql':
+        sql, params = projects.values(
+            'organization__country_code', 'organization_id'
+        ).order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT country_code, organization_id, '
+                'GROUPING(country_code, organization_id), COUNT(*) '
+                f'FROM ({sql}) AS directory GROUP BY GROUPING SETS '
+                '((country_code), (organization_id), ())',
+                params
+            )
+            for country, organization, grouping, count in cursor.fetchall():
+                if grouping == 1:
+                    countries[country] = count
+                elif grouping == 2:
+                    organizations[organization] = count
+                else:
+                    total = count
+    else:
+        projects = projects.order_by()
+        countries = dict(projects.values_list(
+            'organization__country_code').annotate(Count('id')))
+        organizations = dict(projects.values_list(
+            'organization_id').annotate(Count('id')))
+        total = projects.count()
+
+    return {
+        'count': total,
+        'countries': _sorted(countries),
+        'organizations': _sorted(organizations),
+    }
+
+
+def cooperator_facets(cooperators):
+    """Return the number of cooperators per skill.
+
+    Skills are a comma separated list, split by the database with a single
+    GROUPING SETS query on PostgreSQL and in Python otherwise.
+    """
+    skills, total = Counter(), 0
+    if connection.vendor == 'postgresql':
+        sql, params = cooperators.values(
+            'user_id', 'skills').order_by().query.sql_with_params()
+        skill = 'lower(btrim(skill.value))'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT {skill}, GROUPING({skill}), '
+                'COUNT(DISTINCT directory.user_id) '
+                f'FROM ({sql}) AS directory LEFT JOIN LATERAL '
+                "regexp_split_to_table(directory.skills, ',') "
+                'AS skill(value) ON true '
+                f'GROUP BY GROUPING SETS (({skill}), ())',
+                params
+            )
+            for name, grouping, count in cursor.fetchall():
+                if grouping:
+                    total = count
+                else:
+                    skills[name] = count
+    else:
+        for value in cooperators.values_list('skills', flat=True).iterator():
+            skills.update(split_skills(value))
+            total += 1
+
+    return {'count': total, 'skills': _sorted(skills)}
+
+
+def directory_facets(country=None, organization=None, skill=None):
+    """Return the facet counts of the projects and cooperators matching
+    some filters"""
+    # The projects the project list serves
+    projects = Project.objects.filter(organization__deleted_at__isnull=True,
+                                      user__deleted_at__isnull=True)
+    if country:
+        projects = projects.filter(organization__country_code=country)
+    if organization:
+        projects = projects.filter(organization_id=organization)
+
+    cooperators = CooperatorProfile.objects.filter(
+        user__deleted_at__isnull=True)
+    if skill:
+        cooperators = cooperators.filter(skills__icontains=skill)
+
+    return {
+        'projects': project_facets(projects),
+        'cooperators': cooperator_facets(cooperators),
+    }
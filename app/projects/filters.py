@@ -0,0 +1,91 @@
+from datetime import datetime, time
+
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.translation import ugettext_lazy as _
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.serializers import ValidationError
+
+from core.countries import country_code
+
+
+def boolean(value):
+    """Parse a boolean query parameter"""
+    value = value.lower()
+    if value in ('true', '1', 'yes'):
+        return True
+    if value in ('false', '0', 'no'):
+        return False
+    raise ValueError(value)
+
+
+def timestamp(value):
+    """Parse a date or datetime query parameter, in UTC unless given"""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.utc)
+    return parsed
+
+
+def country(value):
+    """Parse a country query parameter, a name or code, into its code"""
+    code = country_code(value)
+    if code is None:
+        raise ValueError(value)
+    return code
+
+
+class WhitelistFilterBackend(BaseFilterBackend):
+    """Filter a list with the query parameters whitelisted by its view.
+
+    The filter_fields of a view map each allowed parameter to a lookup, or
+    to a (lookup, parser) pair when the value needs parsing. Every lookup
+    must be backed by an index, see projects/tests/test_filters.py.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        for param, lookup in getattr(view, 'filter_fields', {}).items():
+            value = request.query_params.get(param)
+            if value in (None, ''):
+                continue
+            lookup, parse = lookup if isinstance(lookup, tuple) \
+                else (lookup, str)
+            try:
+                queryset = queryset.filter(**{lookup: parse(value)})
+            except (TypeError, ValueError):
+                raise ValidationError({param: _('Invalid value')})
+        return queryset
+
+
+class WhitelistOrderingFilter(BaseFilterBackend):
+    """Order a list by the fields whitelisted by its view.
+
+    The ordering_fields of a view map the names clients use to the field
+    paths they sort by. Null values always come last and the default
+    ordering of the view breaks ties.
+    """
+    ordering_param = 'ordering'
+
+    def filter_queryset(self, request, queryset, view):
+        param = request.query_params.get(self.ordering_param)
+        if not param:
+            return queryset
+
+        fields = getattr(view, 'ordering_fields', {})
+        ordering = []
+        for term in param.split(','):
+            name = term.strip().lstrip('-')
+            if name not in fields:
+                raise ValidationError(
+                    {self.ordering_param: _('Invalid ordering')})
+            field = F(fields[name])
+            ordering.append(field.desc(nulls_last=True)
+                            if term.strip().startswith('-')
+                            else field.asc(nulls_last=True))
+        return queryset.order_by(*ordering, *queryset.query.order_by)
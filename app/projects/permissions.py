@@ -14,3 +14,10 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
 
         # Write permissions are only allowed to the owner of the snippet.
         return obj.user == request.user
+
+
+class IsOwner(permissions.BasePermission):
+    """Only allow the owner of an object to read or edit it"""
+
+    def has_object_permission(self, request, view, obj):
+        return obj.user_id == request.user.id
@@ -0,0 +1,55 @@
+"""Compact renderers for the clients reading long lists.
+
+MessagePack is a binary JSON, smaller and faster to parse. The columnar
+layout of JSON sends each field once with the list of its values,
+{"id": [1, 2], "name": ["a", "b"]}, instead of repeating the names of
+the fields in every row.
+"""
+from collections import OrderedDict
+
+import msgpack
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def columns(rows):
+    """Return a list of rows as the list of the values of each field"""
+    table = OrderedDict()
+    for row in rows:
+        for field in row:
+            table.setdefault(field, [])
+    for row in rows:
+        for field, values in table.items():
+            values.append(row.get(field))
+    return table
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Render MessagePack, the values JSON can't hold encoded as in JSON"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=JSONEncoder().default,
+                             use_bin_type=True)
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """Render lists, paginated or not, as JSON columns.
+
+    Anything else, like a detail or an error, is rendered as plain JSON.
+    """
+    media_type = 'application/vnd.columns+json'
+    format = 'columns'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, list):
+            data = columns(data)
+        elif isinstance(data, dict) and isinstance(data.get('results'),
+                                                   list):
+            data = OrderedDict(data, results=columns(data['results']))
+        return super().render(data, accepted_media_type, renderer_context)
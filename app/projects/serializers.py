@@ -1,30 +1,41 @@
 from rest_framework import serializers
 
+from core.instrumentation import TimedSerializerMixin
 from core.models import Organization, CooperatorProfile, Project, \
     PortfolioItem, Cooperation, Review, Message
 
 from .validators import ProjectValidator, CooperationValidator
 
 
-class OrganizationSerializer(serializers.ModelSerializer):
+class OrganizationSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
     """Serializser for organization objects"""
 
     class Meta:
         model = Organization
-        fields = ('id', 'name', 'description', 'website', 'address', 'country')
-        read_only_fields = ('id',)
+        fields = ('id', 'name', 'description', 'website', 'address',
+                  'country', 'country_code')
+        read_only_fields = ('id', 'country_code')
 
 
-class CooperatorProfileSerializer(serializers.ModelSerializer):
+class CooperatorProfileSerializer(TimedSerializerMixin,
+                                  serializers.ModelSerializer):
     """Serializer for Cooperator objects"""
+    rating_mean = serializers.FloatField(
+        source='user.rating.mean', read_only=True, allow_null=True)
+    rating_count = serializers.IntegerField(
+        source='user.rating.count', read_only=True, allow_null=True)
+    trust_score = serializers.FloatField(
+        source='user.trust.score', read_only=True, allow_null=True)
 
     class Meta:
         model = CooperatorProfile
-        fields = ('user', 'name', 'description', 'skills', 'website')
+        fields = ('user', 'name', 'description', 'skills', 'website',
+                  'rating_mean', 'rating_count', 'trust_score')
         read_only_fields = ('user',)
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Project objects"""
 
     class Meta:
@@ -37,7 +48,8 @@ class ProjectSerializer(serializers.ModelSerializer):
          }
 
 
-class PortfolioItemSerializer(serializers.ModelSerializer):
+class PortfolioItemSerializer(TimedSerializerMixin,
+                              serializers.ModelSerializer):
     """Serializer for Portfolio Items"""
 
     class Meta:
@@ -46,7 +58,7 @@ class PortfolioItemSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class CooperationSerializer(serializers.ModelSerializer):
+class CooperationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serialize a Cooperation"""
 
     class Meta:
@@ -59,20 +71,49 @@ class CooperationSerializer(serializers.ModelSerializer):
         }
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serialize a review"""
 
     class Meta:
         model = Review
         fields = ('id', 'name', 'cooperation', 'user', 'reviewed',
-                  'review')
+                  'review', 'rating')
         read_only_fields = ('id',)
 
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serialize a message"""
 
     class Meta:
         model = Message
         fields = ('id', 'user', 'recipient', 'message', 'date')
         read_only_fields = ('id',)
+
+
+class CooperatorFullSerializer(CooperatorProfileSerializer):
+    """Serialize a cooperator with its portfolio, the reviews it received
+    and its public cooperations as a volunteer"""
+    portfolio = PortfolioItemSerializer(
+        source='user.portfolio', many=True, read_only=True)
+    reviews = ReviewSerializer(
+        source='user.reviews', many=True, read_only=True)
+    cooperations = CooperationSerializer(
+        source='user.cooperations', many=True, read_only=True)
+
+    class Meta(CooperatorProfileSerializer.Meta):
+        fields = CooperatorProfileSerializer.Meta.fields + (
+            'portfolio', 'reviews', 'cooperations')
+
+
+class ProjectDashboardSerializer(serializers.ModelSerializer):
+    """Serialize a project with the counts of its cooperations and
+    reviews"""
+    active_cooperations = serializers.IntegerField(read_only=True)
+    finished_cooperations = serializers.IntegerField(read_only=True)
+    reviews = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Project
+        fields = ('id', 'name', 'active_cooperations',
+                  'finished_cooperations', 'reviews')
+        read_only_fields = fields
@@ -10,6 +10,12 @@ from core.models import Project, Cooperation, Organization
 from projects.serializers import CooperationSerializer
 
 COOPERATION_URL = reverse('projects:cooperation-list')
+MINE_URL = reverse('projects:cooperation-mine')
+
+
+def detail_url(cooperation_id):
+    """Return the URL of a cooperation"""
+    return reverse('projects:cooperation-detail', args=[cooperation_id])
 
 
 class PublicCooperationApiTests(TestCase):
@@ -150,3 +156,94 @@ class PrivateCooperationApiTests(TestCase):
         res = self.client.post(COOPERATION_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ParticipantCooperationApiTests(TestCase):
+    """Test private cooperations are visible to their participants"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = get_user_model().objects.create_user(
+            'owner@xemob.com', 'testpass')
+        self.volunteer = get_user_model().objects.create_user(
+            'volunteer@xemob.com', 'testpass')
+        self.stranger = get_user_model().objects.create_user(
+            'stranger@xemob.com', 'testpass')
+        org = Organization.objects.create(user=self.owner, name='NGO',
+                                          country='spain')
+        project = Project.objects.create(user=self.owner, organization=org,
+                                         name='Sample Project')
+        self.private = Cooperation.objects.create(
+            name='Private cooperation', project=project, user=self.owner,
+            voluntary=self.volunteer, is_private=True)
+        self.public = Cooperation.objects.create(
+            name='Public cooperation', project=project, user=self.owner,
+            voluntary=self.stranger)
+        self.other = Cooperation.objects.create(
+            name='Other private cooperation', project=project,
+            user=self.owner, voluntary=self.stranger, is_private=True)
+
+    def names(self, res):
+        return [cooperation['name'] for cooperation in res.data]
+
+    def test_participants_see_private_cooperations(self):
+        """Test the owner and the volunteer list their private cooperation"""
+        for user in (self.owner, self.volunteer):
+            self.client.force_authenticate(user)
+            res = self.client.get(COOPERATION_URL)
+
+            self.assertIn('Private cooperation', self.names(res))
+            self.assertIn('Public cooperation', self.names(res))
+
+    def test_others_dont_see_private_cooperations(self):
+        """Test private cooperations stay hidden from other users"""
+        self.client.force_authenticate(self.volunteer)
+        res = self.client.get(COOPERATION_URL)
+        self.assertNotIn('Other private cooperation', self.names(res))
+
+        res = self.client.get(detail_url(self.other.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_participant_retrieves_private_cooperation(self):
+        """Test a participant retrieves a private cooperation"""
+        self.client.force_authenticate(self.volunteer)
+        res = self.client.get(detail_url(self.private.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['name'], 'Private cooperation')
+
+    def test_mine(self):
+        """Test listing only the cooperations the user takes part in"""
+        self.client.force_authenticate(self.stranger)
+        res = self.client.get(MINE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.names(res), ['Other private cooperation',
+                                           'Public cooperation'])
+
+    def test_mine_paginated(self):
+        """Test the user's cooperations are paginated given a limit"""
+        self.client.force_authenticate(self.stranger)
+        res = self.client.get(MINE_URL, {'limit': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 2)
+        self.assertEqual([cooperation['name']
+                          for cooperation in res.data['results']],
+                         ['Other private cooperation'])
+        self.assertIsNotNone(res.data['next'])
+
+    def test_mine_login_required(self):
+        """Test login is required to list the user's cooperations"""
+        res = self.client.get(MINE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_public_cooperations_not_in_union(self):
+        """Test only the cooperations of the user are read in a UNION,
+        not every public cooperation"""
+        sql = str(Cooperation.objects.visible_to(self.volunteer).query)
+        union = sql[sql.index('IN ('):]
+
+        self.assertIn('UNION', union)
+        self.assertNotIn('is_private', union)
@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import archive
+from core.models import Cooperation, CooperatorProfile, Organization, \
+    PortfolioItem, Project, Review
+from core.tests.utils import MEMORY_CACHES
+
+
+def full_url(user_id):
+    return reverse('projects:cooperatorprofile-full', args=[user_id])
+
+
+@override_settings(CACHES=MEMORY_CACHES)
+class CooperatorFullApiTests(TestCase):
+    """Test the full profile of a cooperator"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.volunteer = get_user_model().objects.create_user(
+            'volunteer@xemob.com', 'testpass')
+        self.owner = get_user_model().objects.create_user(
+            'owner@xemob.com', 'testpass')
+        CooperatorProfile.objects.create(user=self.volunteer,
+                                         name='Volunteer')
+        organization = Organization.objects.create(
+            user=self.owner, name='NGO', country='Spain')
+        self.project = Project.objects.create(
+            user=self.owner, organization=organization, name='Project')
+
+    def add_activity(self, count):
+        for i in range(count):
+            PortfolioItem.objects.create(user=self.volunteer,
+                                         name=f'Item {i}')
+            cooperation = Cooperation.objects.create(
+                user=self.owner, voluntary=self.volunteer,
+                project=self.project, name=f'Cooperation {i}')
+            Review.objects.create(
+                user=self.owner, reviewed=self.volunteer,
+                cooperation=cooperation, name=f'Review {i}',
+                review='Good', rating=5)
+
+    def test_full_profile(self):
+        """Test the profile comes with its portfolio, reviews and public
+        cooperations"""
+        self.add_activity(2)
+        Cooperation.objects.create(
+            user=self.owner, voluntary=self.volunteer, project=self.project,
+            name='Private', is_private=True)
+        PortfolioItem.objects.create(user=self.owner, name='Other item')
+
+        res = self.client.get(full_url(self.volunteer.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        data = res.json()
+        self.assertEqual(data['name'], 'Volunteer')
+        self.assertEqual(data['rating_count'], 2)
+        self.assertEqual([item['name'] for item in data['portfolio']],
+                         ['Item 1', 'Item 0'])
+        self.assertEqual([review['name'] for review in data['reviews']],
+                         ['Review 1', 'Review 0'])
+        self.assertEqual([coop['name'] for coop in data['cooperations']],
+                         ['Cooperation 1', 'Cooperation 0'])
+
+    def test_constant_queries(self):
+        """Test the full profile takes the same queries at any size"""
+        counts = []
+        for size in (1, 10):
+            self.add_activity(size)
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.get(full_url(self.volunteer.id))
+            self.assertEqual(res['X-Cache'], 'miss')
+            counts.append(len(queries))
+
+        self.assertEqual(counts, [4, 4])
+
+    def test_cached_until_activity_changes(self):
+        """Test the full profile is cached until its rows change"""
+        self.add_activity(1)
+        self.client.get(full_url(self.volunteer.id))
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(full_url(self.volunteer.id))
+        self.assertEqual(res['X-Cache'], 'hit')
+        self.assertEqual(len(queries), 0)
+
+        PortfolioItem.objects.create(user=self.volunteer, name='New item')
+        res = self.client.get(full_url(self.volunteer.id))
+        self.assertEqual(len(res.json()['portfolio']), 2)
+
+        archive.archive_cooperations(
+            list(Cooperation.objects.values_list('pk', flat=True)))
+        res = self.client.get(full_url(self.volunteer.id))
+        self.assertEqual(res.json()['cooperations'], [])
+        self.assertEqual(res.json()['reviews'], [])
+
+    def test_unknown_cooperator(self):
+        """Test the full profile of an unknown cooperator is not found"""
+        res = self.client.get(full_url(self.owner.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,11 +1,14 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import CooperatorProfile
+from core.models import CooperatorProfile, UserRating
+from core.tests.utils import MEMORY_CACHES
 
 from projects.serializers import CooperatorProfileSerializer
 
@@ -152,3 +155,63 @@ class PrivateCooperatorApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
         self.assertNotEqual(cooperator.name, payload['name'])
         self.assertNotEqual(cooperator.name, payload['description'])
+
+
+class CooperatorRatingApiTests(TestCase):
+    """Test sorting and filtering cooperators by their ratings"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.profiles = {}
+        for name, count, total in (('Ana', 2, 10), ('Bea', 4, 12),
+                                   ('Carla', 0, 0)):
+            user = get_user_model().objects.create_user(
+                f'{name}@xemob.com', 'testpass')
+            self.profiles[name] = CooperatorProfile.objects.create(
+                user=user, name=name, description='Cooperator')
+            if count:
+                UserRating.objects.create(user=user, count=count,
+                                          total=total, mean=total / count)
+
+    def names(self, res):
+        return [profile['name'] for profile in res.data]
+
+    def test_ratings_listed(self):
+        """Test cooperators are listed with their ratings"""
+        res = self.client.get(COOPERATOR_PROFILE_URL)
+
+        ratings = {profile['name']: (profile['rating_mean'],
+                                     profile['rating_count'])
+                   for profile in res.data}
+        self.assertEqual(ratings, {'Ana': (5, 2), 'Bea': (3, 4),
+                                   'Carla': (None, None)})
+
+    def test_order_by_rating(self):
+        """Test sorting cooperators by rating, unrated ones last"""
+        res = self.client.get(COOPERATOR_PROFILE_URL, {'ordering': '-rating'})
+        self.assertEqual(self.names(res), ['Ana', 'Bea', 'Carla'])
+
+        res = self.client.get(COOPERATOR_PROFILE_URL, {'ordering': 'rating'})
+        self.assertEqual(self.names(res), ['Bea', 'Ana', 'Carla'])
+
+    def test_filter_by_rating(self):
+        """Test filtering cooperators by minimum rating and reviews"""
+        res = self.client.get(COOPERATOR_PROFILE_URL, {'min_rating': 4})
+        self.assertEqual(self.names(res), ['Ana'])
+
+        res = self.client.get(COOPERATOR_PROFILE_URL, {'min_reviews': 3})
+        self.assertEqual(self.names(res), ['Bea'])
+
+    def test_invalid_rating_filter(self):
+        """Test an invalid rating filter is rejected"""
+        res = self.client.get(COOPERATOR_PROFILE_URL, {'min_rating': 'top'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(CACHES=MEMORY_CACHES)
+    def test_list_query_count(self):
+        """Test ratings are fetched with the cooperators"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(COOPERATOR_PROFILE_URL)
+
+        self.assertEqual(len(queries), 1)
@@ -0,0 +1,131 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import CacheHandler, cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import deletion
+from core.models import Organization, Project, CooperatorProfile
+from core.tests.utils import MEMORY_CACHES
+
+
+FACETS_URL = reverse('projects:facets')
+
+
+class FacetsApiTests(TestCase):
+    """Test the facet counts of the directory"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@xemob.com', 'testpass')
+        self.spain = Organization.objects.create(
+            user=self.user, name='Spanish NGO', country='Spain')
+        self.france = Organization.objects.create(
+            user=self.user, name='French NGO', country='France')
+        for organization, count in ((self.spain, 2), (self.france, 1)):
+            for i in range(count):
+                Project.objects.create(user=self.user,
+                                       organization=organization,
+                                       name=f'Project {i}')
+        for i, skills in enumerate(('Python, Django', 'python', '')):
+            user = get_user_model().objects.create_user(
+                f'cooperator{i}@xemob.com', 'testpass')
+            CooperatorProfile.objects.create(
+                user=user, name=f'Cooperator {i}', description='Cooperator',
+                skills=skills)
+
+    def test_facets(self):
+        """Test the projects and cooperators are counted by facet"""
+        res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['projects'], {
+            'count': 3,
+            'countries': [{'value': 'ES', 'count': 2},
+                          {'value': 'FR', 'count': 1}],
+            'organizations': [{'value': self.spain.id, 'count': 2},
+                              {'value': self.france.id, 'count': 1}],
+        })
+        self.assertEqual(res.data['cooperators'], {
+            'count': 3,
+            'skills': [{'value': 'python', 'count': 2},
+                       {'value': 'django', 'count': 1}],
+        })
+
+    def test_filtered_facets(self):
+        """Test the counts only include the rows matching the filters"""
+        res = self.client.get(FACETS_URL, {'country': 'fr', 'skill': 'Django'})
+
+        self.assertEqual(res.data['projects']['count'], 1)
+        self.assertEqual(res.data['projects']['organizations'],
+                         [{'value': self.france.id, 'count': 1}])
+        self.assertEqual(res.data['cooperators']['count'], 1)
+
+    def test_invalid_filter(self):
+        """Test invalid filters are rejected"""
+        for params in ({'country': 'Wonderland'}, {'organization': 'x'}):
+            res = self.client.get(FACETS_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_projects_of_deleted_users_not_counted(self):
+        """Test the projects of a deleted user leave the counts, as they
+        leave the project list"""
+        other = get_user_model().objects.create_user(
+            'other@xemob.com', 'testpass')
+        Project.objects.create(user=other, organization=self.france,
+                               name='Project of the other user')
+        deletion.soft_delete_user(other)
+
+        res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res.data['projects']['count'], 3)
+
+    @override_settings(CACHES=MEMORY_CACHES)
+    def test_facets_cached(self):
+        """Test the counts of the same filters are cached"""
+        self.client.get(FACETS_URL, {'country': 'Spain'})
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(FACETS_URL, {'country': 'ES'})
+
+        self.assertEqual(len(queries), 0)
+
+        self.assertEqual(res.data['projects']['count'], 2)
+
+    def test_cache_invalidated(self):
+        """Test changes to the directory invalidate the cached counts"""
+        self.client.get(FACETS_URL)
+
+        Project.objects.create(user=self.user, organization=self.france,
+                               name='New project')
+        res = self.client.get(FACETS_URL)
+        self.assertEqual(res.data['projects']['count'], 4)
+
+        self.france.delete()
+        res = self.client.get(FACETS_URL)
+        self.assertEqual(res.data['projects']['count'], 2)
+
+        CooperatorProfile.objects.filter(skills='').get().delete()
+        res = self.client.get(FACETS_URL)
+        self.assertEqual(res.data['cooperators']['count'], 2)
+
+    def test_cache_invalidated_by_another_process(self):
+        """Test changes saved by another process invalidate the cached
+        counts"""
+        self.client.get(FACETS_URL)
+
+        with patch('core.caching.cache', CacheHandler()['default']):
+            Project.objects.create(user=self.user, organization=self.france,
+                                   name='New project')
+        res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res.data['projects']['count'], 4)
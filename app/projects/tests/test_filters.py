@@ -0,0 +1,175 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory, \
+    force_authenticate
+
+from core import seeding
+from core.models import Organization, Project, Cooperation
+
+from projects.urls import router
+
+
+ORGANIZATION_URL = reverse('projects:organization-list')
+COOPERATION_URL = reverse('projects:cooperation-list')
+
+# A value to filter seeded data by for every whitelisted query parameter
+SAMPLES = {
+    'user': 1,
+    'voluntary': 1,
+    'recipient': 1,
+    'reviewed': 1,
+    'organization': 1,
+    'project': 1,
+    'cooperation': 1,
+    'country': 'Spain',
+    'active': 'true',
+    'min_rating': '4.5',
+    'min_reviews': '3',
+    'since': '2020-01-01',
+    'until': '2020-02-01T12:00:00Z',
+}
+
+
+def filtered_querysets():
+    """Yield the list of each route filtered by each whitelisted query
+    parameter, as its viewset builds it for a sample user"""
+    factory = APIRequestFactory()
+    user = get_user_model().objects.get(pk=SAMPLES['user'])
+    for prefix, viewset, basename in router.registry:
+        for param in viewset.filter_fields:
+            request = factory.get(f'/{prefix}/', {param: SAMPLES[param]})
+            force_authenticate(request, user)
+            view = viewset(action_map={'get': 'list'}, args=(), kwargs={},
+                           format_kwarg=None)
+            view.request = view.initialize_request(request)
+            yield basename, param, view.filter_queryset(view.get_queryset())
+
+
+def partial_indexes():
+    """Return the names of the indexes with a condition"""
+    return {index.name for model in apps.get_models()
+            for index in model._meta.indexes if index.condition is not None}
+
+
+def sequential_scans(queryset):
+    """Return the tables a queryset reads without using an index"""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+        return re.findall(r'Seq Scan on (\w+)', plan)
+    # SQLite SEARCHes an index for a range of rows and SCANs whole tables
+    # or indexes otherwise. A partial index only holds the rows of its
+    # condition, so scanning it reads no other row
+    return [table for table, index in re.findall(
+        r'SCAN (?:TABLE )?(\w+)(?: USING (?:COVERING )?INDEX (\w+))?',
+        queryset.explain()) if index not in partial_indexes()]
+
+
+class FilterIndexTests(TestCase):
+    """Test every whitelisted filter is served by an index"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Without statistics, planners pick any usable index over a scan,
+        # so the test doesn't depend on the size of the dataset
+        seeding.seed(users=50)
+
+    def test_every_filter_has_a_sample(self):
+        """Test the index check covers every whitelisted filter"""
+        for _, viewset, _ in router.registry:
+            for param in viewset.filter_fields:
+                self.assertIn(param, SAMPLES)
+
+    def test_filters_use_indexes(self):
+        """Test no whitelisted filter reads a table sequentially"""
+        for basename, param, queryset in filtered_querysets():
+            with self.subTest(route=basename, param=param):
+                self.assertEqual(
+                    sequential_scans(queryset), [],
+                    f'{basename}?{param}= scans without an index:\n'
+                    f'{queryset.explain()}'
+                )
+
+
+class FilterApiTests(TestCase):
+    """Test filtering and sorting lists with query parameters"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@xemob.com', 'testpass')
+        self.spain = Organization.objects.create(
+            user=self.user, name='Spanish NGO', country='Spain')
+        self.france = Organization.objects.create(
+            user=self.user, name='French NGO', country='France')
+        project = Project.objects.create(
+            user=self.user, organization=self.spain, name='Project')
+        Cooperation.objects.create(name='Active', project=project,
+                                   user=self.user)
+        Cooperation.objects.create(name='Finished', project=project,
+                                   user=self.user, end_date='2020-01-01')
+
+    def names(self, res):
+        return [item['name'] for item in res.data]
+
+    def test_filter(self):
+        """Test filtering a list by a whitelisted parameter"""
+        res = self.client.get(ORGANIZATION_URL, {'user': self.user.id})
+
+        self.assertEqual(len(res.data), 2)
+
+    def test_country_filter(self):
+        """Test filtering organizations by country name or code"""
+        for country in ('France', 'france', 'FR', 'FRA'):
+            res = self.client.get(ORGANIZATION_URL, {'country': country})
+
+            self.assertEqual(self.names(res), ['French NGO'])
+
+    def test_unknown_country_filter(self):
+        """Test filtering by an unknown country is rejected"""
+        res = self.client.get(ORGANIZATION_URL, {'country': 'Wonderland'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_boolean_filter(self):
+        """Test filtering active cooperations"""
+        res = self.client.get(COOPERATION_URL, {'active': 'true'})
+        self.assertEqual(self.names(res), ['Active'])
+
+        res = self.client.get(COOPERATION_URL, {'active': 'false'})
+        self.assertEqual(self.names(res), ['Finished'])
+
+    def test_invalid_filter_value(self):
+        """Test an invalid filter value is rejected"""
+        for params in ({'active': 'maybe'}, {'user': 'me'}):
+            res = self.client.get(COOPERATION_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_parameter_ignored(self):
+        """Test parameters that aren't whitelisted don't filter"""
+        res = self.client.get(ORGANIZATION_URL, {'name': 'French NGO'})
+
+        self.assertEqual(len(res.data), 2)
+
+    def test_ordering(self):
+        """Test sorting a list by a whitelisted field"""
+        res = self.client.get(ORGANIZATION_URL, {'ordering': 'name'})
+        self.assertEqual(self.names(res), ['French NGO', 'Spanish NGO'])
+
+        res = self.client.get(ORGANIZATION_URL, {'ordering': '-name'})
+        self.assertEqual(self.names(res), ['Spanish NGO', 'French NGO'])
+
+    def test_invalid_ordering(self):
+        """Test sorting by a field that isn't whitelisted is rejected"""
+        res = self.client.get(ORGANIZATION_URL, {'ordering': 'country'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
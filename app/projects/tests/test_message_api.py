@@ -1,6 +1,9 @@
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils import timezone
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -13,6 +16,11 @@ from projects.serializers import MessageSerializer
 MESSAGES_URL = reverse('projects:message-list')
 
 
+def detail_url(message_id):
+    """Return the URL of a message"""
+    return reverse('projects:message-detail', args=[message_id])
+
+
 class PublicMessagesApiTests(TestCase):
     """Test the publicly available messages API"""
 
@@ -103,3 +111,55 @@ class PrivateMessagesApiTests(TestCase):
         res = self.client.post(MESSAGES_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(MESSAGE_INBOX_DAYS=30)
+    def test_old_messages_not_listed_by_default(self):
+        """Test only the recent messages are listed without a start date"""
+        old = Message.objects.create(user=self.user2, recipient=self.user,
+                                     message='Old message')
+        Message.objects.filter(pk=old.pk).update(
+            date=timezone.now() - timedelta(days=40))
+        Message.objects.create(user=self.user2, recipient=self.user,
+                               message='New message')
+
+        res = self.client.get(MESSAGES_URL)
+        self.assertEqual([message['message'] for message in res.data],
+                         ['New message'])
+
+        res = self.client.get(MESSAGES_URL, {'since': '2000-01-01'})
+        self.assertEqual(len(res.data), 2)
+
+        res = self.client.get(detail_url(old.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_every_message_listed_without_window(self):
+        """Test old messages are listed when no window is set"""
+        old = Message.objects.create(user=self.user2, recipient=self.user,
+                                     message='Old message')
+        Message.objects.filter(pk=old.pk).update(
+            date=timezone.now() - timedelta(days=4000))
+
+        res = self.client.get(MESSAGES_URL)
+
+        self.assertEqual([message['message'] for message in res.data],
+                         ['Old message'])
+
+    def test_filter_messages_by_date(self):
+        """Test listing the messages of a period"""
+        for days, message in ((10, 'First'), (5, 'Second'), (1, 'Third')):
+            created = Message.objects.create(
+                user=self.user2, recipient=self.user, message=message)
+            Message.objects.filter(pk=created.pk).update(
+                date=timezone.now() - timedelta(days=days))
+        until = (timezone.now() - timedelta(days=2)).date().isoformat()
+
+        res = self.client.get(MESSAGES_URL, {'until': until})
+
+        self.assertEqual([message['message'] for message in res.data],
+                         ['Second', 'First'])
+
+    def test_invalid_date_filter(self):
+        """Test an invalid date is rejected"""
+        res = self.client.get(MESSAGES_URL, {'since': 'yesterday'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,11 +1,15 @@
+from datetime import date
+
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.urls import reverse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Organization
+from core.models import Cooperation, Organization, Project, Review
 
 from projects.serializers import OrganizationSerializer
 
@@ -18,6 +22,11 @@ def detail_url(organization_id):
     return reverse('projects:organization-detail', args=[organization_id])
 
 
+def dashboard_url(organization_id):
+    """Return the dashboard URL of an organization"""
+    return reverse('projects:organization-dashboard', args=[organization_id])
+
+
 class PublicOrganizationApiTests(TestCase):
     """Test the publicly available organization API"""
 
@@ -130,3 +139,92 @@ class PrivateOrganizationApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
         self.assertNotEqual(org.name, payload['name'])
         self.assertNotEqual(org.country, payload['country'])
+
+    def test_delete_organization(self):
+        """Test deleting an organization hides it until it is purged"""
+        org = Organization.objects.create(name='Test NGO', country='Spain',
+                                          user=self.user)
+
+        res = self.client.delete(detail_url(org.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertTrue(Organization.objects.deleted().filter(
+            pk=org.id).exists())
+        self.assertEqual(self.client.get(ORGANIZATION_URL).data, [])
+        res = self.client.get(detail_url(org.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class OrganizationDashboardApiTests(TestCase):
+    """Test the dashboard of the projects of an organization"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@xemob.com', 'password123')
+        self.volunteer = get_user_model().objects.create_user(
+            'volunteer@xemob.com', 'password123')
+        self.client.force_authenticate(self.user)
+        self.organization = Organization.objects.create(
+            user=self.user, name='NGO', country='Spain')
+
+    def add_project(self, name, active, finished, reviews):
+        """Add a project with cooperations and reviews of the last ones"""
+        project = Project.objects.create(
+            user=self.user, organization=self.organization, name=name)
+        cooperations = [
+            Cooperation.objects.create(
+                user=self.user, voluntary=self.volunteer, project=project,
+                name=f'{name} {i}', end_date=date(2020, 1, 1)
+                if i >= active else None)
+            for i in range(active + finished)
+        ]
+        for i in range(reviews):
+            Review.objects.create(
+                user=self.user, reviewed=self.volunteer,
+                cooperation=cooperations[-1], name=f'Review {i}',
+                review='Good')
+        return project
+
+    def test_dashboard_counts(self):
+        """Test the cooperations and reviews of each project are counted"""
+        self.add_project('First', active=2, finished=1, reviews=3)
+        self.add_project('Second', active=0, finished=0, reviews=0)
+        other = Organization.objects.create(
+            user=self.user, name='Other NGO', country='Spain')
+        Project.objects.create(user=self.user, organization=other,
+                               name='Other')
+
+        res = self.client.get(dashboard_url(self.organization.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['organization']['name'], 'NGO')
+        self.assertEqual(
+            [(row['name'], row['active_cooperations'],
+              row['finished_cooperations'], row['reviews'])
+             for row in res.data['projects']],
+            [('Second', 0, 0, 0), ('First', 2, 1, 3)]
+        )
+        self.assertEqual(res.data['totals'], {'active_cooperations': 2,
+                                              'finished_cooperations': 1,
+                                              'reviews': 3})
+
+    def test_dashboard_single_query(self):
+        """Test the counts take one query however many projects"""
+        for i in range(5):
+            self.add_project(f'Project {i}', active=2, finished=2, reviews=2)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(dashboard_url(self.organization.id))
+
+        self.assertEqual(len(queries), 2)
+
+    def test_dashboard_owner_only(self):
+        """Test only the owner of an organization sees its dashboard"""
+        self.client.force_authenticate(self.volunteer)
+        res = self.client.get(dashboard_url(self.organization.id))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(None)
+        res = self.client.get(dashboard_url(self.organization.id))
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,77 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Organization, Project
+
+
+PROJECTS_URL = reverse('projects:project-list')
+
+
+class PaginationApiTests(TestCase):
+    """Test the lists are paginated when a limit is given"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@xemob.com', 'testpass')
+        organization = Organization.objects.create(
+            user=self.user, name='NGO', country='Spain')
+        Project.objects.bulk_create([
+            Project(user=self.user, organization=organization,
+                    name=f'Project {i}')
+            for i in range(5)
+        ])
+
+    def test_unpaginated_without_limit(self):
+        """Test lists without a limit return every row"""
+        res = self.client.get(PROJECTS_URL)
+
+        self.assertEqual(len(res.data), 5)
+
+    def test_paginated(self):
+        """Test a limit paginates the list with an exact small count"""
+        res = self.client.get(PROJECTS_URL, {'limit': 2, 'offset': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 5)
+        self.assertFalse(res.data['count_is_estimate'])
+        self.assertEqual([project['name'] for project in res.data['results']],
+                         ['Project 2', 'Project 1'])
+        self.assertIn('offset=4', res.data['next'])
+        self.assertIsNotNone(res.data['previous'])
+
+    def test_last_page(self):
+        """Test the last page has no next page"""
+        res = self.client.get(PROJECTS_URL, {'limit': 2, 'offset': 4})
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertIsNone(res.data['next'])
+
+    def test_limit_capped(self):
+        """Test the page size can't exceed the maximum limit"""
+        res = self.client.get(PROJECTS_URL, {'limit': 100000})
+
+        self.assertEqual(res.data['count'], 5)
+        self.assertEqual(len(res.data['results']), 5)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Estimates need '
+                'PostgreSQL')
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=2)
+    def test_count_estimated(self):
+        """Test large results are counted with an estimate"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_project')
+
+        res = self.client.get(PROJECTS_URL, {'limit': 2})
+
+        self.assertTrue(res.data['count_is_estimate'])
+        self.assertIsNotNone(res.data['next'])
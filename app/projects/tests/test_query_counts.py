@@ -0,0 +1,195 @@
+import json
+import os
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import seeding
+from core.benchmark import route_actions
+from core.models import Organization, CooperatorProfile, Project, \
+    PortfolioItem, Cooperation, Review, Message
+
+from projects.urls import router
+
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__),
+                            'query_budgets.json')
+
+# Number of extra rows related to the authenticated user at each size
+SIZES = (2, 12)
+
+
+def load_budgets():
+    """Return the query budget of every route action"""
+    with open(BUDGETS_PATH) as budgets_file:
+        return json.load(budgets_file)
+
+
+class Fixtures:
+    """Rows owned by the authenticated user that every action works on"""
+
+    def __init__(self):
+        self.size = 0
+        self.user = get_user_model().objects.create_user(
+            'budget@xemob.com', 'password123', name='Budget user')
+        self.volunteer = get_user_model().objects.create_user(
+            'volunteer@xemob.com', 'password123', name='Volunteer')
+        self.organization = Organization.objects.create(
+            user=self.user, name='Budget NGO', country='Spain')
+        self.profile = CooperatorProfile.objects.create(
+            user=self.user, name='Budget user', description='Cooperator')
+        self.project = Project.objects.create(
+            user=self.user, organization=self.organization,
+            name='Budget project')
+        self.portfolio_item = PortfolioItem.objects.create(
+            user=self.user, name='Budget item')
+        self.cooperation = Cooperation.objects.create(
+            user=self.user, voluntary=self.volunteer, project=self.project,
+            name='Budget cooperation')
+        self.review = Review.objects.create(
+            user=self.user, reviewed=self.volunteer,
+            cooperation=self.cooperation, name='Budget review',
+            review='Great')
+        self.message = Message.objects.create(
+            user=self.user, recipient=self.volunteer, message='Hello')
+
+    def grow(self, count):
+        """Add rows related to the user so every list gets longer"""
+        for i in range(count):
+            org = Organization.objects.create(
+                user=self.user, name=f'Budget NGO {self.size + i}',
+                country='Spain')
+            project = Project.objects.create(
+                user=self.user, organization=org, name=f'Project {i}')
+            cooperation = Cooperation.objects.create(
+                user=self.user, voluntary=self.volunteer, project=project,
+                name=f'Cooperation {i}')
+            Review.objects.create(
+                user=self.user, reviewed=self.volunteer,
+                cooperation=cooperation, name=f'Review {i}', review='Good')
+            PortfolioItem.objects.create(user=self.user, name=f'Item {i}')
+            Message.objects.create(
+                user=self.volunteer, recipient=self.user,
+                message=f'Message {i}')
+        self.size += count
+
+    def detail(self, basename):
+        """Return the primary key of the user's object of a route"""
+        return {
+            'organization': self.organization,
+            'cooperatorprofile': self.profile,
+            'project': self.project,
+            'portfolioitem': self.portfolio_item,
+            'cooperation': self.cooperation,
+            'review': self.review,
+            'message': self.message,
+        }[basename].pk
+
+    def payload(self, basename):
+        """Return a valid payload to create or update an object"""
+        user = self.user.id
+        return {
+            'organization': {'user': user, 'name': 'New NGO',
+                             'country': 'Spain'},
+            'cooperatorprofile': {'user': user, 'name': 'New name',
+                                  'description': 'New description'},
+            'project': {'user': user, 'name': 'New project',
+                        'organization': self.organization.id},
+            'portfolioitem': {'user': user, 'name': 'New item'},
+            'cooperation': {'user': user, 'name': 'New cooperation',
+                            'project': self.project.id,
+                            'voluntary': self.volunteer.id},
+            'review': {'user': user, 'name': 'New review',
+                       'cooperation': self.cooperation.id,
+                       'reviewed': self.volunteer.id, 'review': 'Good'},
+            'message': {'user': user, 'recipient': self.volunteer.id,
+                        'message': 'Hello again'},
+        }[basename]
+
+    def prepare(self, basename, action):
+        """Make the database ready for an action before measuring it"""
+        if (basename, action) == ('cooperatorprofile', 'create'):
+            CooperatorProfile.objects.filter(pk=self.profile.pk).delete()
+
+
+class QueryCountTests(TestCase):
+    """Test the number of queries of every route does not regress"""
+
+    def setUp(self):
+        self.fixtures = Fixtures()
+        self.client = APIClient()
+        self.client.force_authenticate(self.fixtures.user)
+
+    def count_queries(self, basename, action, method, detail, url_name):
+        """Return the number of queries an action runs, rolled back"""
+        args = [self.fixtures.detail(basename)] if detail else []
+        url = reverse(url_name, args=args)
+        data = None
+        if method in ('post', 'put'):
+            data = self.fixtures.payload(basename)
+
+        # A fresh user per request, as authentication gives real requests,
+        # so no relation cached by an earlier request hides a query
+        self.client.force_authenticate(
+            get_user_model().objects.get(pk=self.fixtures.user.pk))
+        with transaction.atomic():
+            self.fixtures.prepare(basename, action)
+            with CaptureQueriesContext(connection) as queries:
+                res = getattr(self.client, method)(url, data)
+            transaction.set_rollback(True)
+
+        self.assertLess(res.status_code, 400,
+                        f'{basename}.{action} failed: {res.data}')
+        return len(queries)
+
+    def measure(self):
+        return {
+            (basename, action): self.count_queries(
+                basename, action, method, detail, url_name)
+            for basename, action, method, detail, url_name in route_actions()
+        }
+
+    def test_query_counts_within_budget(self):
+        """Test query counts are constant and within the budget file"""
+        budgets = load_budgets()
+        seeding.seed(users=10)
+        self.fixtures.grow(SIZES[0])
+        small = self.measure()
+        seeding.seed(users=40, seed=1)
+        self.fixtures.grow(SIZES[1] - SIZES[0])
+        large = self.measure()
+
+        for (basename, action), count in large.items():
+            with self.subTest(route=basename, action=action):
+                self.assertIn(action, budgets.get(basename, {}),
+                              f'No query budget for {basename}.{action}')
+                self.assertEqual(
+                    count, small[basename, action],
+                    f'{basename}.{action} runs {small[basename, action]} '
+                    f'queries with {SIZES[0]} rows and {count} with '
+                    f'{SIZES[1]}'
+                )
+                self.assertLessEqual(
+                    count, budgets[basename][action],
+                    f'{basename}.{action} runs {count} queries, over its '
+                    f'budget of {budgets[basename][action]}'
+                )
+
+    def test_every_route_is_exercised(self):
+        """Test the harness covers every route and budgeted action"""
+        budgets = load_budgets()
+        exercised = {}
+        for basename, action, *_ in route_actions():
+            exercised.setdefault(basename, set()).add(action)
+
+        self.assertEqual(
+            set(exercised),
+            {basename for _, _, basename in router.registry}
+        )
+        for basename, actions in budgets.items():
+            self.assertEqual(set(actions), exercised.get(basename))
@@ -0,0 +1,100 @@
+import json
+
+import msgpack
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Organization, Project
+
+
+PROJECTS_URL = reverse('projects:project-list')
+COLUMNS = 'application/vnd.columns+json'
+
+
+def detail_url(project_id):
+    return reverse('projects:project-detail', args=[project_id])
+
+
+class RendererApiTests(TestCase):
+    """Test the lists can be read as MessagePack and JSON columns"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@xemob.com', 'testpass')
+        self.client.force_authenticate(self.user)
+        self.organization = Organization.objects.create(
+            user=self.user, name='NGO', country='Spain')
+        self.projects = [
+            Project.objects.create(user=self.user,
+                                   organization=self.organization,
+                                   name=f'Project {i}')
+            for i in range(3)
+        ]
+
+    def test_messagepack_list(self):
+        """Test lists are rendered as MessagePack when accepted"""
+        res = self.client.get(PROJECTS_URL,
+                              HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        rows = msgpack.unpackb(res.content, raw=False)
+        self.assertEqual([row['name'] for row in rows],
+                         ['Project 2', 'Project 1', 'Project 0'])
+
+    def test_messagepack_write(self):
+        """Test writes accept MessagePack bodies"""
+        project = self.projects[0]
+
+        res = self.client.patch(
+            detail_url(project.id),
+            msgpack.packb({'name': 'Renamed'}),
+            content_type='application/msgpack',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        project.refresh_from_db()
+        self.assertEqual(project.name, 'Renamed')
+
+    def test_invalid_messagepack(self):
+        """Test invalid MessagePack bodies are a bad request"""
+        res = self.client.patch(detail_url(self.projects[0].id), b'\xc1',
+                                content_type='application/msgpack')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_columns(self):
+        """Test lists are rendered as columns with Accept or format"""
+        for res in (self.client.get(PROJECTS_URL, HTTP_ACCEPT=COLUMNS),
+                    self.client.get(PROJECTS_URL, {'format': 'columns'})):
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            table = json.loads(res.content)
+            self.assertEqual(list(table), ['id', 'name', 'user',
+                                           'organization', 'description',
+                                           'ref_link'])
+            self.assertEqual(table['name'],
+                             ['Project 2', 'Project 1', 'Project 0'])
+            self.assertEqual(table['user'], [self.user.id] * 3)
+
+    def test_paginated_columns(self):
+        """Test the rows of a page are rendered as columns"""
+        res = self.client.get(PROJECTS_URL, {'limit': 2},
+                              HTTP_ACCEPT=COLUMNS)
+
+        page = json.loads(res.content)
+        self.assertEqual(page['count'], 3)
+        self.assertEqual(page['results']['name'], ['Project 2', 'Project 1'])
+
+    def test_detail_columns(self):
+        """Test details are rendered as plain JSON"""
+        res = self.client.get(detail_url(self.projects[0].id),
+                              {'format': 'columns'})
+
+        self.assertEqual(json.loads(res.content)['name'], 'Project 0')
@@ -5,7 +5,8 @@ from django.test import TestCase
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Project, Cooperation, Organization, Review
+from core.models import Project, Cooperation, Organization, Review, \
+    UserRating
 
 from projects.serializers import ReviewSerializer
 
@@ -136,3 +137,49 @@ class PrivateReviewApiTests(TestCase):
         res = self.client.post(REVIEW_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_rated_review(self):
+        """Test a rated review updates the ratings of the reviewed user"""
+        sample_org = Organization.objects.create(user=self.user,
+                                                 name='Sample ngo',
+                                                 country='spain')
+        sample_project = Project.objects.create(user=self.user,
+                                                organization=sample_org,
+                                                name='Sample Project')
+        sample_cooperation = Cooperation.objects.create(
+            name='Sample cooperation',
+            project=sample_project)
+        payload = {'name': 'Rated review',
+                   'cooperation': sample_cooperation.id,
+                   'user': self.user.id,
+                   'reviewed': self.user2.id,
+                   'review': 'Great work',
+                   'rating': 4}
+
+        res = self.client.post(REVIEW_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(UserRating.objects.get(user=self.user2).mean, 4)
+
+    def test_create_review_rating_out_of_range(self):
+        """Test ratings must be between 1 and 5"""
+        sample_org = Organization.objects.create(user=self.user,
+                                                 name='Sample ngo',
+                                                 country='spain')
+        sample_project = Project.objects.create(user=self.user,
+                                                organization=sample_org,
+                                                name='Sample Project')
+        sample_cooperation = Cooperation.objects.create(
+            name='Sample cooperation',
+            project=sample_project)
+        payload = {'name': 'Rated review',
+                   'cooperation': sample_cooperation.id,
+                   'user': self.user.id,
+                   'reviewed': self.user2.id,
+                   'review': 'Great work',
+                   'rating': 6}
+
+        res = self.client.post(REVIEW_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(UserRating.objects.exists())
@@ -16,5 +16,6 @@ router.register('message', views.MessageViewSet)
 app_name = 'projects'
 
 urlpatterns = [
+    path('facets/', views.FacetsView.as_view(), name='facets'),
     path('', include(router.urls))
 ]
@@ -1,22 +1,50 @@
-from rest_framework import viewsets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 from rest_framework.serializers import ValidationError
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, \
     IsAuthenticated
-from django.db.models import Q
-from .permissions import IsOwnerOrReadOnly
+from django.db.models import Count, Prefetch, Q
+from .permissions import IsOwner, IsOwnerOrReadOnly
 from django.utils.translation import ugettext_lazy as _
 
+from core import archive, caching, compression, deletion, jobs, tasks
+from core.authentication import BatchAuthentication, \
+    CachedTokenAuthentication
 from core.models import Organization, CooperatorProfile, Project, \
     PortfolioItem, Cooperation, Review, Message
 
-from projects import serializers
+from projects import facets, serializers
+from projects.parsers import MessagePackParser
+from projects.renderers import ColumnarJSONRenderer, MessagePackRenderer
+from projects.filters import WhitelistFilterBackend, \
+    WhitelistOrderingFilter, boolean, country, timestamp
 
 
 class BaseProjectsAttrViewSet(viewsets.ModelViewSet):
     """Base vieset for projects attributes"""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,
+                              BatchAuthentication)
     permission_classes = (IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly)
+    # Chosen with the Accept header or the format query parameter
+    renderer_classes = (*api_settings.DEFAULT_RENDERER_CLASSES,
+                        MessagePackRenderer, ColumnarJSONRenderer)
+    parser_classes = (*api_settings.DEFAULT_PARSER_CLASSES,
+                      MessagePackParser)
+    filter_backends = (WhitelistFilterBackend, WhitelistOrderingFilter)
+    # Query parameters allowed to filter and sort lists, each filter
+    # backed by an index
+    filter_fields = {}
+    ordering_fields = {'id': 'id'}
 
     # def perform_create(self, serializer):
     #     """Create a new Item from Models"""
@@ -24,66 +52,323 @@ class BaseProjectsAttrViewSet(viewsets.ModelViewSet):
     #         serializer.save(user=self.request.user)
 
     def perform_create(self, serializer):
-
-        if self.request.user.id != int(self.request.POST['user']):
+        # request.data, unlike request.POST, holds JSON and MessagePack
+        # bodies too
+        try:
+            user = int(self.request.data.get('user'))
+        except (TypeError, ValueError):
+            user = None
+        if self.request.user.id != user:
             message = _("""There is an error updating this user.
                          Please, login and try again""")
             raise ValidationError(message)
 
-        if serializer.is_valid() and self.request.user.id == int(
-                                     self.request.POST['user']):
-            serializer.save(user=self.request.user)
+        serializer.save(user=self.request.user)
+
+
+class ArchiveFallbackMixin:
+    """Retrieve the rows moved to the archive as if they were still in
+    their table"""
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            if self.action != 'retrieve':
+                raise
+            instance = self.get_archived()
+            if instance is None:
+                raise
+            self.check_object_permissions(self.request, instance)
+            return instance
+
+    def get_archived(self):
+        """Return the archived row of the url if the user can see it"""
+        lookup = str(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        if not lookup.isdigit():
+            return None
+        instance = archive.get_archived(self.queryset.model, lookup)
+        if instance is None or not self.is_visible(instance):
+            return None
+        return instance
+
+    def is_visible(self, instance):
+        """Return whether the user can see an archived row"""
+        return True
+
+
+class CachedResponseMixin:
+    """Cache the rendered lists and details, compressed.
+
+    These responses are the same for every user, so they are cached once
+    per url with the bodies compressed in each encoding asked for: a hit
+    is sent as it is, never rendered or compressed again. Entries are
+    invalidated with the namespaces of cache_namespaces. Nothing is cached
+    in the database cache, where a hit costs as many queries as a miss.
+    """
+    cache_namespaces = ('directory',)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args,
+                                    **kwargs)
+
+    def cached_response(self, view, request, *args, namespaces=None,
+                        **kwargs):
+        """Return the response of a view from the cache if possible, the
+        cache_namespaces of the view unless namespaces are given"""
+        if (isinstance(request.accepted_renderer, BrowsableAPIRenderer)
+                or caching.in_database()):
+            return view(request, *args, **kwargs)
+        key = caching.cache_key(namespaces or self.cache_namespaces, {
+            'url': request.build_absolute_uri(),
+            'media_type': request.accepted_media_type,
+        })
+        entry = cache.get(key)
+        store = entry is None
+        if entry is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()
+            response.render()
+            entry = {'content_type': response['Content-Type'],
+                     'identity': response.content}
+            response['X-Cache'] = 'miss'
+        else:
+            response = HttpResponse(content_type=entry['content_type'])
+            response['X-Cache'] = 'hit'
+
+        encoding = compression.negotiate(request)
+        if len(entry['identity']) < settings.COMPRESSION_MIN_SIZE:
+            encoding = None
+        if encoding is not None and encoding not in entry:
+            entry[encoding] = compression.compress(entry['identity'],
+                                                   encoding)
+            store = True
+        if store:
+            cache.set(key, entry, settings.RESPONSE_CACHE_TIMEOUT)
+        return compression.encode_response(
+            response, entry[encoding or 'identity'], encoding)
 
 
 class OrganizationViewSet(BaseProjectsAttrViewSet):
 
     """Manage Organizations in the database"""
-    queryset = Organization.objects.all().order_by('-id')
+    queryset = Organization.objects.alive().order_by('-id')
     serializer_class = serializers.OrganizationSerializer
+    filter_fields = {
+        'user': 'user',
+        'country': ('country_code', country),
+    }
+    ordering_fields = {'id': 'id', 'name': 'name'}
+
+    @action(detail=True, permission_classes=(IsAuthenticated, IsOwner))
+    def dashboard(self, request, pk=None):
+        """Count the active and finished cooperations and the reviews of
+        each project of the organization, in a single query"""
+        organization = self.get_object()
+        projects = Project.objects.filter(
+            organization=organization
+        ).annotate(
+            active_cooperations=Count(
+                'cooperation', distinct=True,
+                filter=Q(cooperation__end_date__isnull=True)),
+            finished_cooperations=Count(
+                'cooperation', distinct=True,
+                filter=Q(cooperation__end_date__isnull=False)),
+            reviews=Count('cooperation__review'),
+        ).order_by('-id')
+        rows = serializers.ProjectDashboardSerializer(projects, many=True).data
+        return Response({
+            'organization': self.get_serializer(organization).data,
+            'projects': rows,
+            'totals': {
+                field: sum(row[field] for row in rows)
+                for field in ('active_cooperations',
+                              'finished_cooperations', 'reviews')
+            },
+        })
 
+    def perform_destroy(self, instance):
+        """Hide the organization, its rows are deleted in the background"""
+        deletion.soft_delete_organization(instance)
+        jobs.enqueue(tasks.purge_deleted, unique=True)
 
-class CooperatorProfileViewSet(BaseProjectsAttrViewSet):
+
+class CooperatorProfileViewSet(CachedResponseMixin,
+                               BaseProjectsAttrViewSet):
     """Manage Cooperators in the database"""
-    queryset = CooperatorProfile.objects.all().order_by('-name')
+    cache_namespaces = ('directory', 'ratings')
+    queryset = CooperatorProfile.objects.filter(
+        user__deleted_at__isnull=True
+    ).select_related('user__rating', 'user__trust').order_by('-name')
     serializer_class = serializers.CooperatorProfileSerializer
+    filter_fields = {
+        'min_rating': ('user__rating__mean__gte', float),
+        'min_reviews': ('user__rating__count__gte', int),
+    }
+    ordering_fields = {'rating': 'user__rating__mean', 'name': 'name'}
+
+    @action(detail=True)
+    def full(self, request, pk=None):
+        """Retrieve a cooperator with its portfolio, the reviews it
+        received and its public cooperations, in four queries"""
+        return self.cached_response(
+            self.retrieve_full, request, pk=pk,
+            namespaces=('directory', 'ratings', 'activity'))
 
+    def retrieve_full(self, request, pk=None):
+        return Response(self.get_serializer(self.get_object()).data)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'full':
+            queryset = queryset.prefetch_related(
+                Prefetch('user__portfolioitem_set', to_attr='portfolio',
+                         queryset=PortfolioItem.objects.order_by('-id')),
+                Prefetch('user__reviewed', to_attr='reviews',
+                         queryset=Review.objects.filter(
+                             user__deleted_at__isnull=True).order_by('-id')),
+                Prefetch('user__voluntary', to_attr='cooperations',
+                         queryset=Cooperation.objects.filter(
+                             is_private=False, user__deleted_at__isnull=True
+                         ).order_by('-id')),
+            )
+        return queryset
 
-class ProjectViewSet(BaseProjectsAttrViewSet):
+    def get_serializer_class(self):
+        if self.action == 'full':
+            return serializers.CooperatorFullSerializer
+        return self.serializer_class
+
+
+class ProjectViewSet(CachedResponseMixin, BaseProjectsAttrViewSet):
     """Manage Projects in the database"""
     serializer_class = serializers.ProjectSerializer
-    queryset = Project.objects.all().order_by('-id')
+    queryset = Project.objects.filter(
+        organization__deleted_at__isnull=True,
+        user__deleted_at__isnull=True).order_by('-id')
+    filter_fields = {'user': 'user', 'organization': 'organization'}
+    ordering_fields = {'id': 'id', 'name': 'name'}
 
 
 class PortfolioItemViewSet(BaseProjectsAttrViewSet):
     """Manage Portfolio Items in the database"""
     serializer_class = serializers.PortfolioItemSerializer
-    queryset = PortfolioItem.objects.all().order_by('-name')
+    queryset = PortfolioItem.objects.filter(
+        user__deleted_at__isnull=True).order_by('-name')
+    filter_fields = {'user': 'user'}
+    ordering_fields = {'id': 'id', 'name': 'name'}
 
 
-class CooperationViewSet(BaseProjectsAttrViewSet):
+class CooperationViewSet(ArchiveFallbackMixin, BaseProjectsAttrViewSet):
     """Manage cooperations in the database"""
     serializer_class = serializers.CooperationSerializer
-    queryset = Cooperation.objects.all()
+    queryset = Cooperation.objects.filter(user__deleted_at__isnull=True)
+    filter_fields = {
+        'user': 'user',
+        'voluntary': 'voluntary',
+        'project': 'project',
+        'active': ('end_date__isnull', boolean),
+    }
+    ordering_fields = {'id': 'id', 'start_date': 'start_date',
+                       'end_date': 'end_date'}
 
     def get_queryset(self):
-        """Retrieve the cooperations which aren't private"""
-        return self.queryset.filter(is_private=False).order_by('-id')
+        """Retrieve the public cooperations and the private ones the user
+        takes part in"""
+        return self.queryset.visible_to(self.request.user).order_by('-id')
+
+    def is_visible(self, instance):
+        user = self.request.user
+        return not instance.is_private or user.is_authenticated and \
+            user.id in (instance.user_id, instance.voluntary_id)
 
+    @action(detail=False, permission_classes=(IsAuthenticated,))
+    def mine(self, request):
+        """List the cooperations of the user, private ones included"""
+        cooperations = self.filter_queryset(
+            self.queryset.involving(request.user).order_by('-id'))
+        page = self.paginate_queryset(cooperations)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(cooperations, many=True)
+        return Response(serializer.data)
 
-class ReviewViewSet(BaseProjectsAttrViewSet):
+
+class ReviewViewSet(ArchiveFallbackMixin, BaseProjectsAttrViewSet):
     """Manage Reviews in the database"""
-    queryset = Review.objects.all().order_by('-id')
+    queryset = Review.objects.filter(
+        user__deleted_at__isnull=True).order_by('-id')
+    filter_fields = {'user': 'user', 'reviewed': 'reviewed',
+                     'cooperation': 'cooperation'}
+    ordering_fields = {'id': 'id', 'rating': 'rating'}
     serializer_class = serializers.ReviewSerializer
 
 
-class MessageViewSet(BaseProjectsAttrViewSet):
+class MessageViewSet(ArchiveFallbackMixin, BaseProjectsAttrViewSet):
     """Manage messages in the database"""
     permission_classes = (IsAuthenticated,)
-    queryset = Message.objects.all().order_by('-date')
+    throttle_scope = 'messages'
+    queryset = Message.objects.filter(
+        user__deleted_at__isnull=True).order_by('-date')
+    filter_fields = {
+        'user': 'user',
+        'recipient': 'recipient',
+        'since': ('date__gte', timestamp),
+        'until': ('date__lt', timestamp),
+    }
+    ordering_fields = {'date': 'date'}
     serializer_class = serializers.MessageSerializer
 
     def get_queryset(self):
-        """Retrieve the messages where the user is involved"""
-        return self.queryset.filter(
+        """Retrieve the messages where the user is involved.
+
+        When MESSAGE_INBOX_DAYS is set, lists are limited to the recent
+        messages unless a start date is given, so only the partitions of
+        those months are read.
+        """
+        queryset = self.queryset.filter(
             Q(user=self.request.user) | Q(recipient=self.request.user)
         ).order_by('-date')
+        if self.action == 'list' and settings.MESSAGE_INBOX_DAYS and \
+                not self.request.query_params.get('since'):
+            queryset = queryset.filter(date__gte=timezone.now() - timedelta(
+                days=settings.MESSAGE_INBOX_DAYS))
+        return queryset
+
+    def is_visible(self, instance):
+        return self.request.user.id in (instance.user_id,
+                                        instance.recipient_id)
+
+
+class FacetsView(APIView):
+    """Count the projects and cooperators of the directory by facet"""
+    authentication_classes = (CachedTokenAuthentication,
+                              BatchAuthentication)
+    permission_classes = (IsAuthenticatedOrReadOnly,)
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            filters = {
+                'country': country(params['country'])
+                if params.get('country') else None,
+                'organization': int(params['organization'])
+                if params.get('organization') else None,
+                'skill': params.get('skill', '').strip().lower() or None,
+            }
+        except ValueError:
+            raise ValidationError(_('Invalid facet filter'))
+
+        return Response(caching.cached(
+            'directory', filters,
+            lambda: facets.directory_facets(**filters),
+            settings.FACETS_CACHE_TIMEOUT
+        ))
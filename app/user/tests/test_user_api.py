@@ -5,6 +5,8 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core import throttling
+
 
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
@@ -19,6 +21,7 @@ class PublicUserApiTests(TestCase):
     """Test the users API (public)"""
 
     def setUp(self):
+        throttling.local_buckets.clear()
         self.client = APIClient()
 
     def test_create_valid_user_success(self):
@@ -105,6 +108,7 @@ class PrivateUserApiTests(TestCase):
     """Test API requests that require authentication"""
 
     def setUp(self):
+        throttling.local_buckets.clear()
         self.user = create_user(
             email='test@xemob.com',
             password='testpass',
@@ -139,3 +143,15 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.name, payload['name'])
         self.assertTrue(self.user.check_password(payload['password']))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_delete_user(self):
+        """Test deleting the user deactivates it until it is purged"""
+        res = self.client.delete(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertIsNotNone(self.user.deleted_at)
+        res = self.client.post(TOKEN_URL, {'email': 'test@xemob.com',
+                                           'password': 'testpass'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)